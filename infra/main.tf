@@ -90,13 +90,15 @@ resource "aws_lb_target_group" "app_tg" {
   vpc_id      = aws_vpc.main.id
   target_type = "ip"
 
+  # /ready answers 503 until startup (imports, pools, warmup) is done and again while draining,
+  # so new tasks join after ~2 checks instead of 5 x 30s
   health_check {
-    path                = "/"
-    interval            = 30
+    path                = "/ready"
+    interval            = 10
     timeout             = 5
-    healthy_threshold   = 5
-    unhealthy_threshold = 2
-    matcher             = "200-399"
+    healthy_threshold   = 2
+    unhealthy_threshold = 3
+    matcher             = "200"
   }
 
   tags = {
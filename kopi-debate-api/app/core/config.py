@@ -5,11 +5,106 @@ class Settings:
     SUPABASE_URL: str = os.getenv("SUPABASE_URL", "")
     SUPABASE_KEY: str = os.getenv("SUPABASE_KEY", "")
     GOOGLE_API_KEY: str = os.getenv("GOOGLE_API_KEY", "")
+    # storage backend: "supabase" (PostgREST over HTTP), "postgres" (asyncpg pool on DATABASE_URL)
+    # or "sqlite" (local file at SQLITE_PATH, for offline runs and benchmarks)
+    DATABASE_BACKEND: str = os.getenv("DATABASE_BACKEND", "supabase").lower()
+    DATABASE_URL: str = os.getenv("DATABASE_URL", "")
+    DB_POOL_MIN_SIZE: int = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+    DB_POOL_MAX_SIZE: int = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+    # prepared statements cached per connection; set to 0 behind a transaction-mode pooler (pgbouncer/Supavisor :6543)
+    DB_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+    SQLITE_PATH: str = os.getenv("SQLITE_PATH", "kopi.db")
+    # message writes return once queued and are stored in bulk in the background (conversation rows stay
+    # write-through); flushed at WRITE_BEHIND_FLUSH_ROWS rows or WRITE_BEHIND_FLUSH_INTERVAL_MS after the first
+    WRITE_BEHIND: bool = os.getenv("WRITE_BEHIND", "false").lower() == "true"
+    WRITE_BEHIND_MAX_ROWS: int = int(os.getenv("WRITE_BEHIND_MAX_ROWS", "10000"))
+    WRITE_BEHIND_FLUSH_ROWS: int = int(os.getenv("WRITE_BEHIND_FLUSH_ROWS", "500"))
+    WRITE_BEHIND_FLUSH_INTERVAL_MS: int = int(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL_MS", "50"))
+    WRITE_BEHIND_RETRY_MAX_SECONDS: float = float(os.getenv("WRITE_BEHIND_RETRY_MAX_SECONDS", "5"))
+    # a flush still failing after this many attempts is dropped (logged and counted); rows the database
+    # rejects outright are dropped at once
+    WRITE_BEHIND_MAX_ATTEMPTS: int = int(os.getenv("WRITE_BEHIND_MAX_ATTEMPTS", "10"))
+    # how long shutdown waits for queued messages to be stored; keep below the ECS stop timeout (30s)
+    WRITE_BEHIND_DRAIN_TIMEOUT_SECONDS: float = float(os.getenv("WRITE_BEHIND_DRAIN_TIMEOUT_SECONDS", "20"))
     PROJECT_NAME: str = "Kopi Debate API"
     API_PREFIX: str = "/api/v1"
     GEMINI_MODEL: str = "gemini-2.5-flash"
-    CHAT_HISTORY_WINDOW: int = 5
+    # most recent messages read per turn; the ones that fit HISTORY_TOKEN_BUDGET go to Gemini verbatim
+    CHAT_HISTORY_WINDOW: int = int(os.getenv("CHAT_HISTORY_WINDOW", "20"))
+    HISTORY_TOKEN_BUDGET: int = int(os.getenv("HISTORY_TOKEN_BUDGET", "600"))
+    # older messages are folded into a per-conversation summary in the background, capped at this size
+    ROLLING_SUMMARY: bool = os.getenv("ROLLING_SUMMARY", "true").lower() == "true"
+    SUMMARY_MAX_TOKENS: int = int(os.getenv("SUMMARY_MAX_TOKENS", "300"))
+    # new conversations get topic, stance and first reply from one Gemini call (two-call fallback)
+    OPENING_TURN_SINGLE_CALL: bool = os.getenv("OPENING_TURN_SINGLE_CALL", "true").lower() == "true"
+    # a turn's independent steps (new conversation's meta row, reply) run concurrently; false runs them in order
+    CONCURRENT_TURN_STEPS: bool = os.getenv("CONCURRENT_TURN_STEPS", "true").lower() == "true"
+    # resolve common debate openers and greetings locally before asking Gemini
+    FAST_META_EXTRACTION: bool = os.getenv("FAST_META_EXTRACTION", "true").lower() == "true"
+    # Gemini meta extractions cached by normalized opener (memory LRU over a SQLite file shared by the
+    # host's workers; empty path keeps it in memory); INVALID verdicts only for the shorter TTL
+    META_EXTRACTION_CACHE: bool = os.getenv("META_EXTRACTION_CACHE", "true").lower() == "true"
+    META_EXTRACTION_CACHE_PATH: str = os.getenv("META_EXTRACTION_CACHE_PATH", "meta_extraction_cache.db")
+    META_EXTRACTION_CACHE_MAX_ENTRIES: int = int(os.getenv("META_EXTRACTION_CACHE_MAX_ENTRIES", "10000"))
+    META_EXTRACTION_CACHE_TTL_SECONDS: float = float(os.getenv("META_EXTRACTION_CACHE_TTL_SECONDS", "2592000"))
+    META_EXTRACTION_CACHE_INVALID_TTL_SECONDS: float = float(os.getenv("META_EXTRACTION_CACHE_INVALID_TTL_SECONDS", "600"))
+    HISTORY_CACHE_MAX_CONVERSATIONS: int = int(os.getenv("HISTORY_CACHE_MAX_CONVERSATIONS", "10000"))
+    HISTORY_CACHE_MAX_BYTES: int = int(os.getenv("HISTORY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    # a cached window is read again after this long, so turns written on another worker show up within it
+    HISTORY_CACHE_TTL_SECONDS: float = float(os.getenv("HISTORY_CACHE_TTL_SECONDS", "30"))
+    META_CACHE_MAX_ENTRIES: int = int(os.getenv("META_CACHE_MAX_ENTRIES", "100000"))
+    META_CACHE_TTL_SECONDS: float = float(os.getenv("META_CACHE_TTL_SECONDS", "86400"))
+    META_CACHE_NEGATIVE_TTL_SECONDS: float = float(os.getenv("META_CACHE_NEGATIVE_TTL_SECONDS", "5"))
+    # serialized GET /chat/chats and /chat/history responses served (or 304'd) without the DB while unchanged.
+    # A write made on another worker shows up in the chat list within the TTL, and in a history page within
+    # the TTL plus HISTORY_CACHE_TTL_SECONDS (the page is rebuilt from the history cache)
+    RESPONSE_CACHE_MAX_ENTRIES: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2000"))
+    RESPONSE_CACHE_TTL_SECONDS: float = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "5"))
+    HTTP_POOL_MAX_CONNECTIONS: int = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "100"))
+    HTTP_POOL_MAX_KEEPALIVE: int = int(os.getenv("HTTP_POOL_MAX_KEEPALIVE", "20"))
+    HTTP_TIMEOUT_SECONDS: float = float(os.getenv("HTTP_TIMEOUT_SECONDS", "30"))
+    HTTP2: bool = os.getenv("HTTP2", "true").lower() == "true"
+    # open Supabase and Gemini connections during startup, before the worker takes traffic
+    WARMUP_ON_STARTUP: bool = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+    WARMUP_TIMEOUT_SECONDS: float = float(os.getenv("WARMUP_TIMEOUT_SECONDS", "10"))
+    # Supabase Realtime broadcast channel for cross-worker cache invalidation; empty disables it
+    CACHE_INVALIDATION_CHANNEL: str = os.getenv("CACHE_INVALIDATION_CHANNEL", "")
+    # Gemini admission control: concurrent calls, how many may wait for a slot and for how long
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+    LLM_MAX_QUEUE: int = int(os.getenv("LLM_MAX_QUEUE", "64"))
+    LLM_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "10"))
+    # retries on 429/5xx with jittered exponential backoff; a longer server-requested wait fails fast instead
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "3"))
+    LLM_RETRY_BASE_SECONDS: float = float(os.getenv("LLM_RETRY_BASE_SECONDS", "0.5"))
+    LLM_RETRY_MAX_SECONDS: float = float(os.getenv("LLM_RETRY_MAX_SECONDS", "8"))
+    # consecutive failed calls that open the breaker, and how long it stays open before a probe
+    LLM_BREAKER_THRESHOLD: int = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+    LLM_BREAKER_COOLDOWN_SECONDS: float = float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", "30"))
+    # how long a completed POST /chat/message is replayed for a repeated Idempotency-Key
+    IDEMPOTENCY_TTL_SECONDS: float = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "300"))
+    IDEMPOTENCY_MAX_KEYS: int = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000"))
+    # POST /chat/messages:batch: items per request and turns run at once (keep below LLM_MAX_CONCURRENCY
+    # so a batch leaves Gemini slots for interactive traffic)
+    BATCH_MAX_ITEMS: int = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+    BATCH_MAX_CONCURRENCY: int = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+    # conversations older than RETENTION_DAYS (0 keeps everything) are purged every RETENTION_INTERVAL_SECONDS,
+    # oldest first, in batches of at most RETENTION_BATCH_SIZE that shrink when one takes over
+    # RETENTION_BATCH_TARGET_MS; a run stops after RETENTION_RUN_MAX_SECONDS and the next picks up the rest
+    RETENTION_DAYS: float = float(os.getenv("RETENTION_DAYS", "0"))
+    RETENTION_INTERVAL_SECONDS: float = float(os.getenv("RETENTION_INTERVAL_SECONDS", "3600"))
+    RETENTION_BATCH_SIZE: int = int(os.getenv("RETENTION_BATCH_SIZE", "100"))
+    RETENTION_BATCH_TARGET_MS: int = int(os.getenv("RETENTION_BATCH_TARGET_MS", "200"))
+    RETENTION_BATCH_PAUSE_MS: int = int(os.getenv("RETENTION_BATCH_PAUSE_MS", "50"))
+    RETENTION_RUN_MAX_SECONDS: float = float(os.getenv("RETENTION_RUN_MAX_SECONDS", "60"))
+    # POST /chat/chats:delete: ids per request (deleted RETENTION_BATCH_SIZE at a time)
+    BULK_DELETE_MAX_IDS: int = int(os.getenv("BULK_DELETE_MAX_IDS", "1000"))
+    # GET /chat/export and the export CLI: rows read per keyset query, so memory doesn't grow with the export
+    EXPORT_CHUNK_ROWS: int = int(os.getenv("EXPORT_CHUNK_ROWS", "1000"))
+    # Server-Timing header, /metrics and per-stage histograms; "false" leaves every call path unwrapped
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    # async-native Supabase/Gemini clients; "false" runs the blocking clients on the threadpool
+    ASYNC_IO: bool = os.getenv("ASYNC_IO", "true").lower() == "true"
 
 @lru_cache
 def get_settings():
-    return Settings() 
\ No newline at end of file
+    return Settings()
@@ -1,13 +1,163 @@
+from typing import Optional
 from dependency_injector import containers, providers
+from app.core.config import get_settings
+from app.core.db import create_async_supabase_client, init_postgres_pool, init_sqlite_repository
+from app.core.http import init_http_client
+from app.core.idempotency import IdempotencyStore
+from app.core.invalidation import InvalidationBus
+from app.core.keyed_lock import KeyedLock
+from app.core.llm_scheduler import LLMScheduler
+from app.core.response_cache import ResponseCache
+from app.features.chat.repositories.cached_chat_repository import CachedChatRepository
+from app.features.chat.repositories.change_versions import ChangeVersions
 from app.features.chat.repositories.chat_repository import ChatRepository
+from app.features.chat.repositories.postgres_chat_repository import PostgresChatRepository
+from app.features.chat.repositories.history_cache import HistoryCache
+from app.features.chat.repositories.meta_cache import ConversationMetaCache
+from app.features.chat.repositories.write_behind_chat_repository import WriteBehindChatRepository
 from app.features.chat.services.chat_service import ChatService
 from app.features.chat.services.llm_service import LLMService
+from app.features.chat.services.meta_extractor import RuleBasedMetaExtractor
+from app.features.chat.services.meta_extraction_cache import MetaExtractionCache
+from app.features.chat.services.retention import ConversationPurger, RetentionJob
+from app.features.chat.prompts.debate_prompts import build_meta_extraction_prompt
+
+settings = get_settings()
 
 class Container(containers.DeclarativeContainer):
-    chat_repository = providers.Factory(ChatRepository)
-    llm_service = providers.Factory(LLMService)
-    chat_service = providers.Factory(
+    # opened by init_resources() and closed by shutdown_resources() from the app lifespan
+    http_client = providers.Resource(init_http_client)
+    # the Supabase client also carries the invalidation broadcast, so it can outlive the PostgREST backend
+    supabase_client = (
+        providers.Resource(create_async_supabase_client, http_client=http_client)
+        if settings.DATABASE_BACKEND == "supabase" or settings.CACHE_INVALIDATION_CHANNEL
+        else providers.Object(None)
+    )
+    postgres_pool = providers.Resource(init_postgres_pool) if settings.DATABASE_BACKEND == "postgres" else providers.Object(None)
+
+    if settings.DATABASE_BACKEND == "postgres":
+        backend_repository = providers.Singleton(PostgresChatRepository, pool=postgres_pool)
+    elif settings.DATABASE_BACKEND == "sqlite":
+        backend_repository = providers.Resource(init_sqlite_repository, path=settings.SQLITE_PATH)
+    else:
+        backend_repository = providers.Singleton(ChatRepository, client=supabase_client)
+
+    if settings.WRITE_BEHIND:
+        # drained by the app lifespan on shutdown, before the backend's connections close
+        write_behind = providers.Singleton(
+            WriteBehindChatRepository,
+            repository=backend_repository,
+            max_rows=settings.WRITE_BEHIND_MAX_ROWS,
+            flush_rows=settings.WRITE_BEHIND_FLUSH_ROWS,
+            flush_interval_seconds=settings.WRITE_BEHIND_FLUSH_INTERVAL_MS / 1000,
+            retry_max_seconds=settings.WRITE_BEHIND_RETRY_MAX_SECONDS,
+            max_attempts=settings.WRITE_BEHIND_MAX_ATTEMPTS
+        )
+        stored_repository = write_behind
+        dropped_on_delete = [write_behind.provided.discard]
+    else:
+        write_behind = providers.Object(None)
+        stored_repository = backend_repository
+        dropped_on_delete = []
+
+    # shared across requests: the cache only pays off if every repository sees the same one
+    history_cache = providers.Singleton(
+        HistoryCache,
+        window=settings.CHAT_HISTORY_WINDOW,
+        max_conversations=settings.HISTORY_CACHE_MAX_CONVERSATIONS,
+        max_bytes=settings.HISTORY_CACHE_MAX_BYTES,
+        ttl_seconds=settings.HISTORY_CACHE_TTL_SECONDS
+    )
+    meta_cache = providers.Singleton(
+        ConversationMetaCache,
+        max_entries=settings.META_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.META_CACHE_TTL_SECONDS,
+        negative_ttl_seconds=settings.META_CACHE_NEGATIVE_TTL_SECONDS
+    )
+    change_versions = providers.Singleton(ChangeVersions, max_keys=settings.HISTORY_CACHE_MAX_CONVERSATIONS)
+    invalidation_bus = providers.Singleton(
+        InvalidationBus,
+        subscribers=providers.List(
+            history_cache.provided.invalidate,
+            meta_cache.provided.invalidate,
+            change_versions.provided.conversation_listed,
+            *dropped_on_delete
+        )
+    )
+    response_cache = providers.Singleton(
+        ResponseCache,
+        version_of=change_versions.provided.version,
+        max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS
+    )
+
+    # services are stateless per request, so one instance (and one warm Gemini model) per worker
+    chat_repository = providers.Singleton(
+        CachedChatRepository,
+        repository=stored_repository,
+        history_cache=history_cache,
+        meta_cache=meta_cache,
+        invalidation_bus=invalidation_bus,
+        versions=change_versions
+    )
+    # one Gemini concurrency budget per worker, shared by every LLM call
+    llm_scheduler = providers.Singleton(LLMScheduler)
+    meta_extraction_cache = (
+        providers.Singleton(
+            MetaExtractionCache,
+            prompt=providers.Callable(build_meta_extraction_prompt),
+            model=settings.GEMINI_MODEL,
+            path=settings.META_EXTRACTION_CACHE_PATH or None,
+            max_entries=settings.META_EXTRACTION_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.META_EXTRACTION_CACHE_TTL_SECONDS,
+            invalid_ttl_seconds=settings.META_EXTRACTION_CACHE_INVALID_TTL_SECONDS
+        )
+        if settings.META_EXTRACTION_CACHE else providers.Object(None)
+    )
+    llm_service = providers.Singleton(LLMService, scheduler=llm_scheduler, meta_cache=meta_extraction_cache)
+    meta_extractor = providers.Singleton(RuleBasedMetaExtractor) if settings.FAST_META_EXTRACTION else providers.Object(None)
+    idempotency_store = providers.Singleton(
+        IdempotencyStore,
+        max_entries=settings.IDEMPOTENCY_MAX_KEYS,
+        ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS
+    )
+    # one turn at a time per conversation, and deletes wait for the turn in flight
+    turn_locks = providers.Singleton(KeyedLock)
+    # deletes through chat_repository, so purged conversations leave the caches too
+    purger = providers.Singleton(
+        ConversationPurger,
+        repository=chat_repository,
+        batch_size=settings.RETENTION_BATCH_SIZE,
+        batch_target_seconds=settings.RETENTION_BATCH_TARGET_MS / 1000,
+        pause_seconds=settings.RETENTION_BATCH_PAUSE_MS / 1000,
+        turn_locks=turn_locks
+    )
+    chat_service = providers.Singleton(
         ChatService, 
         repository=chat_repository,
-        llm_service=llm_service
-    ) 
\ No newline at end of file
+        llm_service=llm_service,
+        meta_extractor=meta_extractor,
+        idempotency=idempotency_store,
+        turn_locks=turn_locks,
+        purger=purger
+    )
+    # started and stopped by the app lifespan
+    retention_job = (
+        providers.Singleton(
+            RetentionJob,
+            purger=purger,
+            max_age_days=settings.RETENTION_DAYS,
+            interval_seconds=settings.RETENTION_INTERVAL_SECONDS,
+            run_max_seconds=settings.RETENTION_RUN_MAX_SECONDS
+        )
+        if settings.RETENTION_DAYS > 0 else providers.Object(None)
+    )
+
+_container: Optional[Container] = None
+
+def get_container() -> Container:
+    """The worker's container, built on first use (app startup) rather than when a module is imported."""
+    global _container
+    if _container is None:
+        _container = Container()
+    return _container
@@ -1,14 +1,61 @@
-from supabase import create_client, Client
+from typing import TYPE_CHECKING, Optional
+import httpx
 from app.core.config import get_settings
 
+if TYPE_CHECKING:
+    from supabase import AsyncClient, Client
+
 settings = get_settings()
 _supabase_client = None
+_async_supabase_client = None
+
+# the supabase SDK is imported when a client is first created, not when this module is
 
-def get_supabase_client() -> Client:
+def get_supabase_client() -> "Client":
     global _supabase_client
     if _supabase_client is None:
+        from supabase import create_client
         _supabase_client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
     return _supabase_client
 
+async def create_async_supabase_client(http_client: Optional[httpx.AsyncClient] = None) -> "AsyncClient":
+    from supabase import acreate_client, AsyncClientOptions
+
+    options = AsyncClientOptions(httpx_client=http_client) if http_client is not None else None
+    return await acreate_client(settings.SUPABASE_URL, settings.SUPABASE_KEY, options=options)
+
+async def get_async_supabase_client() -> "AsyncClient":
+    global _async_supabase_client
+    if _async_supabase_client is None:
+        _async_supabase_client = await create_async_supabase_client()
+    return _async_supabase_client
+
+async def init_postgres_pool():
+    """asyncpg pool for the "postgres" backend, opened and closed by the container's lifespan."""
+    # only the postgres backend needs the driver
+    import asyncpg
+
+    pool = await asyncpg.create_pool(
+        settings.DATABASE_URL,
+        min_size=settings.DB_POOL_MIN_SIZE,
+        max_size=settings.DB_POOL_MAX_SIZE,
+        statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+        command_timeout=settings.HTTP_TIMEOUT_SECONDS
+    )
+    try:
+        yield pool
+    finally:
+        await pool.close()
+
+async def init_sqlite_repository(path: str):
+    """SQLite backend as a resource, so it closes with the others (and resolves async like them)."""
+    from app.features.chat.repositories.sqlite_chat_repository import SqliteChatRepository
+
+    repository = SqliteChatRepository(path)
+    try:
+        yield repository
+    finally:
+        repository.close()
+
 # For backwards compatibility
-supabase = get_supabase_client 
\ No newline at end of file
+supabase = get_supabase_client
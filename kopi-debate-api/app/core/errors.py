@@ -1,4 +1,4 @@
-from typing import TypeVar, Generic, Union, Callable
+from typing import TypeVar, Generic, Union, Callable, Dict, Optional
 from dataclasses import dataclass
 
 T = TypeVar('T')
@@ -6,6 +6,9 @@ T = TypeVar('T')
 @dataclass
 class Failure:
     error: str
+    # HTTP status handle_result raises with; 400 unless the failure is on our side (e.g. 503 when shedding load)
+    status_code: int = 400
+    headers: Optional[Dict[str, str]] = None
 
 class Result(Generic[T]):
     def __init__(self, value: Union[T, Failure]):
@@ -17,8 +20,12 @@ class Result(Generic[T]):
         return Result(value)
 
     @staticmethod
-    def fail(error: str) -> 'Result[T]':
-        return Result(Failure(error))
+    def fail(error: str, status_code: int = 400, headers: Optional[Dict[str, str]] = None) -> 'Result[T]':
+        return Result(Failure(error, status_code, headers))
+
+    def with_error(self, error: str) -> 'Result[T]':
+        """Same failure (status, headers) with a reworded message."""
+        return Result.fail(error, self._value.status_code, self._value.headers)
 
     def fold(self, on_fail: Callable[[str], T], on_success: Callable[[T], T]) -> T:
         if self._is_error:
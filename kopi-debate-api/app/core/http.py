@@ -0,0 +1,20 @@
+from typing import AsyncIterator
+import httpx
+from app.core.config import get_settings
+
+settings = get_settings()
+
+async def init_http_client() -> AsyncIterator[httpx.AsyncClient]:
+    """Keep-alive connection pool shared by the Supabase clients for the life of the worker."""
+    client = httpx.AsyncClient(
+        http2=settings.HTTP2,
+        timeout=settings.HTTP_TIMEOUT_SECONDS,
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_POOL_MAX_KEEPALIVE
+        )
+    )
+    try:
+        yield client
+    finally:
+        await client.aclose()
@@ -0,0 +1,56 @@
+"""Idempotency-Key handling: duplicates of a running request share its result, later ones replay it.
+
+State is per worker. Retries that land on another worker are not deduplicated.
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+from app.core.cache import TTLCache
+from app.core.errors import Result
+
+T = TypeVar('T')
+
+
+class IdempotencyStore:
+    def __init__(self, max_entries: int, ttl_seconds: float, clock: Callable[[], float] = time.monotonic) -> None:
+        # key -> (request fingerprint, shared result)
+        self._in_flight: Dict[str, Tuple[Hashable, "asyncio.Task[Result]"]] = {}
+        # successful results only; a failed request may be retried with the same key
+        self._completed: TTLCache[str, Tuple[Hashable, Result]] = TTLCache(max_entries, ttl_seconds, clock=clock)
+        self.replays = 0
+        self.joins = 0
+
+    async def run(self, key: str, fingerprint: Hashable, call: Callable[[], Awaitable[Result[T]]]) -> Result[T]:
+        """Runs `call` once per key; `fingerprint` identifies the request body the key was first used with."""
+        completed = self._completed.get(key)
+        if completed is not None:
+            if completed[0] != fingerprint:
+                return _key_reused()
+            self.replays += 1
+            return completed[1]
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            if in_flight[0] != fingerprint:
+                return _key_reused()
+            self.joins += 1
+            return await asyncio.shield(in_flight[1])
+
+        # the work runs in its own task so a disconnecting caller doesn't cancel it for the duplicates
+        task = asyncio.ensure_future(self._complete(key, fingerprint, call))
+        self._in_flight[key] = (fingerprint, task)
+        return await asyncio.shield(task)
+
+    async def _complete(self, key: str, fingerprint: Hashable, call: Callable[[], Awaitable[Result[T]]]) -> Result[T]:
+        try:
+            result = await call()
+            if not result._is_error:
+                self._completed.set(key, (fingerprint, result))
+            return result
+        finally:
+            del self._in_flight[key]
+
+
+def _key_reused() -> Result:
+    return Result.fail("Idempotency-Key was already used for a different request", status_code=422)
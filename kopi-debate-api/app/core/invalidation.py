@@ -0,0 +1,42 @@
+import logging
+from typing import Awaitable, Callable, List, Optional
+
+_BROADCAST_EVENT = "invalidate"
+
+
+class InvalidationBus:
+    """Fans cache invalidations out to in-process subscribers and, if a publisher is set, to other workers."""
+
+    def __init__(self, subscribers: Optional[List[Callable[[str], None]]] = None) -> None:
+        self._subscribers: List[Callable[[str], None]] = list(subscribers or [])
+        self._publisher: Optional[Callable[[str], Awaitable[None]]] = None
+
+    def subscribe(self, callback: Callable[[str], None]) -> None:
+        self._subscribers.append(callback)
+
+    def set_publisher(self, publisher: Optional[Callable[[str], Awaitable[None]]]) -> None:
+        self._publisher = publisher
+
+    async def publish(self, key: str) -> None:
+        self.receive(key)
+        if self._publisher is None:
+            return
+        try:
+            await self._publisher(key)
+        except Exception as e:
+            # other workers fall back to TTL expiry; never fail the request over it
+            logging.error(f"Failed to publish cache invalidation for {key}: {str(e)}", exc_info=True)
+
+    def receive(self, key: str) -> None:
+        """Entry point for invalidations arriving from other workers."""
+        for callback in self._subscribers:
+            callback(key)
+
+
+async def connect_supabase_broadcast(bus: InvalidationBus, client, channel_name: str):
+    """Bridges the bus over a Supabase Realtime broadcast channel shared by all workers."""
+    channel = client.channel(channel_name)
+    channel.on_broadcast(_BROADCAST_EVENT, lambda message: bus.receive(message["payload"]["key"]))
+    await channel.subscribe()
+    bus.set_publisher(lambda key: channel.send_broadcast(_BROADCAST_EVENT, {"key": key}))
+    return channel
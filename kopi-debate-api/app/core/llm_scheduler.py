@@ -0,0 +1,227 @@
+"""Admission control for Gemini calls: a concurrency cap with a bounded wait queue, 429-aware retries
+and a circuit breaker. Work that can't be admitted fails fast with LLMOverloaded instead of piling up.
+"""
+import asyncio
+import functools
+import logging
+import math
+import random
+import re
+import time
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Optional, Tuple, TypeVar
+
+from app.core import metrics
+from app.core.config import get_settings
+
+settings = get_settings()
+
+T = TypeVar('T')
+
+
+@functools.lru_cache(maxsize=None)
+def retryable_errors() -> Tuple[type, ...]:
+    """Rate limits and transient server-side failures; anything else (bad request, auth) is not retried.
+
+    Only evaluated once a call has failed, by which point the Gemini SDK is loaded anyway.
+    """
+    from google.api_core import exceptions
+
+    return (
+        exceptions.TooManyRequests,
+        exceptions.ResourceExhausted,
+        exceptions.ServiceUnavailable,
+        exceptions.InternalServerError,
+        exceptions.DeadlineExceeded,
+    )
+
+_RETRY_IN = re.compile(r"retry in ([\d.]+)\s*s", re.IGNORECASE)
+
+
+class LLMOverloaded(Exception):
+    """Raised instead of calling Gemini when the scheduler sheds the call; maps to HTTP 503."""
+
+    def __init__(self, reason: str, retry_after: float) -> None:
+        super().__init__(f"LLM overloaded ({reason}), retry after {retry_after:.0f}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def retry_after_hint(error: Exception) -> Optional[float]:
+    """Server-suggested delay from a Gemini error: gRPC RetryInfo, a Retry-After header or the message."""
+    for detail in getattr(error, "details", None) or []:
+        delay = getattr(detail, "retry_delay", None)
+        if delay is not None:
+            return delay.seconds + delay.nanos / 1e9
+    response = getattr(error, "response", None)
+    header = getattr(response, "headers", {}).get("retry-after") if response is not None else None
+    if header:
+        try:
+            return float(header)
+        except ValueError:
+            pass
+    match = _RETRY_IN.search(str(error))
+    return float(match.group(1)) if match else None
+
+
+class LLMScheduler:
+    def __init__(
+        self,
+        max_concurrency: int = settings.LLM_MAX_CONCURRENCY,
+        max_queue: int = settings.LLM_MAX_QUEUE,
+        queue_timeout_seconds: float = settings.LLM_QUEUE_TIMEOUT_SECONDS,
+        max_retries: int = settings.LLM_MAX_RETRIES,
+        retry_base_seconds: float = settings.LLM_RETRY_BASE_SECONDS,
+        retry_max_seconds: float = settings.LLM_RETRY_MAX_SECONDS,
+        breaker_threshold: int = settings.LLM_BREAKER_THRESHOLD,
+        breaker_cooldown_seconds: float = settings.LLM_BREAKER_COOLDOWN_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+        rng: Optional[random.Random] = None
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.max_retries = max_retries
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown_seconds = breaker_cooldown_seconds
+        self._clock = clock
+        self._sleep = sleep
+        self._random = rng or random.Random()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.waiting = 0
+        self.in_flight = 0
+        # breaker: consecutive failed calls, and when it may let a probe through again
+        self.consecutive_failures = 0
+        self._open_until: Optional[float] = None
+        self._probing = False
+        # smoothed seconds per admitted call, for the Retry-After we hand back when shedding
+        self._avg_call_seconds = 1.0
+
+    @property
+    def breaker_open(self) -> bool:
+        return self._open_until is not None
+
+    async def run(self, call: Callable[[], Awaitable[T]]) -> T:
+        async with self.slot():
+            return await self.call(call)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Holds one of the concurrency slots, e.g. for the whole of a streamed reply."""
+        probe = self._admit()
+        try:
+            await self._acquire()
+        except BaseException:
+            if probe:
+                self._probing = False
+            raise
+        self.in_flight += 1
+        self._export()
+        start = self._clock()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+            if probe:
+                self._probing = False
+            self._avg_call_seconds += 0.2 * (self._clock() - start - self._avg_call_seconds)
+            self._export()
+
+    async def call(self, call: Callable[[], Awaitable[T]]) -> T:
+        """Calls with retries on rate limits and transient errors; meant to run inside `slot()`."""
+        attempt = 0
+        while True:
+            try:
+                result = await call()
+            except retryable_errors() as e:
+                hint = retry_after_hint(e)
+                delay = self._backoff(attempt, hint)
+                if attempt >= self.max_retries or delay > self.retry_max_seconds:
+                    self._record_failure()
+                    raise LLMOverloaded("rate_limited", max(delay, 1.0)) from e
+                attempt += 1
+                if metrics.ENABLED:
+                    metrics.LLM_RETRIES.inc()
+                logging.warning(f"Gemini call failed ({type(e).__name__}), retry {attempt} in {delay:.2f}s")
+                await self._sleep(delay)
+            else:
+                self._record_success()
+                return result
+
+    def _backoff(self, attempt: int, hint: Optional[float]) -> float:
+        # full jitter, unless the server told us how long to wait
+        if hint is not None:
+            return hint + self._random.uniform(0, self.retry_base_seconds)
+        return self._random.uniform(0, min(self.retry_max_seconds, self.retry_base_seconds * 2 ** attempt))
+
+    def _admit(self) -> bool:
+        """Breaker check; returns True when this call is the half-open probe."""
+        if self._open_until is None:
+            return False
+        remaining = self._open_until - self._clock()
+        if remaining > 0:
+            self._reject("circuit_open", remaining)
+        if self._probing:
+            self._reject("circuit_half_open", self.retry_base_seconds)
+        self._probing = True
+        return True
+
+    async def _acquire(self) -> None:
+        if not self._semaphore.locked():
+            # a free slot is taken without suspending, so concurrent arrivals see it as taken
+            await self._semaphore.acquire()
+            if metrics.ENABLED:
+                metrics.LLM_QUEUE_WAIT_SECONDS.observe(0)
+            return
+        if self.waiting >= self.max_queue:
+            self._reject("queue_full", self._avg_call_seconds * (self.waiting + 1) / self.max_concurrency)
+        self.waiting += 1
+        self._export()
+        start = self._clock()
+        # wait_for can hand over the permit and still raise (or swallow a cancel) when the timeout races
+        # the acquire, so the acquire runs as its own task and a permit it got too late is given back
+        acquiring = asyncio.ensure_future(self._semaphore.acquire())
+        try:
+            try:
+                await asyncio.wait((acquiring,), timeout=self.queue_timeout_seconds)
+            except asyncio.CancelledError:
+                if not acquiring.cancel():
+                    self._semaphore.release()
+                raise
+            if acquiring.cancel():
+                self._reject("queue_timeout", self._avg_call_seconds * self.waiting / self.max_concurrency)
+        finally:
+            self.waiting -= 1
+            if metrics.ENABLED:
+                metrics.LLM_QUEUE_WAIT_SECONDS.observe(self._clock() - start)
+            self._export()
+
+    def _reject(self, reason: str, retry_after: float) -> None:
+        if metrics.ENABLED:
+            metrics.LLM_REJECTIONS.labels(reason).inc()
+        raise LLMOverloaded(reason, max(1.0, math.ceil(retry_after)))
+
+    def _record_success(self) -> None:
+        self.consecutive_failures = 0
+        if self._open_until is not None:
+            logging.info("Gemini circuit breaker closed")
+            self._open_until = None
+            self._export()
+
+    def _record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self._open_until is not None or self.consecutive_failures >= self.breaker_threshold:
+            if self._open_until is None:
+                logging.error(f"Gemini circuit breaker opened after {self.consecutive_failures} failed calls")
+            self._open_until = self._clock() + self.breaker_cooldown_seconds
+            self._export()
+
+    def _export(self) -> None:
+        if metrics.ENABLED:
+            metrics.LLM_QUEUE_DEPTH.set(self.waiting)
+            metrics.LLM_IN_FLIGHT.set(self.in_flight)
+            metrics.LLM_BREAKER_OPEN.set(1 if self._open_until is not None else 0)
@@ -0,0 +1,179 @@
+"""Per-request stage timings (Server-Timing header) and Prometheus metrics.
+
+With METRICS_ENABLED=false nothing is wrapped: `timed` returns functions unchanged, `stage` returns a
+shared no-op context manager, and main.py installs neither the middleware nor /metrics.
+"""
+import contextlib
+import functools
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.responses import Response
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+ENABLED = settings.METRICS_ENABLED
+
+# stage name -> seconds spent in it during the current request (summed over repeated calls)
+_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("stage_timings", default=None)
+
+_NOOP = contextlib.nullcontext()
+
+if ENABLED:
+    from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+
+    REGISTRY = CollectorRegistry()
+    STAGE_SECONDS = Histogram(
+        "kopi_stage_seconds", "Time spent in a service, repository or LLM stage", ["stage"], registry=REGISTRY
+    )
+    REQUEST_SECONDS = Histogram(
+        "kopi_request_seconds", "HTTP request latency until the response body is finished",
+        ["method", "route", "status"], registry=REGISTRY
+    )
+    REQUESTS_IN_FLIGHT = Gauge("kopi_requests_in_flight", "HTTP requests currently being served", registry=REGISTRY)
+    LLM_TOKENS = Counter("kopi_llm_tokens", "Gemini tokens by direction (input/output)", ["direction"], registry=REGISTRY)
+    LLM_QUEUE_DEPTH = Gauge("kopi_llm_queue_depth", "Gemini calls waiting for a scheduler slot", registry=REGISTRY)
+    LLM_IN_FLIGHT = Gauge("kopi_llm_in_flight", "Gemini calls holding a scheduler slot", registry=REGISTRY)
+    LLM_QUEUE_WAIT_SECONDS = Histogram(
+        "kopi_llm_queue_wait_seconds", "Time a Gemini call waited for a scheduler slot", registry=REGISTRY
+    )
+    LLM_RETRIES = Counter("kopi_llm_retries", "Gemini calls retried after a rate limit or transient error", registry=REGISTRY)
+    LLM_REJECTIONS = Counter("kopi_llm_rejections", "Gemini calls shed by the scheduler", ["reason"], registry=REGISTRY)
+    LLM_BREAKER_OPEN = Gauge("kopi_llm_breaker_open", "1 while the Gemini circuit breaker is open", registry=REGISTRY)
+    META_EXTRACTION_CACHE_LOOKUPS = Counter(
+        "kopi_meta_extraction_cache_lookups",
+        "Meta extraction cache lookups by result (memory_hit, disk_hit, miss); hits are Gemini calls saved",
+        ["result"], registry=REGISTRY
+    )
+    WRITE_BEHIND_QUEUE_DEPTH = Gauge(
+        "kopi_write_behind_queue_depth", "Message rows accepted but not yet stored (queued or being flushed)",
+        registry=REGISTRY
+    )
+    WRITE_BEHIND_FLUSH_ROWS = Histogram(
+        "kopi_write_behind_flush_rows", "Message rows per write-behind flush",
+        buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000), registry=REGISTRY
+    )
+    WRITE_BEHIND_FLUSH_SECONDS = Histogram(
+        "kopi_write_behind_flush_seconds", "Time to store one write-behind flush, retries included", registry=REGISTRY
+    )
+    WRITE_BEHIND_FLUSH_FAILURES = Counter(
+        "kopi_write_behind_flush_failures", "Write-behind flush attempts that failed", registry=REGISTRY
+    )
+    WRITE_BEHIND_DROPPED_ROWS = Counter(
+        "kopi_write_behind_dropped_rows", "Queued message rows the database rejected, or that ran out of retries",
+        registry=REGISTRY
+    )
+    PURGED_ROWS = Counter(
+        "kopi_purged_rows", "Rows removed by bulk deletes and the retention job, by table", ["table"], registry=REGISTRY
+    )
+    PURGE_BATCH_SECONDS = Histogram(
+        "kopi_purge_batch_seconds", "Time to delete one batch of conversations with their messages", registry=REGISTRY
+    )
+
+
+def _observe(name: str, seconds: float) -> None:
+    STAGE_SECONDS.labels(name).observe(seconds)
+    timings = _timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+class _Stage:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        _observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def stage(name: str):
+    """Times the enclosed block as `name`; works across awaits and yields."""
+    return _Stage(name) if ENABLED else _NOOP
+
+
+def timed(name: str):
+    """Decorator timing every call of a coroutine function as stage `name`."""
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                _observe(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def record_token_usage(response: Any) -> None:
+    """Counts prompt/candidate tokens from a Gemini response's usage_metadata, if it carries one."""
+    if not ENABLED:
+        return
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    for direction, field in (("input", "prompt_token_count"), ("output", "candidates_token_count")):
+        count = getattr(usage, field, None)
+        if isinstance(count, int) and count > 0:
+            LLM_TOKENS.labels(direction).inc(count)
+
+
+def server_timing(timings: Dict[str, float], total: float) -> str:
+    entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items()]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streaming responses pass through untouched.
+
+    Server-Timing lists the stages finished before the response headers go out; for SSE that is
+    the turn setup only, while the histograms also see the stages that run during the stream.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings: Dict[str, float] = {}
+        token = _timings.set(timings)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append("Server-Timing", server_timing(timings, time.perf_counter() - start))
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            _timings.reset(token)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_SECONDS.labels(scope["method"], route, str(status)).observe(time.perf_counter() - start)
+
+
+def metrics_response() -> Response:
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,24 @@
+import json
+import zlib
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List
+
+
+def format_ndjson(data: Dict[str, Any]) -> str:
+    return json.dumps(data) + "\n"
+
+
+async def ndjson_chunks(chunks: AsyncIterable[List[Dict[str, Any]]]) -> AsyncIterator[bytes]:
+    """One write per chunk of rows rather than one per row."""
+    async for rows in chunks:
+        if rows:
+            yield "".join(format_ndjson(row) for row in rows).encode()
+
+
+async def gzip_chunks(chunks: AsyncIterable[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    """A gzip stream of `chunks`, handed on as the compressor emits blocks (it holds at most one window)."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
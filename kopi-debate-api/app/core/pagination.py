@@ -0,0 +1,85 @@
+"""Keyset pagination: opaque cursors over a (created_at, id) sort key.
+
+A cursor holds the sort key of the row at the edge of a page and the direction to continue in, so every
+page is a range scan that starts at that key ("rows after (created_at, id)") rather than an OFFSET
+that reads and discards all the rows before it.
+"""
+import base64
+import binascii
+import json
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Generic, List, NamedTuple, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+
+# (created_at, id) of a row; created_at as the ISO-8601 string the repository returned
+Position = Tuple[str, str]
+
+# row ids, conversation ids (uuid4) and search keys; positions end up in PostgREST filter strings, so
+# nothing that could close a quote or a parenthesis there gets through
+_KEY = re.compile(r"[A-Za-z0-9_-]{1,128}")
+
+
+class Cursor(NamedTuple):
+    position: Position
+    # True: the page before `position` in the listing's order; False: the page after it
+    backward: bool
+
+
+@dataclass
+class Page(Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+def encode_cursor(position: Position, backward: bool = False) -> str:
+    payload = json.dumps([position[0], position[1], "prev" if backward else "next"], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_value: Callable[[str], Any] = datetime.fromisoformat) -> Cursor:
+    """Raises ValueError for anything encode_cursor didn't produce.
+
+    `sort_value` parses the first half of the position (a timestamp unless the listing sorts on
+    something else) and raises ValueError if it isn't one.
+    """
+    try:
+        created_at, key, direction = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(created_at, str) or not isinstance(key, str) or direction not in ("next", "prev"):
+            raise ValueError("Invalid cursor")
+        sort_value(created_at)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not _KEY.fullmatch(key):
+        raise ValueError("Invalid cursor")
+    return Cursor((created_at, key), direction == "prev")
+
+
+def paginate(
+    rows: List[T], limit: int, cursor: Optional[Cursor], position_of: Callable[[T], Position], backward: bool = False
+) -> Page[T]:
+    """Builds a page from up to `limit + 1` rows read in scan order from the cursor's position.
+
+    Forward scans read in the listing's order; backward scans (`cursor.backward`, or `backward` with no
+    cursor, for the last page) read in reverse and are flipped back here. The extra row only tells
+    whether there is more in the scan direction.
+    """
+    backward = cursor.backward if cursor is not None else backward
+    has_more = len(rows) > limit
+    items = rows[:limit]
+    if backward:
+        items.reverse()
+    if not items:
+        return Page(items)
+
+    # the side we came from has rows whenever we started from a cursor
+    more_after = has_more if not backward else cursor is not None
+    more_before = has_more if backward else cursor is not None
+    return Page(
+        items,
+        next_cursor=encode_cursor(position_of(items[-1])) if more_after else None,
+        prev_cursor=encode_cursor(position_of(items[0]), backward=True) if more_before else None
+    )
@@ -0,0 +1,79 @@
+"""Conditional GET (ETag / If-None-Match) over a small cache of serialized responses.
+
+Each cached response remembers the change version (`version_of(key)`, a counter bumped by writes) it
+was built at. While that version is unchanged and the entry is younger than its TTL, requests are
+answered from memory: a 304 when the client's If-None-Match matches, else the stored bytes. ETags hash the body, so every worker
+hands out the same tag for the same content.
+
+Writes made on another worker don't bump the version here, so only expiry picks them up, and `build`
+may itself read through this worker's caches. A history page can therefore miss another worker's write
+for up to the TTL plus HISTORY_CACHE_TTL_SECONDS; the chat list, which isn't cached below, for up to
+the TTL.
+"""
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from fastapi import Request, Response
+
+from app.core.cache import TTLCache
+
+
+@dataclass
+class CachedResponse:
+    version: int
+    etag: str
+    body: bytes
+    headers: Dict[str, str]
+
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # weak comparison, as If-None-Match requires
+    return etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        version_of: Callable[[str], int],
+        max_entries: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.version_of = version_of
+        self._cache: TTLCache[Hashable, CachedResponse] = TTLCache(max_entries, ttl_seconds, clock=clock)
+        self.not_modified = 0
+
+    async def respond(
+        self,
+        request: Request,
+        version_key: str,
+        build: Callable[[], Awaitable[Tuple[bytes, Dict[str, str]]]]
+    ) -> Response:
+        """Answers from the cache if `version_key` hasn't changed, else calls `build` for (JSON body, headers)."""
+        key = (request.url.path, request.url.query)
+        # read before building: a write racing the build bumps it, so the next request rebuilds
+        version = self.version_of(version_key)
+        entry = self._cache.get(key)
+        if entry is None or entry.version != version:
+            body, headers = await build()
+            entry = CachedResponse(version, etag_for(body), body, headers)
+            self._cache.set(key, entry)
+
+        headers = {**entry.headers, "ETag": entry.etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), entry.etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(entry.body, media_type="application/json", headers=headers)
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._cache.stats(), "not_modified": self.not_modified}
@@ -1,14 +1,16 @@
-from typing import TypeVar, Callable
-from fastapi import HTTPException, status
+from typing import TypeVar, Callable, Awaitable
+from fastapi import HTTPException
 from app.core.errors import Result
 
 T = TypeVar('T')
 
-def handle_result(service_call: Callable[[], Result[T]]) -> T:
+async def handle_result(service_call: Callable[[], Awaitable[Result[T]]]) -> T:
+    result = await service_call()
+
     def raise_error(error: str) -> T:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error)
-        
-    return service_call().fold(
+        raise HTTPException(status_code=result._value.status_code, detail=error, headers=result._value.headers)
+
+    return result.fold(
         on_fail=raise_error,
         on_success=lambda data: data
-    ) 
\ No newline at end of file
+    )
\ No newline at end of file
@@ -0,0 +1,56 @@
+"""A request's async steps, each started as soon as the steps it depends on are done.
+
+Steps are coroutine functions called with their dependencies' values as keyword arguments. A step that
+returns a Result is unwrapped for its dependents; a failed one stops the graph: nothing new starts, steps
+still running are cancelled, and run() returns the failure. An exception does the same and is re-raised.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable, Tuple
+
+from app.core.errors import Result
+
+
+class TaskGraph:
+    def __init__(self, concurrent: bool = True) -> None:
+        # without `concurrent`, steps run one at a time in the order they were added (for comparison)
+        self.concurrent = concurrent
+        self._steps: Dict[str, Tuple[Callable[..., Awaitable[Any]], Tuple[str, ...]]] = {}
+
+    def add(self, name: str, step: Callable[..., Awaitable[Any]], after: Iterable[str] = ()) -> None:
+        """Dependencies must already be added, so the steps always form a DAG."""
+        after = tuple(after)
+        for dependency in after:
+            if dependency not in self._steps:
+                raise ValueError(f"Step {name!r} depends on unknown step {dependency!r}")
+        if name in self._steps:
+            raise ValueError(f"Step {name!r} added twice")
+        self._steps[name] = (step, after)
+
+    async def run(self) -> Result[Dict[str, Any]]:
+        """Returns every step's value by name, or the first failure."""
+        values: Dict[str, Any] = {}
+        waiting = dict(self._steps)
+        running: Dict[asyncio.Task, str] = {}
+        try:
+            while waiting or running:
+                for name, (step, after) in list(waiting.items()):
+                    if self.concurrent or not running:
+                        if all(dependency in values for dependency in after):
+                            del waiting[name]
+                            task = asyncio.create_task(step(**{dependency: values[dependency] for dependency in after}))
+                            running[task] = name
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = running.pop(task)
+                    value = task.result()
+                    if isinstance(value, Result):
+                        if value._is_error:
+                            return value
+                        value = value._value
+                    values[name] = value
+            return Result.ok(values)
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
@@ -1,29 +1,140 @@
-from fastapi import APIRouter, Query, Depends
-from app.features.chat.models.chat_request import ChatMessageRequest
-from app.features.chat.models.chat_response import ChatMessageResponse, ChatHistoryResponse, ChatSummary, DeleteResponse
-from app.core.container import Container
+from fastapi import APIRouter, Query, Depends, Header, Request, Response
+from pydantic import TypeAdapter
+from fastapi.responses import StreamingResponse
+from app.features.chat.models.chat_request import ChatMessageRequest, ChatBatchRequest, ChatBulkDeleteRequest
+from app.features.chat.models.chat_response import (
+    BulkDeleteResponse, ChatMessageResponse, ChatHistoryResponse, ChatSummary, DeleteResponse, SearchHit
+)
+from app.core.container import get_container
+from app.core.pagination import Page
+from app.core.response_cache import ResponseCache
 from app.core.respose_handler import handle_result
+from app.core.ndjson import format_ndjson, gzip_chunks, ndjson_chunks
+from app.core.sse import format_sse
+from app.features.chat.repositories.change_versions import CHATS
 from app.features.chat.services.chat_service import ChatService
-from typing import List
+from datetime import datetime
+from typing import Dict, List, Optional
 
 router = APIRouter()
-container = Container()
 
-def get_chat_service() -> ChatService:
-    return container.chat_service()
+async def get_chat_service() -> ChatService:
+    # the provider chain depends on async resources, so it resolves to an (already completed) future
+    return await get_container().chat_service()
+
+def get_response_cache() -> ResponseCache:
+    return get_container().response_cache()
+
+_chat_summaries = TypeAdapter(List[ChatSummary])
+
+def cursor_headers(page: Page) -> Dict[str, str]:
+    headers = {}
+    if page.next_cursor:
+        headers["X-Next-Cursor"] = page.next_cursor
+    if page.prev_cursor:
+        headers["X-Prev-Cursor"] = page.prev_cursor
+    return headers
+
 
 @router.post("/chat/message", response_model=ChatMessageResponse)
-def post_message(request: ChatMessageRequest, chat_service: ChatService = Depends(get_chat_service)):
-    return handle_result(lambda: chat_service.post_message(request.conversation_id, request.message))
+async def post_message(
+    request: ChatMessageRequest,
+    chat_service: ChatService = Depends(get_chat_service),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255)
+):
+    return await handle_result(
+        lambda: chat_service.post_message(request.conversation_id, request.message, idempotency_key=idempotency_key)
+    )
+
+@router.post("/chat/message/stream")
+async def post_message_stream(request: ChatMessageRequest, chat_service: ChatService = Depends(get_chat_service)):
+    events = await handle_result(lambda: chat_service.stream_message(request.conversation_id, request.message))
+    return StreamingResponse(
+        (format_sse(event["event"], event["data"]) async for event in events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/chat/messages:batch")
+async def post_messages_batch(request: ChatBatchRequest, chat_service: ChatService = Depends(get_chat_service)):
+    results = await handle_result(lambda: chat_service.post_messages_batch(request.items))
+    return StreamingResponse(
+        (format_ndjson(result) async for result in results),
+        media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"}
+    )
 
 @router.get("/chat/chats", response_model=List[ChatSummary])
-def get_chats(chat_service: ChatService = Depends(get_chat_service)):
-    return handle_result(lambda: chat_service.get_chats())
+async def get_chats(
+    request: Request,
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = None,
+    chat_service: ChatService = Depends(get_chat_service),
+    response_cache: ResponseCache = Depends(get_response_cache)
+):
+    async def build():
+        page = await handle_result(lambda: chat_service.get_chats(limit=limit, cursor=cursor))
+        return _chat_summaries.dump_json(page.items), cursor_headers(page)
+
+    return await response_cache.respond(request, CHATS, build)
 
 @router.get("/chat/history/{conversation_id}", response_model=ChatHistoryResponse)
-def get_history(conversation_id: str, limit: int = Query(5, ge=1), chat_service: ChatService = Depends(get_chat_service)):
-    return handle_result(lambda: chat_service.get_history(conversation_id, limit=limit, desc=False))
+async def get_history(
+    conversation_id: str,
+    request: Request,
+    limit: int = Query(5, ge=1),
+    cursor: Optional[str] = None,
+    latest: bool = False,
+    chat_service: ChatService = Depends(get_chat_service),
+    response_cache: ResponseCache = Depends(get_response_cache)
+):
+    async def build():
+        page = await handle_result(
+            lambda: chat_service.get_history(conversation_id, limit=limit, cursor=cursor, latest=latest)
+        )
+        body = ChatHistoryResponse(conversation_id=conversation_id, message=page.items)
+        return body.model_dump_json().encode(), cursor_headers(page)
+
+    return await response_cache.respond(request, conversation_id, build)
+
+@router.get("/chat/search", response_model=List[SearchHit])
+async def search(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=500),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    chat_service: ChatService = Depends(get_chat_service)
+):
+    page = await handle_result(lambda: chat_service.search(q, limit=limit, cursor=cursor))
+    response.headers.update(cursor_headers(page))
+    return page.items
+
+@router.get("/chat/export")
+async def export(
+    conversation_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    gzip: bool = False,
+    chat_service: ChatService = Depends(get_chat_service)
+):
+    """One conversation, or all created in [since, until), as NDJSON: one line per message, streamed."""
+    chunks = await handle_result(lambda: chat_service.export(conversation_id, since=since, until=until))
+    body, media_type, filename = ndjson_chunks(chunks), "application/x-ndjson", "export.ndjson"
+    if gzip:
+        # a .gz file rather than Content-Encoding, so clients save it as is instead of decoding it
+        body, media_type, filename = gzip_chunks(body), "application/gzip", "export.ndjson.gz"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"X-Accel-Buffering": "no", "Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.post("/chat/chats:delete", response_model=BulkDeleteResponse)
+async def delete_chats(request: ChatBulkDeleteRequest, chat_service: ChatService = Depends(get_chat_service)):
+    return await handle_result(
+        lambda: chat_service.delete_chats(request.conversation_ids, created_before=request.created_before)
+    )
 
 @router.delete("/chat/{conversation_id}", response_model=DeleteResponse)
-def delete_chat(conversation_id: str, chat_service: ChatService = Depends(get_chat_service)):
-    return handle_result(lambda: chat_service.delete_chat(conversation_id)) 
\ No newline at end of file
+async def delete_chat(conversation_id: str, chat_service: ChatService = Depends(get_chat_service)):
+    return await handle_result(lambda: chat_service.delete_chat(conversation_id)) 
\ No newline at end of file
@@ -0,0 +1,80 @@
+"""Export transcripts as NDJSON without going through the API.
+
+    python -m app.features.chat.export_cli --conversation-id <id> -o transcript.ndjson
+    python -m app.features.chat.export_cli --since 2024-01-01 --until 2024-02-01 --gzip -o january.ndjson.gz
+
+Reads the configured database (DATABASE_BACKEND etc.) through the same service as GET /chat/export,
+in EXPORT_CHUNK_ROWS keyset chunks, and writes to stdout without -o.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+from typing import BinaryIO, List, Optional
+
+from app.core.container import get_container
+from app.core.ndjson import gzip_chunks, ndjson_chunks
+
+
+async def export(args: argparse.Namespace, out: BinaryIO) -> int:
+    """Writes the export to `out`; returns the number of rows written."""
+    container = get_container()
+    await container.init_resources()
+    try:
+        chat_service = await container.chat_service()
+        result = await chat_service.export(
+            args.conversation_id, since=args.since, until=args.until, chunk_size=args.chunk_rows
+        )
+        if result._is_error:
+            raise SystemExit(f"Export failed: {result._value.error}")
+
+        rows = 0
+
+        async def counted():
+            nonlocal rows
+            async for chunk in result._value:
+                rows += len(chunk)
+                yield chunk
+
+        body = ndjson_chunks(counted())
+        if args.gzip:
+            body = gzip_chunks(body)
+        async for data in body:
+            out.write(data)
+        return rows
+    finally:
+        await container.shutdown_resources()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Export conversations as NDJSON, one line per message.")
+    parser.add_argument("--conversation-id", help="one conversation; otherwise every one created in the range")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="created at or after (ISO 8601, UTC unless an offset is given)")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="created before")
+    parser.add_argument("--gzip", action="store_true", help="gzip the output")
+    parser.add_argument("--chunk-rows", type=int, default=None, help="rows per query (default EXPORT_CHUNK_ROWS)")
+    parser.add_argument("-o", "--output", help="file to write (default stdout)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    start = time.perf_counter()
+    if args.output:
+        with open(args.output, "wb") as out:
+            rows = asyncio.run(export(args, out))
+    else:
+        try:
+            rows = asyncio.run(export(args, sys.stdout.buffer))
+        except BrokenPipeError:
+            # the reader went away (`| head`); keep the interpreter from failing to flush at exit too
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            return
+    elapsed = time.perf_counter() - start
+    print(f"Exported {rows} messages in {elapsed:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,4 @@ class ChatMessageHistory(ChatMessage):
     id: str
     conversation_id: str
     created_at: datetime
-
-
-    
\ No newline at end of file
+    partial: bool = False
@@ -3,4 +3,8 @@ from pydantic import BaseModel
 
 class ChatMeta(BaseModel):
     topic: str
-    stance: str
\ No newline at end of file
+    stance: str
+
+
+class OpeningTurn(ChatMeta):
+    reply: str
@@ -1,6 +1,15 @@
 from pydantic import BaseModel
-from typing import Optional
+from datetime import datetime
+from typing import List, Optional
 
 class ChatMessageRequest(BaseModel):
     conversation_id: Optional[str] = None
-    message: str 
\ No newline at end of file
+    message: str 
+
+class ChatBatchRequest(BaseModel):
+    items: List[ChatMessageRequest]
+
+class ChatBulkDeleteRequest(BaseModel):
+    # exactly one of the two
+    conversation_ids: Optional[List[str]] = None
+    created_before: Optional[datetime] = None
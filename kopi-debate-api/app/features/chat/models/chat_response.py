@@ -18,5 +18,23 @@ class ChatSummary(BaseModel):
     topic: str
     created_at: datetime
 
+class SearchHit(BaseModel):
+    conversation_id: str
+    topic: str
+    # None when the conversation's topic/stance matched rather than one of its messages
+    message_id: Optional[str] = None
+    role: Optional[str] = None
+    # the matched words wrapped in **, as plain text
+    snippet: str
+    created_at: datetime
+    rank: float
+
 class DeleteResponse(BaseModel):
-    message: str = "Chat deleted" 
\ No newline at end of file
+    message: str = "Chat deleted"
+
+class BulkDeleteResponse(BaseModel):
+    conversations: int
+    messages: int
+    batches: int
+    # False when a delete by age ran out of time; repeat it for the rest
+    complete: bool = True
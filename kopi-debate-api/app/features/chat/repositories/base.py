@@ -0,0 +1,61 @@
+from typing import Any, Dict, List, Optional, Protocol
+from app.core.pagination import Position
+
+
+class ChatRepositoryProtocol(Protocol):
+    """Storage backends for conversations and chat messages (see supabase_schema.sql).
+
+    Rows are plain dicts shaped like PostgREST returns them: ids as strings, `created_at` as an
+    ISO-8601 string, and messages newest first unless `desc=False`.
+
+    Listings are ordered by (created_at, id) (conversation_id for conversations) and take an optional
+    `after` position: only rows strictly past it in the requested order are returned.
+    """
+
+    # storage round trips issued so far, asserted by tests and benchmarks
+    round_trips: int
+
+    async def ping(self) -> None: ...
+
+    async def save_conversation_meta(self, conversation_id: str, topic: str, stance: str) -> None: ...
+
+    async def save_conversations(self, conversations: List[Dict[str, str]]) -> None: ...
+
+    async def get_conversation_meta(self, conversation_id: str) -> Optional[Dict[str, Any]]: ...
+
+    async def update_conversation_summary(
+        self, conversation_id: str, summary: str, summary_upto: str, expected_upto: Optional[str]
+    ) -> bool: ...
+
+    async def get_conversation_with_messages(self, conversation_id: str, limit: int = 5) -> Optional[Dict[str, Any]]: ...
+
+    async def save_message(self, conversation_id: str, role: str, message: str, partial: bool = False) -> Optional[Dict[str, Any]]: ...
+
+    async def save_messages(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]: ...
+
+    async def save_messages_once(self, messages: List[Dict[str, Any]]) -> None:
+        """Bulk insert of rows that carry their own `id`; ids already stored are skipped, so retries never duplicate."""
+        ...
+
+    async def get_messages(
+        self, conversation_id: str, limit: int = 5, desc: bool = True, after: Optional[Position] = None
+    ) -> List[Dict[str, Any]]: ...
+
+    async def get_chats(
+        self, limit: Optional[int] = None, desc: bool = True, after: Optional[Position] = None
+    ) -> List[Dict[str, Any]]: ...
+
+    async def search(self, query: str, limit: int = 20, after: Optional[Position] = None) -> List[Dict[str, Any]]:
+        """Full-text hits on conversation topic/stance and message text, best first.
+
+        Each hit has conversation_id, topic, message_id and role (None for a conversation hit), a snippet
+        with the matched words in **bold**, created_at, a `rank` (higher is better) and a `key`.
+        Ordered by (rank, key) descending; `after` is the (repr(rank), key) of the previous page's last hit.
+        """
+        ...
+
+    async def delete_chat(self, conversation_id: str) -> None: ...
+
+    async def delete_chats(self, conversation_ids: List[str]) -> Dict[str, int]:
+        """Deletes the conversations and their messages in one go; returns {"conversations": n, "messages": n} removed."""
+        ...
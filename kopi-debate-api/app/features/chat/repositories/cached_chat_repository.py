@@ -0,0 +1,168 @@
+from typing import Any, Dict, List, Optional
+from app.core.invalidation import InvalidationBus
+from app.core.pagination import Position
+from app.features.chat.repositories.base import ChatRepositoryProtocol
+from app.features.chat.repositories.change_versions import ChangeVersions
+from app.features.chat.repositories.history_cache import HistoryCache
+from app.features.chat.repositories.meta_cache import ConversationMetaCache
+
+_MISSING = object()
+
+
+class CachedChatRepository:
+    """Chat repository with write-through, in-process caches of conversation meta and recent messages."""
+
+    def __init__(
+        self,
+        repository: ChatRepositoryProtocol,
+        history_cache: HistoryCache,
+        meta_cache: ConversationMetaCache,
+        invalidation_bus: Optional[InvalidationBus] = None,
+        versions: Optional[ChangeVersions] = None
+    ) -> None:
+        self.repository = repository
+        self.history_cache = history_cache
+        self.meta_cache = meta_cache
+        self.invalidation_bus = invalidation_bus
+        # bumped after every write, for conditional GETs of the chat list and histories
+        self.versions = versions or ChangeVersions(max_keys=history_cache.max_conversations)
+
+    @property
+    def round_trips(self) -> int:
+        return self.repository.round_trips
+
+    async def ping(self) -> None:
+        await self.repository.ping()
+
+    async def save_conversation_meta(self, conversation_id: str, topic: str, stance: str) -> None:
+        await self.repository.save_conversation_meta(conversation_id, topic, stance)
+        self.meta_cache.remember(conversation_id, {"topic": topic, "stance": stance})
+        self.history_cache.start(conversation_id)
+        self.versions.conversation_listed(conversation_id)
+
+    async def save_conversations(self, conversations: List[Dict[str, str]]) -> None:
+        await self.repository.save_conversations(conversations)
+        for conversation in conversations:
+            conversation_id = conversation["conversation_id"]
+            self.meta_cache.remember(conversation_id, {"topic": conversation["topic"], "stance": conversation["stance"]})
+            self.history_cache.start(conversation_id)
+            self.versions.conversation_listed(conversation_id)
+
+    async def get_conversation_meta(self, conversation_id: str) -> Optional[Dict[str, str]]:
+        cached = self.meta_cache.get(conversation_id, _MISSING)
+        if cached is not _MISSING:
+            return cached
+        meta = await self.repository.get_conversation_meta(conversation_id)
+        self.meta_cache.remember(conversation_id, meta)
+        return meta
+
+    async def get_conversation_with_messages(self, conversation_id: str, limit: int = 5) -> Optional[Dict[str, Any]]:
+        cached = self.history_cache.get(conversation_id, limit)
+        if cached is not None:
+            meta = await self.get_conversation_meta(conversation_id)
+            if meta is None:
+                self.history_cache.invalidate(conversation_id)
+                return None
+            return {**meta, "messages": cached}
+
+        state = await self._read_through(
+            conversation_id, limit,
+            lambda fetch_limit: self.repository.get_conversation_with_messages(conversation_id, limit=fetch_limit),
+            lambda state: state["messages"]
+        )
+        self.meta_cache.remember(conversation_id, state)
+        return {**state, "messages": state["messages"][:limit]} if state else None
+
+    async def update_conversation_summary(
+        self, conversation_id: str, summary: str, summary_upto: str, expected_upto: Optional[str]
+    ) -> bool:
+        updated = await self.repository.update_conversation_summary(conversation_id, summary, summary_upto, expected_upto)
+        meta = self.meta_cache.get(conversation_id)
+        if updated and meta is not None:
+            self.meta_cache.remember(conversation_id, {**meta, "summary": summary, "summary_upto": summary_upto})
+        else:
+            # lost the race (or never cached): the next read fetches the winner's summary
+            self.meta_cache.invalidate(conversation_id)
+        return updated
+
+    async def save_message(self, conversation_id: str, role: str, message: str, partial: bool = False) -> Optional[Dict[str, Any]]:
+        row = await self.repository.save_message(conversation_id, role, message, partial=partial)
+        self.versions.conversation_changed(conversation_id)
+        if row:
+            self.history_cache.append(conversation_id, [row])
+        else:
+            self.history_cache.invalidate(conversation_id)
+        return row
+
+    async def save_messages(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        saved = await self.repository.save_messages(messages)
+        by_conversation: Dict[str, List[Dict[str, Any]]] = {}
+        for row in saved:
+            by_conversation.setdefault(row["conversation_id"], []).append(row)
+        for conversation_id, rows in by_conversation.items():
+            self.history_cache.append(conversation_id, rows)
+        for conversation_id in {m["conversation_id"] for m in messages}:
+            self.versions.conversation_changed(conversation_id)
+        return saved
+
+    async def get_messages(
+        self, conversation_id: str, limit: int = 5, desc: bool = True, after: Optional[Position] = None
+    ) -> List[Dict[str, Any]]:
+        if after is not None:
+            # pages further back than the cached window go straight to the DB
+            return await self.repository.get_messages(conversation_id, limit=limit, desc=desc, after=after)
+        cached = self.history_cache.get(conversation_id, limit, desc=desc)
+        if cached is not None:
+            return cached
+        if not desc:
+            return await self.repository.get_messages(conversation_id, limit=limit, desc=desc)
+
+        messages = await self._read_through(
+            conversation_id, limit,
+            lambda fetch_limit: self.repository.get_messages(conversation_id, limit=fetch_limit, desc=True),
+            lambda messages: messages
+        )
+        return messages[:limit]
+
+    async def _read_through(self, conversation_id: str, limit: int, read, messages_of):
+        """Reads at least a full window from the DB and fills the cache unless a write raced it."""
+        fetch_limit = max(limit, self.history_cache.window)
+        self.history_cache.begin_fill(conversation_id)
+        try:
+            result = await read(fetch_limit)
+        except Exception:
+            self.history_cache.cancel_fill(conversation_id)
+            raise
+        if result is None:
+            self.history_cache.cancel_fill(conversation_id)
+        else:
+            self.history_cache.fill(conversation_id, messages_of(result), fetch_limit)
+        return result
+
+    async def get_chats(
+        self, limit: Optional[int] = None, desc: bool = True, after: Optional[Position] = None
+    ) -> List[Dict[str, Any]]:
+        return await self.repository.get_chats(limit=limit, desc=desc, after=after)
+
+    async def search(self, query: str, limit: int = 20, after: Optional[Position] = None) -> List[Dict[str, Any]]:
+        return await self.repository.search(query, limit=limit, after=after)
+
+    async def delete_chat(self, conversation_id: str):
+        await self.repository.delete_chat(conversation_id)
+        self.invalidate(conversation_id)
+        self.versions.conversation_listed(conversation_id)
+        if self.invalidation_bus is not None:
+            await self.invalidation_bus.publish(conversation_id)
+
+    async def delete_chats(self, conversation_ids: List[str]) -> Dict[str, int]:
+        deleted = await self.repository.delete_chats(conversation_ids)
+        for conversation_id in conversation_ids:
+            self.invalidate(conversation_id)
+            self.versions.conversation_listed(conversation_id)
+            if self.invalidation_bus is not None:
+                await self.invalidation_bus.publish(conversation_id)
+        return deleted
+
+    def invalidate(self, conversation_id: str) -> None:
+        self.history_cache.invalidate(conversation_id)
+        self.meta_cache.invalidate(conversation_id)
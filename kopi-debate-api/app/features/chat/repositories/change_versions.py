@@ -0,0 +1,39 @@
+from collections import OrderedDict
+
+# version key of the conversation list; conversations use their id
+CHATS = "chats"
+
+
+class ChangeVersions:
+    """Per-key change counters, bumped on every write this worker makes (or hears about on the invalidation bus).
+
+    Comparing a key's version with the one a cached response was built at is how the response cache
+    knows nothing changed without asking the DB. Only `max_keys` keys are tracked; a forgotten key
+    reports the highest version ever evicted, which can only look newer than a cached one, never older.
+    """
+
+    def __init__(self, max_keys: int) -> None:
+        self.max_keys = max_keys
+        self._counter = 0
+        self._floor = 0
+        self._versions: "OrderedDict[str, int]" = OrderedDict()
+
+    def version(self, key: str) -> int:
+        return self._versions.get(key, self._floor)
+
+    def bump(self, key: str) -> None:
+        self._counter += 1
+        self._versions[key] = self._counter
+        self._versions.move_to_end(key)
+        while len(self._versions) > self.max_keys:
+            _, evicted = self._versions.popitem(last=False)
+            self._floor = max(self._floor, evicted)
+
+    def conversation_changed(self, conversation_id: str) -> None:
+        """New messages: the conversation's history changed, the chat list did not."""
+        self.bump(conversation_id)
+
+    def conversation_listed(self, conversation_id: str) -> None:
+        """Created or deleted: both the conversation and the chat list changed."""
+        self.bump(conversation_id)
+        self.bump(CHATS)
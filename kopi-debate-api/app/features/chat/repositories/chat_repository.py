@@ -1,39 +1,175 @@
-from app.core.db import get_supabase_client
-from typing import List, Dict, Any, Optional
+import asyncio
+from app.core.config import get_settings
+from app.core.db import get_supabase_client, get_async_supabase_client
+from app.core.metrics import timed
+from app.core.pagination import Position
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
+
+if TYPE_CHECKING:
+    from supabase import AsyncClient
+
+settings = get_settings()
+
+_META_COLUMNS = "topic, stance, summary, summary_upto"
+
+def _keyset(query, key: str, after: Optional[Position], desc: bool):
+    """Order by (created_at, key) and, given a position, keep only the rows past it.
+
+    PostgREST has no row-value comparison, so this is `created_at >= t` (the index range) plus an OR
+    that drops the rows tied on created_at up to and including the position.
+    """
+    if after is not None:
+        created_at, value = after
+        op = "lt" if desc else "gt"
+        query = query.lte("created_at", created_at) if desc else query.gte("created_at", created_at)
+        query = query.or_(f'created_at.{op}."{created_at}",and(created_at.eq."{created_at}",{key}.{op}."{value}")')
+    return query.order("created_at", desc=desc).order(key, desc=desc)
 
 class ChatRepository:
-    def __init__(self):
-        self.supabase = get_supabase_client()
+    def __init__(self, client: Optional["AsyncClient"] = None):
+        self.use_async = settings.ASYNC_IO
+        self.client = client
+        # PostgREST requests issued by this repository, asserted by tests and benchmarks
+        self.round_trips = 0
 
-    def save_conversation_meta(self, conversation_id: str, topic: str, stance: str) -> None:
+    async def _client(self):
+        if not self.use_async:
+            return get_supabase_client()
+        if self.client is None:
+            self.client = await get_async_supabase_client()
+        return self.client
+
+    async def ping(self) -> None:
+        """Cheapest real query; used to open pooled connections during startup warmup."""
+        client = await self._client()
+        await self._execute(client.table("conversations").select("conversation_id").limit(1))
+
+    async def _execute(self, query):
+        self.round_trips += 1
+        if self.use_async:
+            return await query.execute()
+        # sync path: the blocking PostgREST call holds a threadpool slot, as the old def routes did
+        return await asyncio.to_thread(query.execute)
+
+    @timed("db.save_conversation_meta")
+    async def save_conversation_meta(self, conversation_id: str, topic: str, stance: str) -> None:
         data = {
             "conversation_id": conversation_id,
             "topic": topic,
             "stance": stance
         }
-        self.supabase.table("conversations").insert(data).execute()
+        client = await self._client()
+        await self._execute(client.table("conversations").insert(data))
 
-    def get_conversation_meta(self, conversation_id: str) -> Optional[Dict[str, str]]:
-        res = self.supabase.table("conversations").select("topic, stance").eq("conversation_id", conversation_id).execute()
+    @timed("db.save_conversations")
+    async def save_conversations(self, conversations: List[Dict[str, str]]) -> None:
+        """Bulk insert of {conversation_id, topic, stance} rows in one request."""
+        client = await self._client()
+        await self._execute(client.table("conversations").insert(conversations))
+
+    @timed("db.get_conversation_meta")
+    async def get_conversation_meta(self, conversation_id: str) -> Optional[Dict[str, str]]:
+        client = await self._client()
+        res = await self._execute(client.table("conversations").select(_META_COLUMNS).eq("conversation_id", conversation_id))
         return res.data[0] if res.data else None
 
-    def save_message(self, conversation_id: str, role: str, message: str):
+    @timed("db.update_conversation_summary")
+    async def update_conversation_summary(
+        self, conversation_id: str, summary: str, summary_upto: str, expected_upto: Optional[str]
+    ) -> bool:
+        """Compare-and-set on summary_upto; False when another writer folded the conversation first."""
+        client = await self._client()
+        query = client.table("conversations").update({"summary": summary, "summary_upto": summary_upto})
+        query = query.eq("conversation_id", conversation_id)
+        query = query.is_("summary_upto", "null") if expected_upto is None else query.eq("summary_upto", expected_upto)
+        res = await self._execute(query)
+        return bool(res.data)
+
+    @timed("db.get_conversation_with_messages")
+    async def get_conversation_with_messages(self, conversation_id: str, limit: int = 5) -> Optional[Dict[str, Any]]:
+        """Meta plus the `limit` most recent messages (newest first) via one embedded select."""
+        client = await self._client()
+        query = client.table("conversations").select(f"{_META_COLUMNS}, chat_messages(*)").eq("conversation_id", conversation_id)
+        query = query.order("created_at", desc=True, foreign_table="chat_messages").limit(limit, foreign_table="chat_messages")
+        res = await self._execute(query)
+        if not res.data:
+            return None
+        row = res.data[0]
+        return {
+            "topic": row["topic"],
+            "stance": row["stance"],
+            "summary": row.get("summary"),
+            "summary_upto": row.get("summary_upto"),
+            "messages": row.get("chat_messages") or []
+        }
+
+    @timed("db.save_message")
+    async def save_message(self, conversation_id: str, role: str, message: str, partial: bool = False) -> Optional[Dict[str, Any]]:
         data = {
             "conversation_id": conversation_id,
             "role": role,
             "message": message
         }
-        self.supabase.table("chat_messages").insert(data).execute()
+        if partial:
+            data["partial"] = True
+        client = await self._client()
+        res = await self._execute(client.table("chat_messages").insert(data))
+        return res.data[0] if res.data else None
 
-    def get_messages(self, conversation_id: str, limit: int = 5, desc: bool = True) -> List[Dict[str, Any]]:
-        query = self.supabase.table("chat_messages").select("*").eq("conversation_id", conversation_id)
-        query = query.order("created_at", desc=desc).limit(limit)
-        res = query.execute()
+    @timed("db.save_messages")
+    async def save_messages(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Bulk insert in one request; returns the inserted rows."""
+        client = await self._client()
+        res = await self._execute(client.table("chat_messages").insert(messages))
         return res.data or []
 
-    def get_chats(self) -> List[Dict[str, Any]]:
-        res = self.supabase.table("conversations").select("conversation_id, topic, created_at").order("created_at", desc=True).execute()
+    @timed("db.save_messages")
+    async def save_messages_once(self, messages: List[Dict[str, Any]]) -> None:
+        client = await self._client()
+        await self._execute(
+            client.table("chat_messages").upsert(messages, on_conflict="id", ignore_duplicates=True, returning="minimal")
+        )
+
+    @timed("db.get_messages")
+    async def get_messages(
+        self, conversation_id: str, limit: int = 5, desc: bool = True, after: Optional[Position] = None
+    ) -> List[Dict[str, Any]]:
+        client = await self._client()
+        query = client.table("chat_messages").select("*").eq("conversation_id", conversation_id)
+        query = _keyset(query, "id", after, desc).limit(limit)
+        res = await self._execute(query)
         return res.data or []
 
-    def delete_chat(self, conversation_id: str):
-        self.supabase.table("conversations").delete().eq("conversation_id", conversation_id).execute() 
\ No newline at end of file
+    @timed("db.get_chats")
+    async def get_chats(
+        self, limit: Optional[int] = None, desc: bool = True, after: Optional[Position] = None
+    ) -> List[Dict[str, Any]]:
+        client = await self._client()
+        query = _keyset(client.table("conversations").select("conversation_id, topic, stance, created_at"), "conversation_id", after, desc)
+        if limit is not None:
+            query = query.limit(limit)
+        res = await self._execute(query)
+        return res.data or []
+
+    @timed("db.search")
+    async def search(self, query: str, limit: int = 20, after: Optional[Position] = None) -> List[Dict[str, Any]]:
+        """Calls the search_chats function from supabase_schema.sql."""
+        client = await self._client()
+        params = {"q": query, "page_size": limit}
+        if after is not None:
+            params.update(after_rank=float(after[0]), after_key=after[1])
+        res = await self._execute(client.rpc("search_chats", params))
+        return res.data or []
+
+    @timed("db.delete_chat")
+    async def delete_chat(self, conversation_id: str):
+        client = await self._client()
+        await self._execute(client.table("conversations").delete().eq("conversation_id", conversation_id))
+
+    @timed("db.delete_chats")
+    async def delete_chats(self, conversation_ids: List[str]) -> Dict[str, int]:
+        """Calls the delete_chats function from supabase_schema.sql: one statement, so all or nothing."""
+        client = await self._client()
+        res = await self._execute(client.rpc("delete_chats", {"ids": conversation_ids}))
+        deleted = (res.data or [{}])[0]
+        return {"conversations": deleted.get("conversations", 0), "messages": deleted.get("messages", 0)}
@@ -0,0 +1,131 @@
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+# rough per-row overhead (dict, keys, id, timestamps) on top of the message text
+_ROW_OVERHEAD_BYTES = 256
+
+
+class _HistoryEntry:
+    def __init__(self, window: int, complete: bool, loaded_at: float) -> None:
+        self.messages: Deque[Dict[str, Any]] = deque(maxlen=window)  # oldest -> newest
+        # True while the buffer holds every message of the conversation
+        self.complete = complete
+        self.nbytes = 0
+        # when the buffer last matched the DB; appends made here don't count, another worker's may be missing
+        self.loaded_at = loaded_at
+
+
+class HistoryCache:
+    """Bounded LRU of per-conversation ring buffers holding the newest `window` messages.
+
+    Writes are applied only to this worker's buffers, so an entry older than `ttl_seconds` is dropped
+    and read again from the DB; that bounds how long a turn written on another worker goes unseen.
+    """
+
+    def __init__(
+        self,
+        window: int,
+        max_conversations: int,
+        max_bytes: int,
+        ttl_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.window = window
+        self.max_conversations = max_conversations
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, _HistoryEntry]" = OrderedDict()
+        # conversations with a DB read in flight; a write in between poisons the fill
+        self._pending_fills: Dict[str, bool] = {}
+
+    def get(self, conversation_id: str, limit: int, desc: bool = True) -> Optional[List[Dict[str, Any]]]:
+        entry = self._entries.get(conversation_id)
+        if entry is not None and self.ttl_seconds is not None and self._clock() - entry.loaded_at >= self.ttl_seconds:
+            self._drop(conversation_id)
+            entry = None
+        # newest-first reads only need enough rows; oldest-first reads need nothing rotated out
+        if entry is None or not (entry.complete or (desc and limit <= len(entry.messages))):
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(conversation_id)
+        if desc:
+            return list(reversed(entry.messages))[:limit]
+        return list(entry.messages)[:limit]
+
+    def start(self, conversation_id: str) -> None:
+        """Registers a brand-new (empty) conversation so its first turn is served from memory."""
+        self._replace(conversation_id, _HistoryEntry(self.window, complete=True, loaded_at=self._clock()))
+
+    def begin_fill(self, conversation_id: str) -> None:
+        self._pending_fills[conversation_id] = True
+
+    def fill(self, conversation_id: str, messages: List[Dict[str, Any]], limit: int) -> None:
+        """Loads rows read from the DB (newest first) if no write raced the read."""
+        if not self._pending_fills.pop(conversation_id, False) or limit < self.window:
+            return
+        entry = _HistoryEntry(self.window, complete=len(messages) < limit, loaded_at=self._clock())
+        for row in reversed(messages[:self.window]):
+            self._push(entry, row)
+        self._replace(conversation_id, entry)
+
+    def cancel_fill(self, conversation_id: str) -> None:
+        self._pending_fills.pop(conversation_id, None)
+
+    def append(self, conversation_id: str, rows: List[Dict[str, Any]]) -> None:
+        """Write-through; conversations not in the cache stay uncached until the next read fills them."""
+        if conversation_id in self._pending_fills:
+            self._pending_fills[conversation_id] = False
+        entry = self._entries.get(conversation_id)
+        if entry is None:
+            return
+        before = entry.nbytes
+        for row in rows:
+            self._push(entry, row)
+        self.total_bytes += entry.nbytes - before
+        self._entries.move_to_end(conversation_id)
+        self._evict()
+
+    def invalidate(self, conversation_id: str) -> None:
+        self.cancel_fill(conversation_id)
+        self._drop(conversation_id)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "conversations": len(self._entries),
+            "bytes": self.total_bytes,
+        }
+
+    def _push(self, entry: _HistoryEntry, row: Dict[str, Any]) -> None:
+        if len(entry.messages) == entry.messages.maxlen:
+            entry.nbytes -= self._row_size(entry.messages[0])
+            entry.complete = False
+        entry.messages.append(row)
+        entry.nbytes += self._row_size(row)
+
+    def _drop(self, conversation_id: str) -> None:
+        entry = self._entries.pop(conversation_id, None)
+        if entry is not None:
+            self.total_bytes -= entry.nbytes
+
+    def _replace(self, conversation_id: str, entry: _HistoryEntry) -> None:
+        self.invalidate(conversation_id)
+        self._entries[conversation_id] = entry
+        self.total_bytes += entry.nbytes
+        self._evict()
+
+    def _evict(self) -> None:
+        while self._entries and (len(self._entries) > self.max_conversations or self.total_bytes > self.max_bytes):
+            _, entry = self._entries.popitem(last=False)
+            self.total_bytes -= entry.nbytes
+
+    @staticmethod
+    def _row_size(row: Dict[str, Any]) -> int:
+        return len(row.get("message") or "") + _ROW_OVERHEAD_BYTES
@@ -0,0 +1,33 @@
+import time
+from typing import Callable, Dict, Optional
+from app.core.cache import TTLCache
+
+
+class ConversationMetaCache(TTLCache[str, Optional[Dict[str, str]]]):
+    """(topic, stance, rolling summary) per conversation. Topic and stance never change and summaries
+    are written through by this worker, so positive entries live long; a worker holding a stale summary
+    finds out when its compare-and-set on summary_upto fails.
+
+    Misses are cached as None for a short time so probes of unknown ids don't each hit the DB.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        negative_ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        super().__init__(max_entries, ttl_seconds, clock=clock)
+        self.negative_ttl_seconds = negative_ttl_seconds
+
+    def remember(self, conversation_id: str, meta: Optional[Dict[str, str]]) -> None:
+        if meta:
+            self.set(conversation_id, {
+                "topic": meta["topic"],
+                "stance": meta["stance"],
+                "summary": meta.get("summary"),
+                "summary_upto": meta.get("summary_upto")
+            })
+        else:
+            self.set(conversation_id, None, ttl_seconds=self.negative_ttl_seconds)
@@ -0,0 +1,213 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.metrics import timed
+from app.core.pagination import Position
+
+_MESSAGE_KEYS = ("id", "conversation_id", "role", "message", "partial", "created_at")
+_MESSAGE_COLUMNS = ", ".join(_MESSAGE_KEYS)
+
+
+def _row(record) -> Dict[str, Any]:
+    """asyncpg Record -> the dict shape PostgREST returns (string ids and ISO timestamps)."""
+    row = dict(record)
+    for key, value in row.items():
+        if isinstance(value, datetime):
+            row[key] = value.isoformat()
+        elif key == "id" and value is not None:
+            row[key] = str(value)
+    return row
+
+
+def _timestamp(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _keyset(key: str, after: Optional[Position], desc: bool, first_param: int) -> Tuple[str, str, list]:
+    """WHERE fragment, ORDER BY and parameters for a (created_at, key) range starting past `after`."""
+    order = "DESC" if desc else "ASC"
+    order_by = f"ORDER BY created_at {order}, {key} {order}"
+    if after is None:
+        return "", order_by, []
+    # a row-value comparison is a single index range condition
+    where = f"(created_at, {key}) {'<' if desc else '>'} (${first_param}, ${first_param + 1}{'::uuid' if key == 'id' else ''})"
+    return where, order_by, [_timestamp(after[0]), after[1]]
+
+
+class PostgresChatRepository:
+    """Talks to Postgres directly over a pooled asyncpg connection instead of PostgREST over HTTP.
+
+    asyncpg prepares and caches each statement per connection, so after warmup a query is a single
+    Bind/Execute round trip on an already open connection.
+    """
+
+    def __init__(self, pool) -> None:
+        self.pool = pool
+        self.round_trips = 0
+
+    async def _fetch(self, query: str, *args) -> List[Dict[str, Any]]:
+        self.round_trips += 1
+        return [_row(record) for record in await self.pool.fetch(query, *args)]
+
+    async def _execute(self, query: str, *args) -> str:
+        self.round_trips += 1
+        return await self.pool.execute(query, *args)
+
+    async def ping(self) -> None:
+        """Cheapest real query; used to open pooled connections during startup warmup."""
+        await self._fetch("SELECT 1")
+
+    @timed("db.save_conversation_meta")
+    async def save_conversation_meta(self, conversation_id: str, topic: str, stance: str) -> None:
+        await self._execute(
+            "INSERT INTO conversations (conversation_id, topic, stance) VALUES ($1, $2, $3)",
+            conversation_id, topic, stance
+        )
+
+    @timed("db.save_conversations")
+    async def save_conversations(self, conversations: List[Dict[str, str]]) -> None:
+        """Bulk insert of {conversation_id, topic, stance} rows in one statement."""
+        await self._execute(
+            "INSERT INTO conversations (conversation_id, topic, stance) "
+            "SELECT * FROM unnest($1::text[], $2::text[], $3::text[])",
+            [c["conversation_id"] for c in conversations],
+            [c["topic"] for c in conversations],
+            [c["stance"] for c in conversations]
+        )
+
+    @timed("db.get_conversation_meta")
+    async def get_conversation_meta(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        rows = await self._fetch(
+            "SELECT topic, stance, summary, summary_upto FROM conversations WHERE conversation_id = $1",
+            conversation_id
+        )
+        return rows[0] if rows else None
+
+    @timed("db.update_conversation_summary")
+    async def update_conversation_summary(
+        self, conversation_id: str, summary: str, summary_upto: str, expected_upto: Optional[str]
+    ) -> bool:
+        """Compare-and-set on summary_upto; False when another writer folded the conversation first."""
+        rows = await self._fetch(
+            "UPDATE conversations SET summary = $2, summary_upto = $3 "
+            "WHERE conversation_id = $1 AND summary_upto IS NOT DISTINCT FROM $4 RETURNING conversation_id",
+            conversation_id, summary, _timestamp(summary_upto), _timestamp(expected_upto)
+        )
+        return bool(rows)
+
+    @timed("db.get_conversation_with_messages")
+    async def get_conversation_with_messages(self, conversation_id: str, limit: int = 5) -> Optional[Dict[str, Any]]:
+        """Meta plus the `limit` most recent messages (newest first) in one query."""
+        rows = await self._fetch(
+            f"""SELECT c.topic, c.stance, c.summary, c.summary_upto, {", ".join(f"m.{key}" for key in _MESSAGE_KEYS)}
+            FROM conversations c
+            LEFT JOIN LATERAL (
+                SELECT {_MESSAGE_COLUMNS} FROM chat_messages
+                WHERE conversation_id = c.conversation_id ORDER BY created_at DESC LIMIT $2
+            ) m ON true
+            WHERE c.conversation_id = $1
+            ORDER BY m.created_at DESC""",
+            conversation_id, limit
+        )
+        if not rows:
+            return None
+        first = rows[0]
+        return {
+            "topic": first["topic"],
+            "stance": first["stance"],
+            "summary": first["summary"],
+            "summary_upto": first["summary_upto"],
+            "messages": [{key: row[key] for key in _MESSAGE_KEYS} for row in rows if row["id"] is not None]
+        }
+
+    @timed("db.save_message")
+    async def save_message(self, conversation_id: str, role: str, message: str, partial: bool = False) -> Optional[Dict[str, Any]]:
+        rows = await self._insert([
+            {"conversation_id": conversation_id, "role": role, "message": message, "partial": partial}
+        ])
+        return rows[0] if rows else None
+
+    @timed("db.save_messages")
+    async def save_messages(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Bulk insert in one statement; returns the inserted rows in input order."""
+        return await self._insert(messages) if messages else []
+
+    async def _insert(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        now = datetime.now(timezone.utc)
+        return await self._fetch(
+            f"""INSERT INTO chat_messages (conversation_id, role, message, partial, created_at)
+            SELECT * FROM unnest($1::text[], $2::text[], $3::text[], $4::boolean[], $5::timestamptz[])
+            RETURNING {_MESSAGE_COLUMNS}""",
+            [m["conversation_id"] for m in messages],
+            [m["role"] for m in messages],
+            [m["message"] for m in messages],
+            [bool(m.get("partial", False)) for m in messages],
+            [_timestamp(m.get("created_at")) or now for m in messages]
+        )
+
+    @timed("db.save_messages")
+    async def save_messages_once(self, messages: List[Dict[str, Any]]) -> None:
+        if not messages:
+            return
+        await self._execute(
+            """INSERT INTO chat_messages (id, conversation_id, role, message, partial, created_at)
+            SELECT * FROM unnest($1::uuid[], $2::text[], $3::text[], $4::text[], $5::boolean[], $6::timestamptz[])
+            ON CONFLICT (id) DO NOTHING""",
+            [m["id"] for m in messages],
+            [m["conversation_id"] for m in messages],
+            [m["role"] for m in messages],
+            [m["message"] for m in messages],
+            [bool(m.get("partial", False)) for m in messages],
+            [_timestamp(m["created_at"]) for m in messages]
+        )
+
+    @timed("db.get_messages")
+    async def get_messages(
+        self, conversation_id: str, limit: int = 5, desc: bool = True, after: Optional[Position] = None
+    ) -> List[Dict[str, Any]]:
+        where, order_by, args = _keyset("id", after, desc, first_param=3)
+        return await self._fetch(
+            f"SELECT {_MESSAGE_COLUMNS} FROM chat_messages WHERE conversation_id = $1 {'AND ' + where if where else ''} "
+            f"{order_by} LIMIT $2",
+            conversation_id, limit, *args
+        )
+
+    @timed("db.get_chats")
+    async def get_chats(
+        self, limit: Optional[int] = None, desc: bool = True, after: Optional[Position] = None
+    ) -> List[Dict[str, Any]]:
+        # LIMIT NULL is no limit
+        where, order_by, args = _keyset("conversation_id", after, desc, first_param=2)
+        return await self._fetch(
+            f"SELECT conversation_id, topic, stance, created_at FROM conversations {'WHERE ' + where if where else ''} "
+            f"{order_by} LIMIT $1",
+            limit, *args
+        )
+
+    @timed("db.search")
+    async def search(self, query: str, limit: int = 20, after: Optional[Position] = None) -> List[Dict[str, Any]]:
+        # search_chats is defined in supabase_schema.sql
+        rows = await self._fetch(
+            "SELECT * FROM search_chats($1, $2, $3, $4)",
+            query, limit, float(after[0]) if after else None, after[1] if after else None
+        )
+        for row in rows:
+            if row["message_id"] is not None:
+                row["message_id"] = str(row["message_id"])
+        return rows
+
+    @timed("db.delete_chat")
+    async def delete_chat(self, conversation_id: str) -> None:
+        # chat_messages go with it (ON DELETE CASCADE)
+        await self._execute("DELETE FROM conversations WHERE conversation_id = $1", conversation_id)
+
+    @timed("db.delete_chats")
+    async def delete_chats(self, conversation_ids: List[str]) -> Dict[str, int]:
+        # the count reads the statement's snapshot, taken before the cascade deletes the messages
+        rows = await self._fetch(
+            "WITH gone AS (DELETE FROM conversations WHERE conversation_id = ANY($1::text[]) RETURNING conversation_id) "
+            "SELECT (SELECT count(*) FROM gone) AS conversations, "
+            "(SELECT count(*) FROM chat_messages WHERE conversation_id IN (SELECT conversation_id FROM gone)) AS messages",
+            conversation_ids
+        )
+        return {"conversations": rows[0]["conversations"], "messages": rows[0]["messages"]}
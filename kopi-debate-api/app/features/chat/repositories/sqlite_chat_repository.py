@@ -0,0 +1,317 @@
+import re
+import sqlite3
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.metrics import timed
+from app.core.pagination import Position
+
+# supabase_schema.sql in SQLite's dialect
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    conversation_id TEXT PRIMARY KEY,
+    topic TEXT NOT NULL,
+    stance TEXT NOT NULL,
+    summary TEXT,
+    summary_upto TEXT,
+    created_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS chat_messages (
+    id TEXT PRIMARY KEY,
+    conversation_id TEXT NOT NULL REFERENCES conversations(conversation_id) ON DELETE CASCADE,
+    role TEXT NOT NULL CHECK (role IN ('user', 'bot')),
+    message TEXT NOT NULL,
+    partial INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_chat_messages_conversation_created ON chat_messages(conversation_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_conversations_created ON conversations(created_at, conversation_id);
+DROP INDEX IF EXISTS idx_conversation_id;
+"""
+
+# full-text search (the tsvector/GIN columns of supabase_schema.sql): FTS5 indexes over the tables' own
+# rows, kept in step by triggers. Deleting a conversation cascades to its messages, which fires their
+# delete trigger too. The indexes refer to rows by rowid, which VACUUM may renumber: rebuild them after one
+_SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS conversations_fts USING fts5(
+    topic, stance, content='conversations', content_rowid='rowid', tokenize='porter unicode61'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS chat_messages_fts USING fts5(
+    message, content='chat_messages', content_rowid='rowid', tokenize='porter unicode61'
+);
+
+CREATE TRIGGER IF NOT EXISTS conversations_fts_insert AFTER INSERT ON conversations BEGIN
+    INSERT INTO conversations_fts (rowid, topic, stance) VALUES (new.rowid, new.topic, new.stance);
+END;
+CREATE TRIGGER IF NOT EXISTS conversations_fts_delete AFTER DELETE ON conversations BEGIN
+    INSERT INTO conversations_fts (conversations_fts, rowid, topic, stance) VALUES ('delete', old.rowid, old.topic, old.stance);
+END;
+CREATE TRIGGER IF NOT EXISTS chat_messages_fts_insert AFTER INSERT ON chat_messages BEGIN
+    INSERT INTO chat_messages_fts (rowid, message) VALUES (new.rowid, new.message);
+END;
+CREATE TRIGGER IF NOT EXISTS chat_messages_fts_delete AFTER DELETE ON chat_messages BEGIN
+    INSERT INTO chat_messages_fts (chat_messages_fts, rowid, message) VALUES ('delete', old.rowid, old.message);
+END;
+"""
+
+_SNIPPET_TOKENS = 16
+# matches ranked per index and query; past that, the newest ones
+_MAX_CANDIDATES = 10000
+
+_MESSAGE_COLUMNS = "id, conversation_id, role, message, partial, created_at"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="microseconds")
+
+
+def _utc(value: Optional[str]) -> Optional[str]:
+    # one offset and precision for every stored timestamp, so ORDER BY on the text sorts chronologically
+    if not value:
+        return None
+    return datetime.fromisoformat(value).astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+
+def _keyset(key: str, after: Optional[Position], desc: bool) -> Tuple[str, str, list]:
+    """WHERE fragment, ORDER BY and parameters for a (created_at, key) range starting past `after`."""
+    order = "DESC" if desc else "ASC"
+    order_by = f"ORDER BY created_at {order}, {key} {order}"
+    if after is None:
+        return "", order_by, []
+    return f"(created_at, {key}) {'<' if desc else '>'} (?, ?)", order_by, [_utc(after[0]), after[1]]
+
+
+def _fts_query(query: str) -> str:
+    """Every word of the query as a quoted FTS5 term (implicitly ANDed), so user input can't inject syntax."""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in re.findall(r"\w+", query))
+
+
+def _message(row: sqlite3.Row) -> Dict[str, Any]:
+    message = dict(row)
+    message["partial"] = bool(message["partial"])
+    return message
+
+
+class SqliteChatRepository:
+    """Single-file (or in-memory) backend for running the whole stack offline and for benchmarks.
+
+    Queries run inline on the event loop: on a local file they take microseconds, far less than a
+    thread hop would. Not meant for multi-worker deployments.
+    """
+
+    def __init__(self, path: str = ":memory:") -> None:
+        self.connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        if path != ":memory:":
+            self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.executescript(_SCHEMA)
+        indexed = self.connection.execute("SELECT 1 FROM sqlite_master WHERE name = 'chat_messages_fts'").fetchone()
+        self.connection.executescript(_SEARCH_SCHEMA)
+        if not indexed:
+            # a file from before search existed: index the rows it already holds
+            self.connection.execute("INSERT INTO conversations_fts (conversations_fts) VALUES ('rebuild')")
+            self.connection.execute("INSERT INTO chat_messages_fts (chat_messages_fts) VALUES ('rebuild')")
+        self.round_trips = 0
+
+    def _query(self, sql: str, *args) -> List[sqlite3.Row]:
+        self.round_trips += 1
+        return self.connection.execute(sql, args).fetchall()
+
+    async def ping(self) -> None:
+        self._query("SELECT 1")
+
+    @timed("db.save_conversation_meta")
+    async def save_conversation_meta(self, conversation_id: str, topic: str, stance: str) -> None:
+        self._query(
+            "INSERT INTO conversations (conversation_id, topic, stance, created_at) VALUES (?, ?, ?, ?)",
+            conversation_id, topic, stance, _now()
+        )
+
+    @timed("db.save_conversations")
+    async def save_conversations(self, conversations: List[Dict[str, str]]) -> None:
+        """Bulk insert of {conversation_id, topic, stance} rows in one transaction."""
+        created_at = _now()
+        self.round_trips += 1
+        with self.connection:
+            self.connection.execute("BEGIN")
+            self.connection.executemany(
+                "INSERT INTO conversations (conversation_id, topic, stance, created_at) VALUES (?, ?, ?, ?)",
+                [(c["conversation_id"], c["topic"], c["stance"], created_at) for c in conversations]
+            )
+
+    @timed("db.get_conversation_meta")
+    async def get_conversation_meta(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._query(
+            "SELECT topic, stance, summary, summary_upto FROM conversations WHERE conversation_id = ?", conversation_id
+        )
+        return dict(rows[0]) if rows else None
+
+    @timed("db.update_conversation_summary")
+    async def update_conversation_summary(
+        self, conversation_id: str, summary: str, summary_upto: str, expected_upto: Optional[str]
+    ) -> bool:
+        """Compare-and-set on summary_upto; False when another writer folded the conversation first."""
+        rows = self._query(
+            "UPDATE conversations SET summary = ?, summary_upto = ? "
+            "WHERE conversation_id = ? AND summary_upto IS ? RETURNING conversation_id",
+            summary, _utc(summary_upto), conversation_id, _utc(expected_upto)
+        )
+        return bool(rows)
+
+    @timed("db.get_conversation_with_messages")
+    async def get_conversation_with_messages(self, conversation_id: str, limit: int = 5) -> Optional[Dict[str, Any]]:
+        """Meta plus the `limit` most recent messages (newest first); one round trip since the file is local."""
+        meta = self._query(
+            "SELECT topic, stance, summary, summary_upto FROM conversations WHERE conversation_id = ?", conversation_id
+        )
+        if not meta:
+            return None
+        messages = self.connection.execute(
+            f"SELECT {_MESSAGE_COLUMNS} FROM chat_messages WHERE conversation_id = ? ORDER BY created_at DESC LIMIT ?",
+            (conversation_id, limit)
+        ).fetchall()
+        return {**dict(meta[0]), "messages": [_message(row) for row in messages]}
+
+    @timed("db.save_message")
+    async def save_message(self, conversation_id: str, role: str, message: str, partial: bool = False) -> Optional[Dict[str, Any]]:
+        rows = self._insert([{"conversation_id": conversation_id, "role": role, "message": message, "partial": partial}])
+        return rows[0] if rows else None
+
+    @timed("db.save_messages")
+    async def save_messages(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Bulk insert in one transaction; returns the inserted rows in input order."""
+        return self._insert(messages) if messages else []
+
+    @timed("db.save_messages")
+    async def save_messages_once(self, messages: List[Dict[str, Any]]) -> None:
+        if messages:
+            self._insert(messages, or_ignore=True)
+
+    def _insert(self, messages: List[Dict[str, Any]], or_ignore: bool = False) -> List[Dict[str, Any]]:
+        rows = [
+            {
+                "id": m.get("id") or str(uuid.uuid4()),
+                "conversation_id": m["conversation_id"],
+                "role": m["role"],
+                "message": m["message"],
+                "partial": bool(m.get("partial", False)),
+                "created_at": _utc(m.get("created_at")) or _now()
+            }
+            for m in messages
+        ]
+        self.round_trips += 1
+        with self.connection:
+            self.connection.execute("BEGIN")
+            self.connection.executemany(
+                f"INSERT {'OR IGNORE ' if or_ignore else ''}INTO chat_messages ({_MESSAGE_COLUMNS}) "
+                "VALUES (:id, :conversation_id, :role, :message, :partial, :created_at)",
+                rows
+            )
+        return rows
+
+    @timed("db.get_messages")
+    async def get_messages(
+        self, conversation_id: str, limit: int = 5, desc: bool = True, after: Optional[Position] = None
+    ) -> List[Dict[str, Any]]:
+        where, order_by, args = _keyset("id", after, desc)
+        rows = self._query(
+            f"SELECT {_MESSAGE_COLUMNS} FROM chat_messages WHERE conversation_id = ? {'AND ' + where if where else ''} "
+            f"{order_by} LIMIT ?",
+            conversation_id, *args, limit
+        )
+        return [_message(row) for row in rows]
+
+    @timed("db.get_chats")
+    async def get_chats(
+        self, limit: Optional[int] = None, desc: bool = True, after: Optional[Position] = None
+    ) -> List[Dict[str, Any]]:
+        where, order_by, args = _keyset("conversation_id", after, desc)
+        rows = self._query(
+            f"SELECT conversation_id, topic, stance, created_at FROM conversations {'WHERE ' + where if where else ''} "
+            f"{order_by} LIMIT ?",
+            *args, -1 if limit is None else limit
+        )
+        return [dict(row) for row in rows]
+
+    @timed("db.search")
+    async def search(self, query: str, limit: int = 20, after: Optional[Position] = None) -> List[Dict[str, Any]]:
+        match = _fts_query(query)
+        if not match:
+            return []
+        where, args = "", []
+        if after is not None:
+            rank = float(after[0])
+            where, args = "WHERE rank < ? OR (rank = ? AND key < ?)", [rank, rank, after[1]]
+        # the page's keys first: bm25() is lower for better matches, so negated to rank higher-is-better like
+        # Postgres. Each index weighs terms by its own corpus, so conversation and message ranks are only
+        # roughly comparable. A word in a third of all messages would mean scoring all of them, so only the
+        # newest _MAX_CANDIDATES matches of each index are ranked
+        page = self._query(
+            f"""SELECT * FROM (
+                SELECT * FROM (
+                    SELECT 'c' AS kind, rowid, -bm25(conversations_fts, 2.0, 1.0) AS rank, printf('c%012d', rowid) AS key
+                    FROM conversations_fts WHERE conversations_fts MATCH ? ORDER BY rowid DESC LIMIT ?
+                )
+                UNION ALL
+                SELECT * FROM (
+                    SELECT 'm', rowid, -bm25(chat_messages_fts), printf('m%012d', rowid)
+                    FROM chat_messages_fts WHERE chat_messages_fts MATCH ? ORDER BY rowid DESC LIMIT ?
+                )
+            ) {where} ORDER BY rank DESC, key DESC LIMIT ?""",
+            match, _MAX_CANDIDATES, match, _MAX_CANDIDATES, *args, limit
+        )
+        # then rows and snippets for just those hits
+        conversations = [hit["rowid"] for hit in page if hit["kind"] == "c"]
+        messages = [hit["rowid"] for hit in page if hit["kind"] == "m"]
+        details = {}
+        if conversations:
+            for row in self._query(
+                f"""SELECT c.rowid, c.conversation_id, c.topic, NULL AS message_id, NULL AS role, c.created_at,
+                    snippet(conversations_fts, -1, '**', '**', '…', {_SNIPPET_TOKENS}) AS snippet
+                FROM conversations_fts JOIN conversations c ON c.rowid = conversations_fts.rowid
+                WHERE conversations_fts MATCH ? AND conversations_fts.rowid IN ({", ".join("?" * len(conversations))})""",
+                match, *conversations
+            ):
+                details["c", row["rowid"]] = row
+        if messages:
+            for row in self._query(
+                f"""SELECT m.rowid, m.conversation_id, c.topic, m.id AS message_id, m.role, m.created_at,
+                    snippet(chat_messages_fts, 0, '**', '**', '…', {_SNIPPET_TOKENS}) AS snippet
+                FROM chat_messages_fts JOIN chat_messages m ON m.rowid = chat_messages_fts.rowid
+                JOIN conversations c USING (conversation_id)
+                WHERE chat_messages_fts MATCH ? AND chat_messages_fts.rowid IN ({", ".join("?" * len(messages))})""",
+                match, *messages
+            ):
+                details["m", row["rowid"]] = row
+        hits = []
+        for hit in page:
+            row = dict(details[hit["kind"], hit["rowid"]])
+            del row["rowid"]
+            hits.append({**row, "rank": hit["rank"], "key": hit["key"]})
+        return hits
+
+    @timed("db.delete_chat")
+    async def delete_chat(self, conversation_id: str) -> None:
+        self._query("DELETE FROM conversations WHERE conversation_id = ?", conversation_id)
+
+    @timed("db.delete_chats")
+    async def delete_chats(self, conversation_ids: List[str]) -> Dict[str, int]:
+        marks = ", ".join("?" * len(conversation_ids))
+        self.round_trips += 1
+        with self.connection:
+            self.connection.execute("BEGIN")
+            # counted before the cascade removes them
+            messages = self.connection.execute(
+                f"SELECT count(*) FROM chat_messages WHERE conversation_id IN ({marks})", conversation_ids
+            ).fetchone()[0]
+            conversations = self.connection.execute(
+                f"DELETE FROM conversations WHERE conversation_id IN ({marks})", conversation_ids
+            ).rowcount
+        return {"conversations": conversations, "messages": messages}
+
+    def close(self) -> None:
+        self.connection.close()
@@ -0,0 +1,269 @@
+import asyncio
+import logging
+import sqlite3
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from app.core import metrics
+from app.core.pagination import Position
+from app.features.chat.repositories.base import ChatRepositoryProtocol
+
+
+class WriteBehindChatRepository:
+    """Message writes return at once and are stored in bulk in the background.
+
+    Rows get their id and created_at here, go into a bounded queue, and are flushed as one multi-row
+    insert once `flush_rows` are waiting or `flush_interval_seconds` after the first one arrived.
+    A failed flush is retried with backoff through `save_messages_once`, which skips ids already
+    stored, so a flush that committed but failed to answer is never written twice. Until its flush
+    succeeds a row stays pending, and reads of its conversation merge it in.
+
+    A flush the database rejects (a constraint or data error: say, a row of a conversation deleted
+    while its turn was in flight) would fail the same way forever, so it is split in halves until the
+    offending rows are found, and those are dropped. A batch still failing after `max_attempts`
+    transient errors is dropped too. Either way the rows are logged and counted, and the queue moves on.
+
+    Conversation rows are still written through: messages reference them, and they are rare.
+    When the queue holds `max_rows`, writers wait for a flush to make room. drain() is called on
+    shutdown.
+    """
+
+    def __init__(
+        self,
+        repository: ChatRepositoryProtocol,
+        max_rows: int = 10000,
+        flush_rows: int = 500,
+        flush_interval_seconds: float = 0.05,
+        retry_max_seconds: float = 5.0,
+        max_attempts: int = 10
+    ) -> None:
+        self.repository = repository
+        self.max_rows = max_rows
+        self.flush_rows = flush_rows
+        self.flush_interval_seconds = flush_interval_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.max_attempts = max_attempts
+        # rows not yet taken by a flush, in arrival order
+        self._queued: List[Dict[str, Any]] = []
+        # conversation id -> row id -> row, for every row accepted but not yet stored (queued or in a flush)
+        self._pending: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.depth = 0
+        self._batch_ready = asyncio.Event()
+        self._space = asyncio.Condition()
+        # held while a flush writes, so delete_chat can't run between a flush's check and its insert
+        self._writing = asyncio.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+        self._draining = False
+        # flushes stored and rows given up on, for tests and benchmarks
+        self.flushes = 0
+        self.dropped = 0
+
+    @property
+    def round_trips(self) -> int:
+        return self.repository.round_trips
+
+    async def ping(self) -> None:
+        await self.repository.ping()
+
+    async def save_conversation_meta(self, conversation_id: str, topic: str, stance: str) -> None:
+        await self.repository.save_conversation_meta(conversation_id, topic, stance)
+
+    async def save_conversations(self, conversations: List[Dict[str, str]]) -> None:
+        await self.repository.save_conversations(conversations)
+
+    async def get_conversation_meta(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        return await self.repository.get_conversation_meta(conversation_id)
+
+    async def update_conversation_summary(
+        self, conversation_id: str, summary: str, summary_upto: str, expected_upto: Optional[str]
+    ) -> bool:
+        return await self.repository.update_conversation_summary(conversation_id, summary, summary_upto, expected_upto)
+
+    async def get_conversation_with_messages(self, conversation_id: str, limit: int = 5) -> Optional[Dict[str, Any]]:
+        state = await self.repository.get_conversation_with_messages(conversation_id, limit=limit)
+        if state is None:
+            return None
+        return {**state, "messages": self._with_pending(conversation_id, state["messages"], limit, True, None)}
+
+    async def save_message(self, conversation_id: str, role: str, message: str, partial: bool = False) -> Optional[Dict[str, Any]]:
+        rows = await self.save_messages(
+            [{"conversation_id": conversation_id, "role": role, "message": message, "partial": partial}]
+        )
+        return rows[0]
+
+    async def save_messages(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Queues the rows and returns them as they will be stored."""
+        rows = [
+            {
+                "id": m.get("id") or str(uuid.uuid4()),
+                "conversation_id": m["conversation_id"],
+                "role": m["role"],
+                "message": m["message"],
+                "partial": bool(m.get("partial", False)),
+                "created_at": m.get("created_at") or datetime.now(timezone.utc).isoformat()
+            }
+            for m in messages
+        ]
+        async with self._space:
+            await self._space.wait_for(lambda: len(self._queued) < self.max_rows)
+            self._queued.extend(rows)
+        for row in rows:
+            self._pending.setdefault(row["conversation_id"], {})[row["id"]] = row
+        self._set_depth(self.depth + len(rows))
+        if len(self._queued) >= self.flush_rows:
+            self._batch_ready.set()
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush())
+        return [dict(row) for row in rows]
+
+    async def save_messages_once(self, messages: List[Dict[str, Any]]) -> None:
+        await self.save_messages(messages)
+
+    async def get_messages(
+        self, conversation_id: str, limit: int = 5, desc: bool = True, after: Optional[Position] = None
+    ) -> List[Dict[str, Any]]:
+        rows = await self.repository.get_messages(conversation_id, limit=limit, desc=desc, after=after)
+        return self._with_pending(conversation_id, rows, limit, desc, after)
+
+    async def get_chats(
+        self, limit: Optional[int] = None, desc: bool = True, after: Optional[Position] = None
+    ) -> List[Dict[str, Any]]:
+        return await self.repository.get_chats(limit=limit, desc=desc, after=after)
+
+    async def search(self, query: str, limit: int = 20, after: Optional[Position] = None) -> List[Dict[str, Any]]:
+        # the index is the backend's: queued rows become searchable once their flush lands
+        return await self.repository.search(query, limit=limit, after=after)
+
+    async def delete_chat(self, conversation_id: str) -> None:
+        self.discard(conversation_id)
+        # a flush already past its check could still insert the conversation's rows
+        async with self._writing:
+            await self.repository.delete_chat(conversation_id)
+
+    async def delete_chats(self, conversation_ids: List[str]) -> Dict[str, int]:
+        for conversation_id in conversation_ids:
+            self.discard(conversation_id)
+        async with self._writing:
+            return await self.repository.delete_chats(conversation_ids)
+
+    def discard(self, conversation_id: str) -> None:
+        """Drops a deleted conversation's unstored rows (also subscribed to remote deletes)."""
+        dropped = self._pending.pop(conversation_id, None)
+        if dropped:
+            self._queued = [row for row in self._queued if row["conversation_id"] != conversation_id]
+            self._set_depth(self.depth - len(dropped))
+
+    async def drain(self, timeout: float) -> None:
+        """Flushes everything queued without waiting for the interval; gives up (and says so) after `timeout`."""
+        self._draining = True
+        self._batch_ready.set()
+        if self._flusher is None:
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(self._flusher), timeout)
+        except asyncio.TimeoutError:
+            logging.error(f"Write-behind drain timed out, {self.depth} messages were not stored")
+
+    def _with_pending(
+        self, conversation_id: str, rows: List[Dict[str, Any]], limit: int, desc: bool, after: Optional[Position]
+    ) -> List[Dict[str, Any]]:
+        pending = self._pending.get(conversation_id)
+        if not pending:
+            return rows
+        merged = {row["id"]: row for row in rows}
+        for row in pending.values():
+            key = (row["created_at"], row["id"])
+            if after is None or (key < after if desc else key > after):
+                merged.setdefault(row["id"], dict(row))
+        ordered = sorted(merged.values(), key=lambda row: (row["created_at"], str(row["id"])), reverse=desc)
+        return ordered[:limit]
+
+    async def _flush(self) -> None:
+        try:
+            while self._queued:
+                if len(self._queued) < self.flush_rows and not self._draining:
+                    try:
+                        await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval_seconds)
+                    except asyncio.TimeoutError:
+                        pass
+                self._batch_ready.clear()
+                batch, self._queued = self._queued[:self.flush_rows], self._queued[self.flush_rows:]
+                async with self._space:
+                    self._space.notify_all()
+                await self._store(batch)
+        finally:
+            self._flusher = None
+
+    async def _store(self, batch: List[Dict[str, Any]]) -> None:
+        start = time.perf_counter()
+        delay = min(0.1, self.retry_max_seconds)
+        for attempt in range(1, self.max_attempts + 1):
+            async with self._writing:
+                # rows of conversations deleted since they were queued are not written
+                batch = [row for row in batch if row["id"] in self._pending.get(row["conversation_id"], {})]
+                if not batch:
+                    return
+                try:
+                    await self.repository.save_messages_once(batch)
+                    break
+                except Exception as e:
+                    error = e
+                    if metrics.ENABLED:
+                        metrics.WRITE_BEHIND_FLUSH_FAILURES.inc()
+            if _is_rejected(error):
+                if len(batch) == 1:
+                    self._drop(batch, error)
+                    return
+                # the rest of the batch is fine: store around the offending rows
+                half = len(batch) // 2
+                await self._store(batch[:half])
+                await self._store(batch[half:])
+                return
+            if attempt == self.max_attempts:
+                self._drop(batch, error)
+                return
+            logging.warning(f"Write-behind flush of {len(batch)} messages failed, retrying in {delay}s: {error!r}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.retry_max_seconds)
+
+        self.flushes += 1
+        self._forget(batch)
+        if metrics.ENABLED:
+            metrics.WRITE_BEHIND_FLUSH_ROWS.observe(len(batch))
+            metrics.WRITE_BEHIND_FLUSH_SECONDS.observe(time.perf_counter() - start)
+
+    def _drop(self, batch: List[Dict[str, Any]], error: Exception) -> None:
+        logging.error(
+            f"Write-behind dropped {len(batch)} messages after {error!r}: "
+            f"{[(row['conversation_id'], row['id']) for row in batch]}"
+        )
+        self.dropped += len(batch)
+        self._forget(batch)
+        if metrics.ENABLED:
+            metrics.WRITE_BEHIND_DROPPED_ROWS.inc(len(batch))
+
+    def _forget(self, batch: List[Dict[str, Any]]) -> None:
+        for row in batch:
+            rows = self._pending.get(row["conversation_id"])
+            if rows is not None and rows.pop(row["id"], None) is not None:
+                self.depth -= 1
+                if not rows:
+                    del self._pending[row["conversation_id"]]
+        self._set_depth(self.depth)
+
+    def _set_depth(self, depth: int) -> None:
+        self.depth = depth
+        if metrics.ENABLED:
+            metrics.WRITE_BEHIND_QUEUE_DEPTH.set(depth)
+
+
+def _is_rejected(error: Exception) -> bool:
+    """Constraint and data errors: the rows themselves are refused, and retrying them can't help."""
+    if isinstance(error, (sqlite3.IntegrityError, sqlite3.DataError)):
+        return True
+    # SQLSTATE classes 22 (data exception) and 23 (integrity constraint violation): asyncpg sets
+    # `sqlstate`, PostgREST's APIError `code`
+    code = getattr(error, "sqlstate", None) or getattr(error, "code", None)
+    return isinstance(code, str) and code[:2] in ("22", "23")
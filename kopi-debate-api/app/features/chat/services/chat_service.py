@@ -1,71 +1,187 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import uuid
-from typing import List
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List
 
 from app.core.config import get_settings
-from app.features.chat.repositories.chat_repository import ChatRepository
+from app.features.chat.repositories.base import ChatRepositoryProtocol
 from app.features.chat.services.llm_service import LLMService
+from app.features.chat.services.meta_extractor import RuleBasedMetaExtractor
+from app.features.chat.services.retention import ConversationPurger
+from app.features.chat.services.history_budget import fold_candidates, is_after
+from app.features.chat.services.turn_writer import TurnWriter
 from app.core.errors import Result
-from app.features.chat.models.chat_response import ChatMessageResponse, ChatSummary, DeleteResponse
+from app.core.idempotency import IdempotencyStore
+from app.core.keyed_lock import KeyedLock
+from app.core.llm_scheduler import LLMOverloaded
+from app.core.metrics import stage, timed
+from app.core.pagination import Page, decode_cursor, encode_cursor, paginate
+from app.core.task_graph import TaskGraph
+from app.features.chat.models.chat_request import ChatMessageRequest
+from app.features.chat.models.chat_response import ChatMessageResponse, BulkDeleteResponse, ChatSummary, DeleteResponse, SearchHit
 from app.features.chat.models.chat_message import ChatMessage, ChatMessageHistory
-from app.features.chat.models.chat_response import ChatHistoryResponse
+from app.features.chat.models.chat_meta import ChatMeta, OpeningTurn
 
 settings = get_settings()
 
+@dataclass
+class TurnContext:
+    conversation_id: str
+    meta: Dict[str, str]
+    history: List[Dict[str, Any]]
+    user_row: Dict[str, Any]
+    # set when the opening turn's reply came back with the meta in a single LLM call
+    opening_reply: str | None = None
+    # rolling summary of the messages older than the verbatim window
+    summary: str | None = None
+    summary_upto: str | None = None
+    # conversation created by this turn whose meta row is not written yet (batch turns write it with the messages)
+    unsaved_meta: bool = False
+
 class ChatService:
-    def __init__(self, repository: ChatRepository, llm_service: LLMService) -> None:
+    def __init__(
+        self,
+        repository: ChatRepositoryProtocol,
+        llm_service: LLMService,
+        meta_extractor: RuleBasedMetaExtractor | None = None,
+        idempotency: IdempotencyStore | None = None,
+        turn_locks: KeyedLock | None = None,
+        purger: ConversationPurger | None = None
+    ) -> None:
         self.repository = repository
         self.llm_service = llm_service
+        self.meta_extractor = meta_extractor
+        self.idempotency = idempotency or IdempotencyStore(
+            max_entries=settings.IDEMPOTENCY_MAX_KEYS, ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS
+        )
+        # one turn at a time per conversation, so concurrent posts don't both call Gemini on the same history
+        # (an empty KeyedLock is falsy, hence the explicit None check)
+        self.turn_locks = turn_locks if turn_locks is not None else KeyedLock()
+        self.purger = purger or ConversationPurger(
+            repository,
+            batch_size=settings.RETENTION_BATCH_SIZE,
+            batch_target_seconds=settings.RETENTION_BATCH_TARGET_MS / 1000,
+            pause_seconds=settings.RETENTION_BATCH_PAUSE_MS / 1000,
+            turn_locks=self.turn_locks
+        )
         self.max_history = settings.CHAT_HISTORY_WINDOW
+        self.single_call_opening = settings.OPENING_TURN_SINGLE_CALL
+        self.history_token_budget = settings.HISTORY_TOKEN_BUDGET
+        self.rolling_summary = settings.ROLLING_SUMMARY
+        self.concurrent_turn_steps = settings.CONCURRENT_TURN_STEPS
+        # latest summary fold per conversation; a new fold waits for the previous one
+        self._summary_tasks: Dict[str, asyncio.Task] = {}
 
-    def post_message(
+    async def warmup(self) -> None:
+        """Opens the database and Gemini connections so the first real request doesn't pay for them."""
+        results = await asyncio.gather(
+            asyncio.wait_for(self.repository.ping(), settings.WARMUP_TIMEOUT_SECONDS),
+            asyncio.wait_for(self.llm_service.warmup(), settings.WARMUP_TIMEOUT_SECONDS),
+            return_exceptions=True
+        )
+        for name, result in zip(("database", "gemini"), results):
+            if isinstance(result, Exception):
+                logging.warning(f"Warmup of {name} failed: {result!r}")
+
+    async def post_message(
         self,
         conversation_id: str | None,
         message: str,
+        idempotency_key: str | None = None
     ) -> Result[ChatMessageResponse]:
+        """With an `idempotency_key`, a repeat of the same request shares or replays the first one's result."""
+        if idempotency_key:
+            return await self.idempotency.run(
+                idempotency_key, (conversation_id, message), lambda: self._post_turn(conversation_id, message)
+            )
+        return await self._post_turn(conversation_id, message)
+
+    async def post_messages_batch(
+        self, items: List[ChatMessageRequest], concurrency: int = settings.BATCH_MAX_CONCURRENCY
+    ) -> Result[AsyncIterator[Dict[str, Any]]]:
+        """Runs each item as a turn, `concurrency` at a time, and yields per-item results as they complete.
+
+        Storage writes of turns that finish together are grouped (see TurnWriter).
+        """
+        if not items:
+            return Result.fail("Batch has no items")
+        if len(items) > settings.BATCH_MAX_ITEMS:
+            return Result.fail(f"Batch has {len(items)} items, at most {settings.BATCH_MAX_ITEMS} allowed", status_code=413)
+        return Result.ok(self._run_batch(items, min(concurrency, len(items))))
+
+    async def _run_batch(self, items: List[ChatMessageRequest], concurrency: int) -> AsyncIterator[Dict[str, Any]]:
+        writer = TurnWriter(self.repository)
+        results: asyncio.Queue = asyncio.Queue()
+        # shared by the workers, each takes the next item when it is free
+        queued = iter(enumerate(items))
+
+        async def worker() -> None:
+            for index, item in queued:
+                try:
+                    result = await self._post_turn(item.conversation_id, item.message, writer=writer)
+                except Exception as e:
+                    logging.error(f"Batch item {index} failed: {str(e)}", exc_info=True)
+                    result = Result.fail(f"Failed to process message: {str(e)}")
+                await results.put(self._batch_result(index, item, result))
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
         try:
-            conversation_id = conversation_id or str(uuid.uuid4())
-            
-            # Get or create conversation metadata
-            meta = self.repository.get_conversation_meta(conversation_id)
-            if not meta:
-                meta_result = self.llm_service.extract_meta_from_message(message)
-                if meta_result._is_error:
-                    error_msg = f"Failed to extract conversation metadata: {meta_result._value.error}"
-                    logging.error(f"Error in conversation {conversation_id}: {error_msg}")
-                    return Result.fail(error_msg)
-                
-                meta_obj = meta_result._value
-                self.repository.save_conversation_meta(
-                    conversation_id=conversation_id,
-                    topic=meta_obj.topic,
-                    stance=meta_obj.stance
-                )
-                meta = {"topic": meta_obj.topic, "stance": meta_obj.stance}
+            for _ in items:
+                yield await results.get()
+        finally:
+            # the client went away (or we are done): stop taking items
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
 
-            self.repository.save_message(conversation_id, "user", message)
-            
-            history = self.repository.get_messages(conversation_id, limit=self.max_history, desc=True)
-            
-            bot_reply_result = self.llm_service.generate_debate_response(
-                user_message=message,
-                chat_history=history,
-                topic=meta["topic"],
-                stance=meta["stance"]
+    @staticmethod
+    def _batch_result(index: int, item: ChatMessageRequest, result: Result[ChatMessageResponse]) -> Dict[str, Any]:
+        if not result._is_error:
+            return {"index": index, "ok": True, **result._value.model_dump()}
+        failure = result._value
+        data = {
+            "index": index,
+            "ok": False,
+            "conversation_id": item.conversation_id,
+            "error": failure.error,
+            "status_code": failure.status_code
+        }
+        if failure.headers and "Retry-After" in failure.headers:
+            data["retry_after"] = float(failure.headers["Retry-After"])
+        return data
+
+    async def _post_turn(
+        self, conversation_id: str | None, message: str, writer: TurnWriter | None = None
+    ) -> Result[ChatMessageResponse]:
+        if conversation_id is None:
+            return await self._run_turn(None, message, writer)
+        async with self.turn_locks.hold(conversation_id):
+            return await self._run_turn(conversation_id, message, writer)
+
+    async def _run_turn(
+        self, conversation_id: str | None, message: str, writer: TurnWriter | None = None
+    ) -> Result[ChatMessageResponse]:
+        """With a `writer`, the turn's rows (and a new conversation's meta) go out in its next group write."""
+        try:
+            turn_result = await self._start_turn(
+                conversation_id, message, opening_reply=self.single_call_opening, save_meta=False
             )
+            if turn_result._is_error:
+                return turn_result
+            turn = turn_result._value
+            conversation_id = turn.conversation_id
+
+            steps_result = await self._turn_steps(turn, message, writer).run()
+            if steps_result._is_error:
+                return steps_result
+            saved = steps_result._value["saved"]
             
-            if bot_reply_result._is_error:
-                error_msg = f"Failed to generate bot response: {bot_reply_result._value.error}"
-                logging.error(f"Error in conversation {conversation_id}: {error_msg}")
-                return Result.fail(error_msg)
-            
-            bot_reply = bot_reply_result._value
-            self.repository.save_message(conversation_id, "bot", bot_reply)
-            
-            # Get the 5 most recent messages after saving the bot reply
-            recent_messages = self.repository.get_messages(conversation_id, limit=5, desc=True)
+            # The 5 most recent messages, built from rows already in hand instead of re-reading them
+            recent_messages = [*reversed(saved), *turn.history][:5]
             messages = [
                 ChatMessage(role=msg["role"], message=msg["message"])
                 for msg in recent_messages 
@@ -79,44 +195,476 @@ class ChatService:
             logging.error(f"Failed to process message for conversation {conversation_id}: {str(e)}", exc_info=True)
             return Result.fail(f"Failed to process message: {str(e)}")
 
-    def get_chats(self) -> Result[List[ChatSummary]]:
+    def _turn_steps(self, turn: TurnContext, message: str, writer: TurnWriter | None) -> TaskGraph:
+        """The rest of a turn once its context is resolved:
+
+            reply ─────────────────┐
+                                   ├──> saved (user + bot rows)
+            meta (new conversation)┘
+
+        The user row waits in hand and goes out with the reply. A new conversation's meta row is written
+        while the reply is generated (batched turns write it with the messages); the messages reference it, so
+        they go after both.
+        """
+        graph = TaskGraph(concurrent=self.concurrent_turn_steps)
+        graph.add("reply", lambda: self._reply(turn, message))
+        if writer is not None:
+            conversation = {"conversation_id": turn.conversation_id, **turn.meta} if turn.unsaved_meta else None
+            graph.add("saved", lambda reply: self._write_turn(writer, turn, conversation, reply), after=["reply"])
+        elif turn.unsaved_meta:
+            graph.add("meta", lambda: self._save_meta(turn))
+            graph.add("saved", lambda reply, meta: self._commit_turn(turn, reply), after=["reply", "meta"])
+        else:
+            graph.add("saved", lambda reply: self._commit_turn(turn, reply), after=["reply"])
+        return graph
+
+    @timed("chat.reply")
+    async def _reply(self, turn: TurnContext, message: str) -> Result[str]:
+        if turn.opening_reply:
+            return Result.ok(turn.opening_reply)
+        bot_reply_result = await self.llm_service.generate_debate_response(
+            user_message=message,
+            chat_history=turn.history,
+            topic=turn.meta["topic"],
+            stance=turn.meta["stance"],
+            summary=turn.summary
+        )
+
+        if bot_reply_result._is_error:
+            error_msg = f"Failed to generate bot response: {bot_reply_result._value.error}"
+            logging.error(f"Error in conversation {turn.conversation_id}: {error_msg}")
+            return bot_reply_result.with_error(error_msg)
+        return Result.ok(bot_reply_result._value)
+
+    @timed("chat.save_meta")
+    async def _save_meta(self, turn: TurnContext) -> None:
+        await self.repository.save_conversation_meta(
+            conversation_id=turn.conversation_id,
+            topic=turn.meta["topic"],
+            stance=turn.meta["stance"]
+        )
+
+    async def _write_turn(
+        self, writer: TurnWriter, turn: TurnContext, conversation: Dict[str, str] | None, bot_reply: str
+    ) -> List[Dict[str, Any]]:
+        saved = await writer.write(conversation, self._turn_rows(turn, bot_reply))
+        self._after_commit(turn, saved)
+        return saved
+
+    async def stream_message(
+        self,
+        conversation_id: str | None,
+        message: str,
+    ) -> Result[AsyncIterator[Dict[str, Any]]]:
+        try:
+            turn_result = await self._start_turn(conversation_id, message)
+            if turn_result._is_error:
+                return turn_result
+            return Result.ok(self._stream_reply(turn_result._value, message))
+        except Exception as e:
+            logging.error(f"Failed to start stream for conversation {conversation_id}: {str(e)}", exc_info=True)
+            return Result.fail(f"Failed to process message: {str(e)}")
+
+    async def _stream_reply(self, turn: TurnContext, message: str) -> AsyncIterator[Dict[str, Any]]:
+        conversation_id = turn.conversation_id
+        yield {"event": "meta", "data": {"conversation_id": conversation_id, **turn.meta}}
+
+        reply: List[str] = []
+        completed = False
         try:
-            chats = self.repository.get_chats()
-            return Result.ok([
-                ChatSummary(
-                    conversation_id=chat["conversation_id"],
-                    topic=chat["topic"],
-                    created_at=chat["created_at"]
-                ) for chat in chats
-            ])
+            async for token in self.llm_service.stream_debate_response(
+                user_message=message,
+                chat_history=turn.history,
+                topic=turn.meta["topic"],
+                stance=turn.meta["stance"],
+                summary=turn.summary
+            ):
+                reply.append(token)
+                yield {"event": "token", "data": {"text": token}}
+            completed = True
+        except LLMOverloaded as e:
+            logging.warning(f"Stream for {conversation_id} shed: {str(e)}")
+            yield {"event": "error", "data": {"detail": f"Failed to generate bot response: {str(e)}", "retry_after": e.retry_after}}
+        except Exception as e:
+            logging.error(f"Failed to stream bot response for {conversation_id}: {str(e)}", exc_info=True)
+            yield {"event": "error", "data": {"detail": f"Failed to generate bot response: {str(e)}"}}
+        finally:
+            # runs once on completion, error or client disconnect (generator closed/cancelled);
+            # shielded so a cancelled request still persists what was streamed
+            await asyncio.shield(self._commit_turn(turn, "".join(reply).strip() or None, partial=not completed))
+
+        if completed:
+            yield {"event": "done", "data": {"conversation_id": conversation_id}}
+
+    @timed("chat.start_turn")
+    async def _start_turn(
+        self, conversation_id: str | None, message: str, opening_reply: bool = False, save_meta: bool = True
+    ) -> Result[TurnContext]:
+        """Resolves meta and history in one read for existing conversations and none for new ones.
+
+        With `opening_reply`, a new conversation's first reply is requested together with its meta.
+        Without `save_meta`, a new conversation's meta is left to the caller to write (`unsaved_meta`).
+        """
+        state = None
+        if conversation_id:
+            state = await self.repository.get_conversation_with_messages(conversation_id, limit=self.max_history)
+        else:
+            conversation_id = str(uuid.uuid4())
+
+        reply = summary = summary_upto = None
+        if state:
+            meta = {"topic": state["topic"], "stance": state["stance"]}
+            history = state["messages"]
+            summary, summary_upto = state.get("summary"), state.get("summary_upto")
+        else:
+            meta_result = await self._create_meta(conversation_id, message, with_reply=opening_reply, save=save_meta)
+            if meta_result._is_error:
+                return meta_result
+            meta_obj = meta_result._value
+            meta, history = {"topic": meta_obj.topic, "stance": meta_obj.stance}, []
+            if isinstance(meta_obj, OpeningTurn):
+                reply = meta_obj.reply
+
+        return Result.ok(TurnContext(
+            conversation_id=conversation_id,
+            meta=meta,
+            history=history,
+            user_row=self._message_row(conversation_id, "user", message),
+            opening_reply=reply,
+            summary=summary,
+            summary_upto=summary_upto,
+            unsaved_meta=state is None and not save_meta
+        ))
+
+    @timed("chat.commit_turn")
+    async def _commit_turn(self, turn: TurnContext, bot_reply: str | None, partial: bool = False) -> List[Dict[str, Any]]:
+        """Writes the user row and the bot reply (if any) in a single bulk insert."""
+        saved = await self.repository.save_messages(self._turn_rows(turn, bot_reply, partial))
+        self._after_commit(turn, saved)
+        return saved
+
+    def _turn_rows(self, turn: TurnContext, bot_reply: str | None, partial: bool = False) -> List[Dict[str, Any]]:
+        rows = [turn.user_row]
+        if bot_reply:
+            rows.append(self._message_row(turn.conversation_id, "bot", bot_reply, partial=partial))
+        return rows
+
+    def _after_commit(self, turn: TurnContext, saved: List[Dict[str, Any]]) -> None:
+        if self.rolling_summary:
+            self._schedule_summary(turn, saved)
+
+    def _schedule_summary(self, turn: TurnContext, saved: List[Dict[str, Any]]) -> None:
+        """Starts a background fold of the messages the next turn will no longer send verbatim."""
+        # the next turn's history: this turn's rows followed by the window it was given, newest first
+        upcoming = [*reversed(saved), *turn.history]
+        pending = fold_candidates(upcoming, self.history_token_budget, self.max_history, turn.summary_upto)
+        if not pending:
+            return
+        conversation_id = turn.conversation_id
+        previous = self._summary_tasks.get(conversation_id)
+        task = asyncio.create_task(self._fold_summary(conversation_id, turn.meta, pending, previous))
+        self._summary_tasks[conversation_id] = task
+
+        def forget(done: asyncio.Task) -> None:
+            if self._summary_tasks.get(conversation_id) is done:
+                del self._summary_tasks[conversation_id]
+        task.add_done_callback(forget)
+
+    async def _fold_summary(
+        self,
+        conversation_id: str,
+        meta: Dict[str, str],
+        pending: List[Dict[str, Any]],
+        previous: asyncio.Task | None
+    ) -> None:
+        if previous is not None:
+            await asyncio.wait([previous])
+        try:
+            # one retry: a failed compare-and-set means another worker folded first, so refold on its summary
+            for _ in range(2):
+                current = await self.repository.get_conversation_meta(conversation_id)
+                if current is None:
+                    return
+                upto = current.get("summary_upto")
+                messages = [m for m in pending if is_after(m.get("created_at"), upto)]
+                if not messages:
+                    return
+                result = await self.llm_service.summarize_history(
+                    meta["topic"], meta["stance"], current.get("summary"), messages
+                )
+                if result._is_error:
+                    logging.warning(f"Summary fold for {conversation_id} failed: {result._value.error}")
+                    return
+                if await self.repository.update_conversation_summary(
+                    conversation_id, result._value, messages[-1]["created_at"], upto
+                ):
+                    return
+        except Exception as e:
+            logging.error(f"Summary fold for {conversation_id} failed: {str(e)}", exc_info=True)
+
+    async def drain_summaries(self) -> None:
+        """Waits for in-flight summary folds; called on shutdown so finished turns still get folded."""
+        if self._summary_tasks:
+            await asyncio.wait(list(self._summary_tasks.values()))
+
+    async def _create_meta(
+        self, conversation_id: str, message: str, with_reply: bool = False, save: bool = True
+    ) -> Result[ChatMeta]:
+        """Returns an OpeningTurn when the single-call path succeeded, else a plain ChatMeta.
+
+        Openers the rule-based extractor recognises skip the meta LLM call entirely.
+        """
+        meta_obj = None
+        local_result = None
+        if self.meta_extractor:
+            with stage("meta.rules"):
+                local_result = self.meta_extractor.extract(message)
+        if local_result is not None:
+            if local_result._is_error:
+                error_msg = f"Failed to extract conversation metadata: {local_result._value.error}"
+                logging.info(f"Rejected opener for conversation {conversation_id}: {error_msg}")
+                return Result.fail(error_msg)
+            meta_obj = local_result._value
+        elif with_reply:
+            opening_result = await self.llm_service.open_debate(message)
+            if opening_result._is_error and opening_result._value.status_code == 503:
+                # shed by the LLM scheduler; the two-call fallback would only be shed too
+                return opening_result
+            if opening_result._is_error:
+                logging.info(f"Single-call opening failed for {conversation_id}, using two calls: {opening_result._value.error}")
+            else:
+                meta_obj = opening_result._value
+
+        if meta_obj is None:
+            meta_result = await self.llm_service.extract_meta_from_message(message)
+            if meta_result._is_error:
+                error_msg = f"Failed to extract conversation metadata: {meta_result._value.error}"
+                logging.error(f"Error in conversation {conversation_id}: {error_msg}")
+                return meta_result.with_error(error_msg)
+            meta_obj = meta_result._value
+
+        if save:
+            await self.repository.save_conversation_meta(
+                conversation_id=conversation_id,
+                topic=meta_obj.topic,
+                stance=meta_obj.stance
+            )
+        return Result.ok(meta_obj)
+
+    def _message_row(self, conversation_id: str, role: str, message: str, partial: bool = False) -> Dict[str, Any]:
+        # timestamped client-side so rows written in one bulk insert keep their turn order
+        row = {
+            "conversation_id": conversation_id,
+            "role": role,
+            "message": message,
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }
+        if partial:
+            row["partial"] = True
+        return row
+
+    async def get_chats(self, limit: int = 50, cursor: str | None = None) -> Result[Page[ChatSummary]]:
+        """Newest conversations first, `limit` per page."""
+        try:
+            position = decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            return Result.fail(str(e))
+        try:
+            # newest first, so going back (towards newer chats) scans ascending
+            backward = position is not None and position.backward
+            chats = await self.repository.get_chats(
+                limit=limit + 1, desc=not backward, after=position.position if position else None
+            )
+            page = paginate(chats, limit, position, lambda chat: (chat["created_at"], chat["conversation_id"]))
+            return Result.ok(Page(
+                [
+                    ChatSummary(
+                        conversation_id=chat["conversation_id"],
+                        topic=chat["topic"],
+                        created_at=chat["created_at"]
+                    ) for chat in page.items
+                ],
+                page.next_cursor,
+                page.prev_cursor
+            ))
         except Exception as e:
             logging.error(f"Failed to fetch chats: {str(e)}", exc_info=True)
             return Result.fail(f"Failed to fetch chats: {str(e)}")
 
-    def get_history(self, conversation_id: str, limit: int = 5, desc: bool = False) -> Result[ChatHistoryResponse]:
+    async def get_history(
+        self, conversation_id: str, limit: int = 5, cursor: str | None = None, latest: bool = False
+    ) -> Result[Page[ChatMessageHistory]]:
+        """Oldest messages first, `limit` per page, starting from the beginning or with `latest` the end."""
         try:
-            messages = self.repository.get_messages(conversation_id, limit=limit, desc=desc)
-            formatted_messages = [
-                ChatMessageHistory(
-                    id=str(msg["id"]),
-                    conversation_id=msg["conversation_id"],
-                    message=msg["message"],
-                    role=msg["role"],
-                    created_at=msg["created_at"]
-                ) for msg in messages
-            ]
-            return Result.ok(ChatHistoryResponse(
-                conversation_id=conversation_id,
-                message=formatted_messages
+            position = decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            return Result.fail(str(e))
+        try:
+            backward = position.backward if position else latest
+            messages = await self.repository.get_messages(
+                conversation_id, limit=limit + 1, desc=backward, after=position.position if position else None
+            )
+            page = paginate(messages, limit, position, lambda msg: (msg["created_at"], str(msg["id"])), backward=latest)
+            return Result.ok(Page(
+                [
+                    ChatMessageHistory(
+                        id=str(msg["id"]),
+                        conversation_id=msg["conversation_id"],
+                        message=msg["message"],
+                        role=msg["role"],
+                        created_at=msg["created_at"],
+                        partial=msg.get("partial", False)
+                    ) for msg in page.items
+                ],
+                page.next_cursor,
+                page.prev_cursor
             ))
         except Exception as e:
             logging.error(f"Failed to fetch chat history for {conversation_id}: {str(e)}", exc_info=True)
             return Result.fail(f"Failed to fetch chat history: {str(e)}")
 
-    def delete_chat(self, conversation_id: str) -> Result[DeleteResponse]:
+    async def search(self, query: str, limit: int = 20, cursor: str | None = None) -> Result[Page[SearchHit]]:
+        """Best matches first, `limit` per page. Pages only go forward: ranks aren't a stable order to step back through."""
+        if not query.strip():
+            return Result.fail("Search query is empty")
+        try:
+            position = decode_cursor(cursor, sort_value=float) if cursor else None
+            if position is not None and position.backward:
+                raise ValueError("Invalid cursor")
+        except ValueError as e:
+            return Result.fail(str(e))
+        try:
+            hits = await self.repository.search(query, limit=limit + 1, after=position.position if position else None)
+            items = [
+                SearchHit(
+                    conversation_id=hit["conversation_id"],
+                    topic=hit["topic"],
+                    message_id=hit["message_id"],
+                    role=hit["role"],
+                    snippet=hit["snippet"],
+                    created_at=hit["created_at"],
+                    rank=hit["rank"]
+                ) for hit in hits[:limit]
+            ]
+            next_cursor = None
+            if len(hits) > limit:
+                last = hits[limit - 1]
+                next_cursor = encode_cursor((repr(float(last["rank"])), last["key"]))
+            return Result.ok(Page(items, next_cursor))
+        except Exception as e:
+            logging.error(f"Failed to search chats: {str(e)}", exc_info=True)
+            return Result.fail(f"Failed to search chats: {str(e)}")
+
+    async def export(
+        self,
+        conversation_id: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        chunk_size: int | None = None
+    ) -> Result[AsyncIterator[List[Dict[str, Any]]]]:
+        """Every message of one conversation, or of the conversations created in [since, until), as export rows.
+
+        Rows come out in chunks of at most `chunk_size`, each read with its own keyset query, so only one
+        chunk is held at a time however long the transcripts are. Conversations are in creation order and
+        their messages oldest first.
+        """
+        chunk_size = chunk_size or settings.EXPORT_CHUNK_ROWS
+        since, until = _utc(since), _utc(until)
+        if since is not None and until is not None and since >= until:
+            return Result.fail("`since` must be before `until`")
+        try:
+            if conversation_id is not None:
+                meta = await self.repository.get_conversation_meta(conversation_id)
+                if meta is None:
+                    return Result.fail(f"Conversation {conversation_id} not found", status_code=404)
+                return Result.ok(self._export_messages(
+                    {"conversation_id": conversation_id, "topic": meta["topic"], "stance": meta["stance"]}, chunk_size
+                ))
+            return Result.ok(self._export_range(since, until, chunk_size))
+        except Exception as e:
+            logging.error(f"Failed to start export: {str(e)}", exc_info=True)
+            return Result.fail(f"Failed to start export: {str(e)}")
+
+    async def _export_range(
+        self, since: datetime | None, until: datetime | None, chunk_size: int
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        # (since, "") sorts before every conversation created at `since`
+        position = (since.isoformat(), "") if since is not None else None
+        while True:
+            chats = await self.repository.get_chats(limit=chunk_size, desc=False, after=position)
+            for chat in chats:
+                if until is not None and datetime.fromisoformat(chat["created_at"]) >= until:
+                    return
+                async for rows in self._export_messages(chat, chunk_size):
+                    yield rows
+            if len(chats) < chunk_size:
+                return
+            position = (chats[-1]["created_at"], chats[-1]["conversation_id"])
+
+    async def _export_messages(self, conversation: Dict[str, Any], chunk_size: int) -> AsyncIterator[List[Dict[str, Any]]]:
+        position = None
+        while True:
+            messages = await self.repository.get_messages(
+                conversation["conversation_id"], limit=chunk_size, desc=False, after=position
+            )
+            yield [
+                {
+                    "conversation_id": conversation["conversation_id"],
+                    "topic": conversation["topic"],
+                    "stance": conversation["stance"],
+                    "id": str(msg["id"]),
+                    "role": msg["role"],
+                    "message": msg["message"],
+                    "partial": bool(msg.get("partial", False)),
+                    "created_at": msg["created_at"]
+                } for msg in messages
+            ]
+            if len(messages) < chunk_size:
+                return
+            position = (messages[-1]["created_at"], str(messages[-1]["id"]))
+
+    async def delete_chat(self, conversation_id: str) -> Result[DeleteResponse]:
         try:
-            self.repository.delete_chat(conversation_id)
+            # after any turn in flight, so it can't store its rows once the conversation is gone
+            async with self.turn_locks.hold(conversation_id):
+                await self.repository.delete_chat(conversation_id)
             return Result.ok(DeleteResponse())
         except Exception as e:
             logging.error(f"Failed to delete chat {conversation_id}: {str(e)}", exc_info=True)
             return Result.fail(f"Failed to delete chat: {str(e)}")
+
+    async def delete_chats(
+        self, conversation_ids: List[str] | None = None, created_before: datetime | None = None
+    ) -> Result[BulkDeleteResponse]:
+        """Deletes the given conversations, or those created before `created_before`, in small batches."""
+        if (conversation_ids is None) == (created_before is None):
+            return Result.fail("Give either conversation_ids or created_before")
+        if conversation_ids is not None and len(conversation_ids) > settings.BULK_DELETE_MAX_IDS:
+            return Result.fail(
+                f"{len(conversation_ids)} conversation ids given, at most {settings.BULK_DELETE_MAX_IDS} allowed",
+                status_code=413
+            )
+        try:
+            if conversation_ids is not None:
+                report = await self.purger.delete(conversation_ids)
+            else:
+                # bounded like a retention run; a caller with more to delete repeats the request
+                report = await self.purger.purge_created_before(
+                    _utc(created_before), max_seconds=settings.RETENTION_RUN_MAX_SECONDS
+                )
+            return Result.ok(BulkDeleteResponse(
+                conversations=report.conversations,
+                messages=report.messages,
+                batches=report.batches,
+                complete=report.complete
+            ))
+        except Exception as e:
+            logging.error(f"Failed to delete chats: {str(e)}", exc_info=True)
+            return Result.fail(f"Failed to delete chats: {str(e)}")
+
+
+def _utc(value: datetime | None) -> datetime | None:
+    # times given without an offset are taken as UTC, like every stored timestamp
+    if value is None or value.tzinfo is not None:
+        return value
+    return value.replace(tzinfo=timezone.utc)
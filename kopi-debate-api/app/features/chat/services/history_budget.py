@@ -0,0 +1,38 @@
+"""Token-budgeted split of a conversation's recent messages into a verbatim window and the rest.
+
+Tokens are estimated at ~4 characters each, the usual rule of thumb for Gemini on English text.
+The estimate only has to keep prompts bounded, so a local heuristic beats a count_tokens round trip.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+def select_recent(messages: List[Dict[str, Any]], budget: int, max_messages: int) -> List[Dict[str, Any]]:
+    """Longest newest-first prefix of `messages` within `budget` estimated tokens and `max_messages`."""
+    selected, used = [], 0
+    for message in messages[:max_messages]:
+        used += estimate_tokens(message["message"])
+        if used > budget:
+            break
+        selected.append(message)
+    return selected
+
+
+def fold_candidates(
+    messages: List[Dict[str, Any]], budget: int, max_messages: int, summary_upto: Optional[str]
+) -> List[Dict[str, Any]]:
+    """Messages (oldest first) that fall outside the verbatim window and are not yet in the summary."""
+    older = messages[len(select_recent(messages, budget, max_messages)):]
+    return [m for m in reversed(older) if is_after(m.get("created_at"), summary_upto)]
+
+
+def is_after(created_at: Optional[str], upto: Optional[str]) -> bool:
+    if upto is None:
+        return True
+    if created_at is None:
+        return False
+    return datetime.fromisoformat(created_at) > datetime.fromisoformat(upto)
@@ -1,42 +1,115 @@
 from __future__ import annotations
 
+import asyncio
 import logging
-import google.generativeai as genai
-from typing import Any, Dict, List
+import math
+import threading
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List
 from pydantic import ValidationError
-import google.api_core.exceptions
 
 from app.core.config import get_settings
-from app.features.chat.models.chat_meta import ChatMeta
-from app.features.chat.prompts.debate_prompts import build_meta_extraction_prompt, build_debate_system_prompt
+from app.features.chat.models.chat_meta import ChatMeta, OpeningTurn
+from app.features.chat.prompts.debate_prompts import build_meta_extraction_prompt, build_debate_system_prompt, build_opening_turn_prompt, build_summary_prompt
+from app.features.chat.services.history_budget import select_recent
+from app.features.chat.services.meta_extraction_cache import INVALID, MetaExtractionCache
 from app.core.errors import Result
+from app.core.llm_scheduler import LLMOverloaded, LLMScheduler
+from app.core.metrics import record_token_usage, stage, timed
+
+if TYPE_CHECKING:
+    import google.generativeai as genai
 
 settings = get_settings()
-genai.configure(api_key=settings.GOOGLE_API_KEY)
+
+_genai_lock = threading.Lock()
+_genai = None
+
+def load_genai():
+    """Imports and configures the Gemini SDK on first use (~0.7s), instead of whenever this module is imported."""
+    global _genai
+    with _genai_lock:
+        if _genai is None:
+            import google.generativeai as genai
+            genai.configure(api_key=settings.GOOGLE_API_KEY)
+            _genai = genai
+    return _genai
+
+def api_errors() -> type:
+    # only evaluated when an exception is being matched, after the SDK has been loaded
+    from google.api_core.exceptions import GoogleAPIError
+    return GoogleAPIError
+
+def overloaded_result(error: LLMOverloaded) -> Result:
+    logging.warning(str(error))
+    return Result.fail(
+        f"Gemini is overloaded, try again later ({error.reason})",
+        status_code=503,
+        headers={"Retry-After": str(math.ceil(error.retry_after))}
+    )
 
 class LLMService:
-    def __init__(self) -> None:
-        self.model = genai.GenerativeModel(settings.GEMINI_MODEL)
+    def __init__(self, scheduler: LLMScheduler | None = None, meta_cache: MetaExtractionCache | None = None) -> None:
+        self._model = None
+        # every Gemini call goes through the scheduler; one per worker, shared via the container
+        self.scheduler = scheduler or LLMScheduler()
+        self.meta_cache = meta_cache
+        self.use_async = settings.ASYNC_IO
+        self.max_history = settings.CHAT_HISTORY_WINDOW
+        self.history_token_budget = settings.HISTORY_TOKEN_BUDGET
+
+    @property
+    def model(self) -> genai.GenerativeModel:
+        if self._model is None:
+            self._model = load_genai().GenerativeModel(settings.GEMINI_MODEL)
+        return self._model
 
-    def extract_meta_from_message(self, message: str) -> Result[ChatMeta]:
+    @model.setter
+    def model(self, model) -> None:
+        self._model = model
+
+    async def warmup(self) -> None:
+        """Opens the shared Gemini channel with a free count_tokens call."""
+        if self.use_async:
+            await self.model.count_tokens_async("warmup")
+        else:
+            await asyncio.to_thread(self.model.count_tokens, "warmup")
+
+    async def _send(self, chat: genai.ChatSession, content: str, **kwargs):
+        response = await self.scheduler.run(lambda: self._send_once(chat, content, **kwargs))
+        record_token_usage(response)
+        return response
+
+    async def _send_once(self, chat: genai.ChatSession, content: str, **kwargs):
+        if self.use_async:
+            return await chat.send_message_async(content, **kwargs)
+        # sync path: the blocking gRPC call holds a threadpool slot, as the old def routes did
+        return await asyncio.to_thread(chat.send_message, content, **kwargs)
+
+    @timed("llm.extract_meta")
+    async def extract_meta_from_message(self, message: str) -> Result[ChatMeta]:
         try:
-            prompt = build_meta_extraction_prompt()
-            chat = self.model.start_chat()
-            
-            full_prompt = f"{prompt}\n\nUser: {message}\nResponse:"
-            response = chat.send_message(full_prompt)
-            
-           
-            cleaned_response = self._clean_json_response(response.text)
-            data = ChatMeta.model_validate_json(cleaned_response)
+            data = self.meta_cache.get(message) if self.meta_cache else None
+            if data is None:
+                prompt = build_meta_extraction_prompt()
+                chat = self.model.start_chat()
 
-            if data.topic == "INVALID" or data.stance == "INVALID":
+                full_prompt = f"{prompt}\n\nUser: {message}\nResponse:"
+                response = await self._send(chat, full_prompt)
+
+                cleaned_response = self._clean_json_response(response.text)
+                data = ChatMeta.model_validate_json(cleaned_response)
+                if self.meta_cache:
+                    self.meta_cache.put(message, data)
+
+            if data.topic == INVALID or data.stance == INVALID:
                 error_msg = "Could not extract valid topic and stance from message"
-                logging.error(f"{error_msg}: {cleaned_response}")
+                logging.error(f"{error_msg}: {data.model_dump_json()}")
                 return Result.fail(error_msg)
             
             return Result.ok(data)
-        except google.api_core.exceptions.GoogleAPIError as e:
+        except LLMOverloaded as e:
+            return overloaded_result(e)
+        except api_errors() as e:
             error_msg = f"Gemini API error: {str(e)}"
             logging.error(error_msg, exc_info=True)
             return Result.fail(error_msg)
@@ -45,25 +118,52 @@ class LLMService:
             logging.error(error_msg, exc_info=True)
             return Result.fail(error_msg)
 
-    def generate_debate_response(
+    @timed("llm.open_debate")
+    async def open_debate(self, message: str) -> Result[OpeningTurn]:
+        """Extracts topic/stance and writes the first reply in one call."""
+        try:
+            chat = self.model.start_chat()
+            full_prompt = f"{build_opening_turn_prompt()}\n\nUser: {message}\nResponse:"
+            response = await self._send(
+                chat, full_prompt, generation_config={"response_mime_type": "application/json"}
+            )
+
+            cleaned_response = self._clean_json_response(response.text)
+            data = OpeningTurn.model_validate_json(cleaned_response)
+
+            if data.topic == INVALID or data.stance == INVALID or not data.reply.strip():
+                error_msg = "Could not extract valid topic, stance and reply from message"
+                logging.warning(f"{error_msg}: {cleaned_response}")
+                return Result.fail(error_msg)
+
+            return Result.ok(OpeningTurn(topic=data.topic, stance=data.stance, reply=data.reply.strip()))
+        except LLMOverloaded as e:
+            return overloaded_result(e)
+        except api_errors() as e:
+            error_msg = f"Gemini API error: {str(e)}"
+            logging.error(error_msg, exc_info=True)
+            return Result.fail(error_msg)
+        except Exception as e:
+            error_msg = f"Unexpected error during opening turn: {str(e)}"
+            logging.error(error_msg, exc_info=True)
+            return Result.fail(error_msg)
+
+    @timed("llm.generate")
+    async def generate_debate_response(
         self, 
         user_message: str, 
         chat_history: List[Dict[str, Any]], 
         topic: str, 
-        stance: str
+        stance: str,
+        summary: str | None = None
     ) -> Result[str]:
         try:
-            system_prompt = build_debate_system_prompt(topic, stance)
-            gemini_history = [
-                {"role": "model", "parts": [system_prompt]},
-                *({"role": "user" if m["role"] == "user" else "model", "parts": [m["message"]]}
-                  for m in reversed(chat_history))
-            ]
-
-            chat = self.model.start_chat(history=gemini_history)
-            response = chat.send_message(user_message)
+            chat = self.model.start_chat(history=self._build_history(chat_history, topic, stance, summary))
+            response = await self._send(chat, user_message)
             return Result.ok(response.text.strip())
-        except google.api_core.exceptions.GoogleAPIError as e:
+        except LLMOverloaded as e:
+            return overloaded_result(e)
+        except api_errors() as e:
             error_msg = f"Gemini API error: {str(e)}"
             logging.error(error_msg, exc_info=True)
             return Result.fail(error_msg)
@@ -72,6 +172,85 @@ class LLMService:
             logging.error(error_msg, exc_info=True)
             return Result.fail(error_msg)
 
+    async def stream_debate_response(
+        self,
+        user_message: str,
+        chat_history: List[Dict[str, Any]],
+        topic: str,
+        stance: str,
+        summary: str | None = None
+    ) -> AsyncIterator[str]:
+        """Yields reply text chunks as Gemini emits them; API errors and LLMOverloaded propagate to the caller.
+
+        The scheduler slot is held until the stream ends; only opening the stream is retried.
+        """
+        chat = self.model.start_chat(history=self._build_history(chat_history, topic, stance, summary))
+        with stage("llm.stream"):
+            async with self.scheduler.slot():
+                response = await self.scheduler.call(lambda: self._send_once(chat, user_message, stream=True))
+                if self.use_async:
+                    async for chunk in response:
+                        if chunk.text:
+                            yield chunk.text
+                else:
+                    chunks = iter(response)
+                    while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+                        if chunk.text:
+                            yield chunk.text
+        # usage_metadata is only complete once the stream has been consumed
+        record_token_usage(response)
+
+    @timed("llm.summarize")
+    async def summarize_history(
+        self,
+        topic: str,
+        stance: str,
+        previous_summary: str | None,
+        messages: List[Dict[str, Any]]
+    ) -> Result[str]:
+        """Folds `messages` (oldest first) into the previous rolling summary."""
+        try:
+            transcript = "\n".join(
+                f"{'User' if m['role'] == 'user' else 'DebateBot'}: {m['message']}" for m in messages
+            )
+            # ~0.75 words per token keeps the summary inside its token cap
+            prompt = build_summary_prompt(
+                topic, stance, previous_summary, transcript, max_words=settings.SUMMARY_MAX_TOKENS * 3 // 4
+            )
+            response = await self._send(
+                self.model.start_chat(), prompt,
+                generation_config={"max_output_tokens": settings.SUMMARY_MAX_TOKENS}
+            )
+            summary = response.text.strip()
+            if not summary:
+                return Result.fail("Empty summary")
+            return Result.ok(summary)
+        except LLMOverloaded as e:
+            return overloaded_result(e)
+        except api_errors() as e:
+            error_msg = f"Gemini API error: {str(e)}"
+            logging.error(error_msg, exc_info=True)
+            return Result.fail(error_msg)
+        except Exception as e:
+            error_msg = f"Unexpected error during summarization: {str(e)}"
+            logging.error(error_msg, exc_info=True)
+            return Result.fail(error_msg)
+
+    def _build_history(
+        self, chat_history: List[Dict[str, Any]], topic: str, stance: str, summary: str | None = None
+    ) -> List[Dict[str, Any]]:
+        """System prompt (plus the rolling summary) followed by the newest turns that fit the token budget.
+
+        The prefix only changes when the summary does, so consecutive turns share it.
+        """
+        system_prompt = build_debate_system_prompt(topic, stance, summary)
+        recent = select_recent(chat_history, self.history_token_budget, self.max_history)
+        return [
+            {"role": "model", "parts": [system_prompt]},
+            *({"role": "user" if m["role"] == "user" else "model", "parts": [m["message"]]}
+              for m in reversed(recent))
+        ]
+
     def _clean_json_response(self, text: str) -> str:
         #remove markdown 
         return text.replace('```json', '').replace('```', '').strip() 
\ No newline at end of file
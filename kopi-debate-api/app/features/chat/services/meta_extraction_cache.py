@@ -0,0 +1,150 @@
+import hashlib
+import logging
+import re
+import sqlite3
+import time
+import unicodedata
+from typing import Callable, Dict, Optional
+
+from app.core import metrics
+from app.core.cache import TTLCache
+from app.features.chat.models.chat_meta import ChatMeta
+
+INVALID = "INVALID"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta_extractions (
+    key TEXT PRIMARY KEY,
+    topic TEXT NOT NULL,
+    stance TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+def normalize_message(message: str) -> str:
+    """Case, punctuation and spacing folded away: "The earth is round." and "the earth   is ROUND" match."""
+    text = unicodedata.normalize("NFKC", message).casefold()
+    return " ".join(re.sub(r"[^\w']+", " ", text).split())
+
+
+class MetaExtractionCache:
+    """Gemini's topic/stance for an opening message, keyed on the normalized message and the prompt.
+
+    An in-memory LRU sits in front of a SQLite file that outlives restarts and is shared by every worker
+    on the host. Keys include a hash of the extraction prompt (and model), so editing the prompt
+    orphans old entries instead of serving them. INVALID verdicts are cached too, for a short time.
+    With no `path` only the memory tier is used.
+    """
+
+    def __init__(
+        self,
+        prompt: str,
+        model: str,
+        path: Optional[str] = None,
+        max_entries: int = 10000,
+        ttl_seconds: float = 30 * 24 * 3600,
+        invalid_ttl_seconds: float = 600,
+        clock: Callable[[], float] = time.time
+    ) -> None:
+        self.namespace = hashlib.blake2b(f"{model}\0{prompt}".encode(), digest_size=8).hexdigest()
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.invalid_ttl_seconds = invalid_ttl_seconds
+        self._clock = clock
+        self._memory: TTLCache[str, ChatMeta] = TTLCache(max_entries, ttl_seconds, clock=clock)
+        self._connection: Optional[sqlite3.Connection] = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def key(self, message: str) -> str:
+        normalized = normalize_message(message)
+        return self.namespace + ":" + hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+
+    def get(self, message: str) -> Optional[ChatMeta]:
+        """The cached extraction (possibly topic/stance INVALID), or None on a miss."""
+        key = self.key(message)
+        meta = self._memory.get(key)
+        if meta is not None:
+            self._count("memory_hit")
+            return meta
+        row = self._disk_get(key)
+        if row is not None:
+            topic, stance, expires_at = row
+            meta = ChatMeta(topic=topic, stance=stance)
+            self._memory.set(key, meta, ttl_seconds=expires_at - self._clock())
+            self._count("disk_hit")
+            return meta
+        self._count("miss")
+        return None
+
+    def put(self, message: str, meta: ChatMeta) -> None:
+        invalid = meta.topic == INVALID or meta.stance == INVALID
+        ttl = self.invalid_ttl_seconds if invalid else self.ttl_seconds
+        key = self.key(message)
+        self._memory.set(key, meta, ttl_seconds=ttl)
+        self._disk_put(key, meta, self._clock() + ttl)
+
+    def stats(self) -> Dict[str, float]:
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            # every hit is an extraction call Gemini didn't get
+            "llm_calls_saved": hits
+        }
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _count(self, result: str) -> None:
+        if result == "memory_hit":
+            self.memory_hits += 1
+        elif result == "disk_hit":
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+        if metrics.ENABLED:
+            metrics.META_EXTRACTION_CACHE_LOOKUPS.labels(result).inc()
+
+    def _disk(self) -> Optional[sqlite3.Connection]:
+        # opened on first use, in the worker process rather than before a fork
+        if self._connection is None and self.path:
+            connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False, timeout=1.0)
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.executescript(_SCHEMA)
+            connection.execute("DELETE FROM meta_extractions WHERE expires_at <= ?", (self._clock(),))
+            self._connection = connection
+        return self._connection
+
+    def _disk_get(self, key: str):
+        # a local file lookup takes microseconds, so like SqliteChatRepository it runs inline on the loop
+        try:
+            connection = self._disk()
+            if connection is None:
+                return None
+            return connection.execute(
+                "SELECT topic, stance, expires_at FROM meta_extractions WHERE key = ? AND expires_at > ?",
+                (key, self._clock())
+            ).fetchone()
+        except sqlite3.Error as e:
+            # the cache is an optimisation: a locked or broken file means a miss, not a failed request
+            logging.warning(f"Meta extraction cache read failed: {e!r}")
+            return None
+
+    def _disk_put(self, key: str, meta: ChatMeta, expires_at: float) -> None:
+        try:
+            connection = self._disk()
+            if connection is not None:
+                connection.execute(
+                    "INSERT OR REPLACE INTO meta_extractions (key, topic, stance, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, meta.topic, meta.stance, expires_at)
+                )
+        except sqlite3.Error as e:
+            logging.warning(f"Meta extraction cache write failed: {e!r}")
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import re
+from typing import Dict, Optional
+
+from app.core.errors import Result
+from app.features.chat.models.chat_meta import ChatMeta
+
+INVALID_META_ERROR = "Could not extract valid topic and stance from message"
+
+# longer openers are rarely a single clean pattern; leave them to the LLM
+_MAX_MESSAGE_LENGTH = 300
+
+# greetings and pleasantries only: a message made of nothing else is not a debate. Anything with a content
+# word in it ("Testing is good") may be a short claim and goes to the LLM.
+_SMALL_TALK = re.compile(
+    r"^(?:(?:hi|hello|hey|heya|hiya|yo|howdy|greetings|sup|there|bot|debatebot|thanks|thank you|"
+    r"good (?:morning|afternoon|evening)|how are (?:you|u)(?: doing)?(?: today)?|how'?s it going|"
+    r"what'?s up|nice to meet you|(?:is )?any ?one there|are you there)(?: |$))+$"
+)
+
+_UNSURE = re.compile(
+    r"^(?:i'?m|i am|im) not sure what to (?:debate|argue|talk)|"
+    r"^i don'?t know what to (?:debate|argue|talk about)|"
+    r"^what (?:should|can|could) we (?:debate|argue|talk) about",
+    re.IGNORECASE,
+)
+
+_DEBATE_WITH_SIDES = re.compile(
+    r"^(?:let'?s|lets|let us|can we|we will|we'll|i want to)\s+(?:have\s+a\s+)?debate(?:\s+about|\s+on)?\s+(?P<topic>.+?)[,.;]+\s*"
+    r"(?:and\s+)?(?:i'?ll|i will|i am going to|i'm going to)\s+(?:argue|say|take the position)(?:\s+for|\s+that)?\s+(?P<user>.+?)[,.;]*\s+"
+    r"(?:and\s+)?(?:you'?ll|you will|you should|you)\s+(?:argue|take|defend)(?:\s+for|\s+that)?\s+(?P<bot>.+?)[.!]*$",
+    re.IGNORECASE,
+)
+
+_OPPOSING_SIDE = re.compile(
+    r"^(?:the\s+)?(?:opposing|opposite|other|contrary)(?:\s+(?:view|side|position|stance))?$|^against(?:\s+it)?$",
+    re.IGNORECASE,
+)
+
+_BELIEVE_CONVINCE = re.compile(
+    r"^(?:i\s+(?:believe|think|feel|am convinced|am sure)|in my (?:view|opinion)|my view is)(?:\s+that|\s+like)?[,\s]+(?P<claim>.+?)[,.;!\s-]*"
+    r"(?:(?:now|so|please)\s+)?(?:convince me otherwise|persuade me otherwise|change my mind|prove me wrong)[.!]*$",
+    re.IGNORECASE,
+)
+
+_ARGUE_AGAINST = re.compile(
+    r"^(?:please\s+)?(?:argue|debate)\s+against\s+(?:my\s+(?:view|belief|position|opinion|claim)\s+that\s+|"
+    r"the\s+(?:idea|claim|view)\s+that\s+)?(?P<claim>.+?)[.!]*$",
+    re.IGNORECASE,
+)
+
+_ARGUE_FOR = re.compile(
+    r"^(?:please\s+)?(?:(?:argue|defend)\s+(?:for\s+)?the\s+(?:view|position|idea|claim)\s+that|argue\s+that|argue\s+for|"
+    r"you\s+argue(?:\s+for|\s+that)?)\s+(?P<claim>.+?)[.!]*$",
+    re.IGNORECASE,
+)
+
+_NEGATED = re.compile(r"^(?P<subject>.+?)\s+(?P<verb>am|is|are|was|were|should|will|must|does|do|has|have)\s+not\s+(?P<rest>.+)$", re.IGNORECASE)
+_CONTRACTED = re.compile(r"^(?P<subject>.+?)\s+(?P<verb>isn't|aren't|wasn't|weren't|shouldn't|won't|can't|cannot|doesn't|don't)\s+(?P<rest>.+)$", re.IGNORECASE)
+_AFFIRMED = re.compile(r"^(?P<subject>.+?)\s+(?P<verb>am|is|are|was|were|should|will|must|can)\s+(?P<rest>.+)$", re.IGNORECASE)
+_UNCONTRACT = {
+    "isn't": "is", "aren't": "are", "wasn't": "was", "weren't": "were", "shouldn't": "should",
+    "won't": "will", "can't": "can", "cannot": "can", "doesn't": "does", "don't": "do",
+}
+# claims about "it"/"this" need the surrounding context to negate sensibly, and "you"/"I" name the
+# speakers rather than a topic
+_PRONOUN_SUBJECTS = {"it", "this", "that", "they", "he", "she", "we", "you", "u", "i", "me"}
+# "there is no god", "nothing is true": negating these by inserting "not" turns the claim into nonsense
+_VAGUE_SUBJECTS = {
+    "there", "here", "nothing", "everything", "anything", "something", "nobody", "everybody", "anybody",
+    "somebody", "no one", "noone", "someone", "everyone", "anyone", "all", "no", "none", "some", "most",
+    "many", "few", "every", "each", "any", "not",
+}
+# a subject holding a clause ("people who say the earth") means the copula matched is inside that clause
+_CLAUSE_WORDS = {
+    "who", "whom", "whose", "which", "that", "what", "where", "when", "whether", "if", "because", "than",
+    "say", "says", "said", "think", "thinks", "believe", "believes", "claim", "claims", "argue", "argues",
+    "be", "been", "being", "do", "does", "did", "has", "have", "had", "would", "could", "might", "may",
+}
+
+
+class RuleBasedMetaExtractor:
+    """Resolves common debate openers (and obvious non-debate messages) without an LLM call.
+
+    `extract` returns None for anything ambiguous, which should go to Gemini as before.
+    """
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.invalid = 0
+        self.misses = 0
+
+    def extract(self, message: str) -> Optional[Result[ChatMeta]]:
+        result = self._match(" ".join(message.split()).strip(" \"'"))
+        if result is None:
+            self.misses += 1
+        elif result._is_error:
+            self.invalid += 1
+        else:
+            self.hits += 1
+        return result
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.invalid + self.misses
+        return {
+            "hits": self.hits,
+            "invalid": self.invalid,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.invalid) / total if total else 0.0,
+        }
+
+    def _match(self, text: str) -> Optional[Result[ChatMeta]]:
+        if not re.search(r"[a-zA-Z]", text) or self._is_small_talk(text) or _UNSURE.search(text):
+            return Result.fail(INVALID_META_ERROR)
+        if len(text) > _MAX_MESSAGE_LENGTH:
+            return None
+
+        match = _DEBATE_WITH_SIDES.match(text)
+        if match:
+            bot_side = match.group("bot")
+            if _OPPOSING_SIDE.match(bot_side):
+                stance = self._negate(match.group("user"))
+                if stance is None:
+                    return None
+            else:
+                stance = bot_side
+            return self._meta(_clean(match.group("topic")), stance)
+
+        match = _BELIEVE_CONVINCE.match(text) or _ARGUE_AGAINST.match(text)
+        if match:
+            claim = _clean(match.group("claim"))
+            stance = self._negate(claim)
+            topic = self._topic_of(claim)
+            return self._meta(topic, stance) if topic and stance else None
+
+        match = _ARGUE_FOR.match(text)
+        if match:
+            claim = _clean(match.group("claim"))
+            topic = self._topic_of(claim)
+            # "argue for pizza" has no claim to take a side on; the stance would just repeat the topic
+            if topic is None or topic.lower() == claim.lower():
+                return None
+            return self._meta(topic, claim)
+
+        return None
+
+    def _is_small_talk(self, text: str) -> bool:
+        words = re.findall(r"[a-z']+", text.lower())
+        return bool(words) and _SMALL_TALK.match(" ".join(words)) is not None
+
+    def _negate(self, claim: str) -> Optional[str]:
+        claim = _clean(claim)
+        if not _has_clear_subject(claim):
+            return None
+        for pattern, build in (
+            (_NEGATED, lambda m: f"{m['subject']} {m['verb']} {m['rest']}"),
+            (_CONTRACTED, lambda m: f"{m['subject']} {_UNCONTRACT[m['verb'].lower()]} {m['rest']}"),
+            (_AFFIRMED, lambda m: f"{m['subject']} {'cannot' if m['verb'].lower() == 'can' else m['verb'] + ' not'} {m['rest']}"),
+        ):
+            match = pattern.match(claim)
+            if match:
+                return build(match) if _is_clear_subject(match["subject"]) else None
+        return None
+
+    def _topic_of(self, claim: str) -> Optional[str]:
+        """The claim's subject, or None when the claim has no subject and copula to go by."""
+        if not _has_clear_subject(claim):
+            return None
+        match = _NEGATED.match(claim) or _CONTRACTED.match(claim) or _AFFIRMED.match(claim)
+        if match is None:
+            return claim
+        if not _is_clear_subject(match["subject"]):
+            return None
+        return match["subject"] if len(match["subject"].split()) <= 6 else claim
+
+    def _meta(self, topic: str, stance: str) -> Optional[Result[ChatMeta]]:
+        topic, stance = _capitalize(_clean(topic)), _capitalize(_clean(stance))
+        if not topic or not stance:
+            return None
+        return Result.ok(ChatMeta(topic=topic, stance=stance))
+
+
+def _has_clear_subject(claim: str) -> bool:
+    """False for claims opening on a contracted pronoun ("you're wrong", "there's no god")."""
+    first = claim.split(maxsplit=1)[0].lower().replace("’", "'") if claim.split() else ""
+    if "'" not in first:
+        return True
+    head = first.split("'")[0]
+    return head not in _PRONOUN_SUBJECTS and head not in _VAGUE_SUBJECTS
+
+
+def _is_clear_subject(subject: str) -> bool:
+    words = subject.lower().split()
+    return (
+        subject.lower() not in _PRONOUN_SUBJECTS
+        and subject.lower() not in _VAGUE_SUBJECTS
+        and words[0] not in _VAGUE_SUBJECTS
+        and not any(word in _CLAUSE_WORDS for word in words)
+    )
+
+
+def _clean(text: str) -> str:
+    return text.strip(" \"'.,;:!?")
+
+
+def _capitalize(text: str) -> str:
+    return text[:1].upper() + text[1:]
@@ -0,0 +1,165 @@
+"""Bulk deletes of conversations, and the retention job that ages old ones out.
+
+Conversations go in small batches, each one statement (one transaction in SQLite) that takes the batch's
+messages with it through the cascade, so no single delete holds its locks for long and a batch is never
+left half done. A batch that takes longer than `batch_target_seconds` halves
+the next one; fast batches grow back up to `batch_size`. Purges by age go oldest first, a range scan on
+(created_at, conversation_id), and stop at `max_seconds`, reporting the run incomplete.
+"""
+import asyncio
+import logging
+import random
+import time
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Optional
+
+from app.core import metrics
+from app.core.keyed_lock import KeyedLock
+from app.features.chat.repositories.base import ChatRepositoryProtocol
+
+
+@dataclass
+class PurgeReport:
+    conversations: int = 0
+    messages: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    batch_seconds: List[float] = field(default_factory=list)
+    # False when a purge by age ran out of time with expired conversations left
+    complete: bool = True
+
+
+class ConversationPurger:
+    def __init__(
+        self,
+        repository: ChatRepositoryProtocol,
+        batch_size: int = 100,
+        batch_target_seconds: float = 0.2,
+        pause_seconds: float = 0.05,
+        clock: Callable[[], float] = time.monotonic,
+        turn_locks: Optional[KeyedLock] = None
+    ) -> None:
+        # the repository's delete_chats drops the conversations from the caches (CachedChatRepository)
+        self.repository = repository
+        # ChatService's per-conversation locks: a batch waits for turns in flight on its conversations, so
+        # no turn writes its rows after its conversation is gone
+        self.turn_locks = turn_locks if turn_locks is not None else KeyedLock()
+        self.batch_size = batch_size
+        self.batch_target_seconds = batch_target_seconds
+        self.pause_seconds = pause_seconds
+        self._clock = clock
+        self._next_size = batch_size
+
+    async def delete(self, conversation_ids: List[str]) -> PurgeReport:
+        report = PurgeReport()
+        start = self._clock()
+        pending = list(dict.fromkeys(conversation_ids))
+        while pending:
+            batch, pending = pending[:self._next_size], pending[self._next_size:]
+            await self._delete_batch(batch, report)
+            if pending:
+                await asyncio.sleep(self.pause_seconds)
+        report.seconds = self._clock() - start
+        return report
+
+    async def purge_created_before(self, cutoff: datetime, max_seconds: Optional[float] = None) -> PurgeReport:
+        """Deletes the conversations created before `cutoff`, oldest first, for up to `max_seconds`."""
+        report = PurgeReport()
+        start = self._clock()
+        while True:
+            size = self._next_size
+            oldest = await self.repository.get_chats(limit=size, desc=False)
+            expired = [chat["conversation_id"] for chat in oldest if datetime.fromisoformat(chat["created_at"]) < cutoff]
+            if expired:
+                await self._delete_batch(expired, report)
+            if len(expired) < size:
+                # reached a conversation still within retention, or the end of the table
+                break
+            if max_seconds is not None and self._clock() - start >= max_seconds:
+                report.complete = False
+                break
+            # room for the writers queued behind the batch's locks
+            await asyncio.sleep(self.pause_seconds)
+        report.seconds = self._clock() - start
+        return report
+
+    async def _delete_batch(self, conversation_ids: List[str], report: PurgeReport) -> None:
+        async with AsyncExitStack() as held:
+            # in one order, so two batches sharing conversations can't deadlock
+            for conversation_id in sorted(set(conversation_ids)):
+                await held.enter_async_context(self.turn_locks.hold(conversation_id))
+            # timed once the locks are held: waiting on a turn says nothing about the batch's size
+            start = self._clock()
+            deleted = await self.repository.delete_chats(conversation_ids)
+            elapsed = self._clock() - start
+        report.conversations += deleted["conversations"]
+        report.messages += deleted["messages"]
+        report.batches += 1
+        report.batch_seconds.append(elapsed)
+        if elapsed > self.batch_target_seconds:
+            self._next_size = max(1, len(conversation_ids) // 2)
+        elif elapsed < self.batch_target_seconds / 2:
+            self._next_size = min(self.batch_size, self._next_size * 2)
+        if metrics.ENABLED:
+            metrics.PURGED_ROWS.labels("conversations").inc(deleted["conversations"])
+            metrics.PURGED_ROWS.labels("chat_messages").inc(deleted["messages"])
+            metrics.PURGE_BATCH_SECONDS.observe(elapsed)
+
+
+class RetentionJob:
+    """Purges conversations older than `max_age_days` every `interval_seconds`, in the background.
+
+    Every worker runs one; the first run is delayed by a random part of the interval so workers spread
+    out. Two runs purging the same conversations is harmless, the second simply deletes nothing.
+    """
+
+    def __init__(
+        self,
+        purger: ConversationPurger,
+        max_age_days: float,
+        interval_seconds: float = 3600,
+        run_max_seconds: float = 60,
+        now: Callable[[], datetime] = lambda: datetime.now(timezone.utc)
+    ) -> None:
+        self.purger = purger
+        self.max_age = timedelta(days=max_age_days)
+        self.interval_seconds = interval_seconds
+        self.run_max_seconds = run_max_seconds
+        self._now = now
+        self._task: Optional[asyncio.Task] = None
+        self.last_report: Optional[PurgeReport] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Cancels the job. A batch in flight is one statement: it is either stored or not, never half done."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def run_once(self) -> PurgeReport:
+        report = await self.purger.purge_created_before(self._now() - self.max_age, self.run_max_seconds)
+        self.last_report = report
+        if report.batches:
+            logging.info(
+                f"Retention purged {report.conversations} conversations and {report.messages} messages in "
+                f"{report.batches} batches over {report.seconds:.1f}s (slowest batch "
+                f"{max(report.batch_seconds) * 1000:.0f}ms){'' if report.complete else ', more left for the next run'}"
+            )
+        return report
+
+    async def _loop(self) -> None:
+        await asyncio.sleep(random.uniform(0, self.interval_seconds))
+        while True:
+            try:
+                report = await self.run_once()
+            except Exception as e:
+                logging.error(f"Retention purge failed: {str(e)}", exc_info=True)
+                report = None
+            # an unfinished run carries on after a short pause rather than a full interval
+            await asyncio.sleep(self.interval_seconds if report is None or report.complete else self.purger.pause_seconds)
@@ -0,0 +1,89 @@
+"""Group commit for turns that finish concurrently (batch endpoint).
+
+While one write is in flight, turns that finish queue up and go out together in the next one, so N
+concurrent turns cost two round trips per group (new conversations, then all messages) instead of
+one or two each. Nothing waits on a timer: an idle writer flushes a lone turn straight away. A group
+whose write fails is retried turn by turn, so only the turns that can't be written fail.
+"""
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from app.features.chat.repositories.base import ChatRepositoryProtocol
+
+
+@dataclass
+class _PendingTurn:
+    conversation: Optional[Dict[str, str]]
+    rows: List[Dict[str, Any]]
+    saved: asyncio.Future = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+
+
+class TurnWriter:
+    def __init__(self, repository: ChatRepositoryProtocol) -> None:
+        self.repository = repository
+        self._pending: List[_PendingTurn] = []
+        self._flusher: Optional[asyncio.Task] = None
+        # writes issued, for tests and benchmarks
+        self.flushes = 0
+
+    async def write(self, conversation: Optional[Dict[str, str]], rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Persists a turn's rows (and its conversation, if new); returns the saved rows in order."""
+        turn = _PendingTurn(conversation, rows)
+        self._pending.append(turn)
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush())
+        return await turn.saved
+
+    async def _flush(self) -> None:
+        try:
+            # let turns completing in the same loop iteration join the first group
+            await asyncio.sleep(0)
+            while self._pending:
+                group, self._pending = self._pending, []
+                await self._write_group(group)
+        finally:
+            self._flusher = None
+
+    async def _write_group(self, group: List[_PendingTurn]) -> None:
+        self.flushes += 1
+        conversations_saved = False
+        try:
+            conversations = [turn.conversation for turn in group if turn.conversation is not None]
+            if conversations:
+                await self.repository.save_conversations(conversations)
+            conversations_saved = True
+            saved = await self.repository.save_messages([row for turn in group for row in turn.rows])
+        except Exception as e:
+            if len(group) == 1:
+                _settle(group[0], exception=e)
+                return
+            # one bad turn (say, its conversation was deleted mid-turn) must not fail the others: each
+            # write is all or nothing, so retry every turn on its own and only the culprit fails
+            await asyncio.gather(*(self._write_turn(turn, save_conversation=not conversations_saved) for turn in group))
+            return
+        offset = 0
+        for turn in group:
+            _settle(turn, saved[offset:offset + len(turn.rows)])
+            offset += len(turn.rows)
+
+    async def _write_turn(self, turn: _PendingTurn, save_conversation: bool) -> None:
+        self.flushes += 1
+        try:
+            if save_conversation and turn.conversation is not None:
+                await self.repository.save_conversations([turn.conversation])
+            saved = await self.repository.save_messages(turn.rows)
+        except Exception as e:
+            _settle(turn, exception=e)
+            return
+        _settle(turn, saved)
+
+
+def _settle(turn: _PendingTurn, saved: Optional[List[Dict[str, Any]]] = None, exception: Optional[Exception] = None) -> None:
+    # a caller that went away has cancelled its future
+    if turn.saved.done():
+        return
+    if exception is not None:
+        turn.saved.set_exception(exception)
+    else:
+        turn.saved.set_result(saved)
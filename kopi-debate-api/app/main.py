@@ -1,13 +1,69 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from app.features.chat.controllers.chat_controller import router as chat_router
+from app.core.container import get_container
 from app.core.config import get_settings
+from app.core.invalidation import connect_supabase_broadcast
+from app.core import metrics
 
 settings = get_settings()
 
-app = FastAPI(title=settings.PROJECT_NAME)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    container = get_container()
+    await container.init_resources()
+    if settings.WARMUP_ON_STARTUP:
+        chat_service = await container.chat_service()
+        await chat_service.warmup()
+
+    channel = None
+    if settings.CACHE_INVALIDATION_CHANNEL:
+        channel = await connect_supabase_broadcast(
+            container.invalidation_bus(),
+            await container.supabase_client(),
+            settings.CACHE_INVALIDATION_CHANNEL
+        )
+    retention_job = None
+    if settings.RETENTION_DAYS > 0:
+        retention_job = await container.retention_job()
+        retention_job.start()
+    app.state.ready = True
+    yield
+    # fail the readiness probe first, so the load balancer stops routing here while we drain
+    app.state.ready = False
+    if retention_job is not None:
+        await retention_job.stop()
+    if channel is not None:
+        await channel.unsubscribe()
+    chat_service = await container.chat_service()
+    await chat_service.drain_summaries()
+    if settings.WRITE_BEHIND:
+        write_behind = await container.write_behind()
+        await write_behind.drain(settings.WRITE_BEHIND_DRAIN_TIMEOUT_SECONDS)
+    await container.shutdown_resources()
+
+app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
 
 app.include_router(chat_router, prefix=settings.API_PREFIX)
 
+if metrics.ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    def prometheus_metrics():
+        return metrics.metrics_response()
+
 @app.get("/")
 def root():
-    return {"message": "Welcome to Kopi Debate API"} 
\ No newline at end of file
+    return {"message": "Welcome to Kopi Debate API"}
+
+@app.get("/ready")
+def ready(request: Request):
+    """Readiness probe: 200 once startup (resources, warmup) is done, 503 before that and while shutting down.
+
+    `/` stays a plain liveness check.
+    """
+    if not getattr(request.app.state, "ready", False):
+        return JSONResponse({"status": "starting"}, status_code=503)
+    return {"status": "ready"}
@@ -0,0 +1,56 @@
+"""Eval-style run of opening messages: one at a time vs one POST /chat/messages:batch.
+
+    python -m benchmarks.bench_batch --items 100 --llm-latency 0.3 --db-latency 0.02
+
+Both modes go through the real app (routes, container, caches, repository) against fake Gemini and
+PostgREST backends, and report wall time and DB round trips.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from app.core.config import get_settings
+from benchmarks.fakes import FakeGenerativeModel, FakeSupabaseClient
+from benchmarks.load import _OPENERS, installed_fakes
+
+
+async def run(mode: str, items: int, llm_latency: float, db_latency: float):
+    from app.main import app
+
+    messages = [{"message": _OPENERS[i % len(_OPENERS)]} for i in range(items)]
+    db = FakeSupabaseClient(latency=db_latency)
+    with installed_fakes(db) as container:
+        async with app.router.lifespan_context(app):
+            container.llm_service().model = FakeGenerativeModel(latency=llm_latency)
+            transport = httpx.ASGITransport(app=app)
+            base_url = f"http://bench{get_settings().API_PREFIX}"
+            async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=None) as client:
+                start = time.perf_counter()
+                if mode == "serial":
+                    ok = 0
+                    for message in messages:
+                        ok += (await client.post("/chat/message", json=message)).status_code == 200
+                else:
+                    response = await client.post("/chat/messages:batch", json={"items": messages})
+                    ok = sum(json.loads(line)["ok"] for line in response.text.splitlines())
+                elapsed = time.perf_counter() - start
+    return {"seconds": round(elapsed, 3), "ok": ok, "db_round_trips": sum(db.calls.values())}
+
+
+async def main(args: argparse.Namespace):
+    return {
+        mode: await run(mode, args.items, args.llm_latency, args.db_latency)
+        for mode in ("serial", "batch")
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--db-latency", type=float, default=0.02)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args)), indent=2))
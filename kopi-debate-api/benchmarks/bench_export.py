@@ -0,0 +1,121 @@
+"""Transcript export: one big history page vs the streaming export, throughput and peak memory.
+
+    python -m benchmarks.bench_export --messages 500000 --conversations 1
+
+Writes `--messages` messages over `--conversations` conversations to a temporary SQLite file, then
+exports everything once per mode, each in a fresh process so its peak RSS is its own:
+
+- history: what analytics did before, ChatService.get_history with a limit covering the whole
+  conversation, serialized as one ChatHistoryResponse per conversation
+- export: ChatService.export as NDJSON, in EXPORT_CHUNK_ROWS keyset chunks
+- export_gzip: the same, gzip-compressed
+
+Output goes to a byte counter rather than a file. Reports rows/s, output MB, peak RSS, and how far that
+peak rose above the process's peak before the export started.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from app.features.chat.models.chat_response import ChatHistoryResponse
+from app.features.chat.repositories.sqlite_chat_repository import SqliteChatRepository
+from app.features.chat.services.chat_service import ChatService
+from app.features.chat.services.llm_service import LLMService
+from app.core.ndjson import gzip_chunks, ndjson_chunks
+
+_MODES = ("history", "export", "export_gzip")
+_ARGUMENT = "We should weigh the evidence on both sides before deciding; the data so far points one way. "
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+async def populate(path: str, messages: int, conversations: int) -> None:
+    repository = SqliteChatRepository(path)
+    await repository.save_conversations([
+        {"conversation_id": f"c{i}", "topic": "Exports", "stance": "should stream"} for i in range(conversations)
+    ])
+    per_conversation = -(-messages // conversations)
+    for start in range(0, messages, 10000):
+        await repository.save_messages([
+            {"conversation_id": f"c{i // per_conversation}", "role": "user" if i % 2 == 0 else "bot", "message": _ARGUMENT * 2}
+            for i in range(start, min(start + 10000, messages))
+        ])
+    repository.close()
+
+
+async def export(mode: str, path: str, messages: int, chunk_rows: int):
+    service = ChatService(repository=SqliteChatRepository(path), llm_service=LLMService())
+    baseline = peak_rss_mb()
+    rows = size = 0
+    start = time.perf_counter()
+    if mode == "history":
+        chats = (await service.get_chats(limit=1000000))._value.items
+        for chat in chats:
+            page = (await service.get_history(chat.conversation_id, limit=messages))._value
+            body = ChatHistoryResponse(conversation_id=chat.conversation_id, message=page.items).model_dump_json()
+            rows += len(page.items)
+            size += len(body.encode())
+    else:
+        chunks = (await service.export(chunk_size=chunk_rows))._value
+
+        async def counted():
+            nonlocal rows
+            async for chunk in chunks:
+                rows += len(chunk)
+                yield chunk
+
+        body = ndjson_chunks(counted())
+        if mode == "export_gzip":
+            body = gzip_chunks(body)
+        async for data in body:
+            size += len(data)
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round(rows / elapsed),
+        "output_mb": round(size / 1e6, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        # 0 when the export never went above what imports and setup had already reached
+        "peak_rss_growth_mb": round(peak_rss_mb() - baseline, 1)
+    }
+
+
+def main(args: argparse.Namespace):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        asyncio.run(populate(path, args.messages, args.conversations))
+        results = {}
+        for mode in _MODES:
+            child = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_export", "--mode", mode, "--db", path,
+                 "--messages", str(args.messages), "--chunk-rows", str(args.chunk_rows)],
+                check=True, capture_output=True, text=True
+            )
+            results[mode] = json.loads(child.stdout)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=500000)
+    parser.add_argument("--conversations", type=int, default=1)
+    parser.add_argument("--chunk-rows", type=int, default=1000)
+    # internal: run one mode against an existing file
+    parser.add_argument("--mode", choices=_MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.mode:
+        print(json.dumps(asyncio.run(export(args.mode, args.db, args.messages, args.chunk_rows))))
+    else:
+        print(json.dumps(main(args), indent=2))
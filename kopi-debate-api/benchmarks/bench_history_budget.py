@@ -0,0 +1,64 @@
+"""Prompt size per turn over a long debate: fixed 5-message window vs token budget + rolling summary.
+
+    python -m benchmarks.bench_history_budget --turns 40 --essay-every 4
+"""
+import argparse
+import asyncio
+import json
+
+from app.features.chat.repositories.chat_repository import ChatRepository
+from app.features.chat.services.chat_service import ChatService
+from app.features.chat.services.llm_service import LLMService
+from benchmarks.fakes import FakeGenerativeModel, FakeSupabaseClient
+from benchmarks.report import percentile
+
+_SHORT = "That doesn't follow. Ships vanish hull first over the horizon, which only a curved surface explains."
+_ESSAY = " ".join([_SHORT] * 25)
+
+
+async def prompt_tokens_per_turn(budgeted: bool, turns: int, essay_every: int):
+    llm = LLMService()
+    llm.model = FakeGenerativeModel(latency=0)
+    service = ChatService(repository=ChatRepository(client=FakeSupabaseClient()), llm_service=llm)
+    if not budgeted:
+        # the old behaviour: the five most recent messages verbatim, however long, and nothing older
+        service.rolling_summary = False
+        service.max_history = llm.max_history = 5
+        service.history_token_budget = llm.history_token_budget = 10**9
+
+    result = await service.post_message(None, "The earth is round")
+    assert not result._is_error, result._value.error
+    conversation_id = result._value.conversation_id
+
+    sizes = []
+    for turn in range(1, turns):
+        message = _ESSAY if essay_every and turn % essay_every == 0 else _SHORT
+        calls_before = len(llm.model.prompt_tokens)
+        result = await service.post_message(conversation_id, message)
+        assert not result._is_error, result._value.error
+        # the reply is the first call of the turn; any summary fold comes after it
+        sizes.append(llm.model.prompt_tokens[calls_before])
+        await service.drain_summaries()
+
+    generate_calls = turns - 1
+    return {
+        "prompt_tokens_p50": percentile(sizes, 50),
+        "prompt_tokens_p95": percentile(sizes, 95),
+        "prompt_tokens_max": max(sizes),
+        "summary_calls_per_turn": round((len(llm.model.prompt_tokens) - generate_calls - 1) / generate_calls, 3),
+    }
+
+
+async def main(turns: int, essay_every: int):
+    return {
+        "fixed_window": await prompt_tokens_per_turn(False, turns, essay_every),
+        "token_budget": await prompt_tokens_per_turn(True, turns, essay_every),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=40)
+    parser.add_argument("--essay-every", type=int, default=4, help="every Nth user message is a ~600-token essay")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.turns, args.essay_every)), indent=2))
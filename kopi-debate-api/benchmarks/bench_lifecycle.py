@@ -0,0 +1,98 @@
+"""Per-request construction cost and cold vs warm connection latency.
+
+    python -m benchmarks.bench_lifecycle --requests 500 --handshake-latency 0.02
+
+Construction compares the old Factory-scoped provider chain (new GenerativeModel and repository per
+request) with the Singleton-scoped container. Connections compare a fresh HTTP client per request with
+the shared keep-alive pool, against a local server that delays each new connection by
+--handshake-latency to stand in for TCP+TLS setup.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+from dependency_injector import providers
+
+from app.core.container import Container
+from app.features.chat.repositories.chat_repository import ChatRepository
+from app.features.chat.services.chat_service import ChatService
+from app.features.chat.services.llm_service import LLMService
+from benchmarks.report import summarize
+
+
+def construction(requests: int):
+    factory_chain = providers.Factory(
+        ChatService,
+        repository=providers.Factory(ChatRepository),
+        llm_service=providers.Factory(LLMService)
+    )
+    singleton_chain = Container().chat_service
+    singleton_chain.override(providers.Singleton(
+        ChatService,
+        repository=providers.Singleton(ChatRepository),
+        llm_service=providers.Singleton(LLMService)
+    ))
+
+    results = {}
+    for name, provider in (("factory", factory_chain), ("singleton", singleton_chain)):
+        latencies = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            provider()
+            latencies.append(time.perf_counter() - start)
+        results[name] = summarize(latencies)
+    return results
+
+
+async def _serve(handshake_latency: float):
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        await asyncio.sleep(handshake_latency)
+        try:
+            while await reader.readuntil(b"\r\n\r\n"):
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: keep-alive\r\n\r\nok")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+async def connections(requests: int, handshake_latency: float):
+    server = await _serve(handshake_latency)
+    url = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/"
+
+    cold = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        async with httpx.AsyncClient() as client:
+            await client.get(url)
+        cold.append(time.perf_counter() - start)
+
+    warm = []
+    async with httpx.AsyncClient() as client:
+        await client.get(url)  # warmup opens the pooled connection
+        for _ in range(requests):
+            start = time.perf_counter()
+            await client.get(url)
+            warm.append(time.perf_counter() - start)
+
+    server.close()
+    await server.wait_closed()
+    return {"cold_client_per_request": summarize(cold), "pooled_keepalive": summarize(warm)}
+
+
+def main(requests: int, handshake_latency: float):
+    return {
+        "construction": construction(requests),
+        "connections": asyncio.run(connections(requests, handshake_latency)),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--handshake-latency", type=float, default=0.02, help="seconds added to each new connection")
+    args = parser.parse_args()
+    print(json.dumps(main(args.requests, args.handshake_latency), indent=2))
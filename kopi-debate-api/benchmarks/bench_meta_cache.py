@@ -0,0 +1,72 @@
+"""Gemini meta extraction calls saved by the normalized-key cache on a stream of near-duplicate openers.
+
+    python -m benchmarks.bench_meta_cache --openers 1000 --llm-latency 0.05
+
+Openers are drawn from a small set of popular statements with random changes in case, punctuation and
+spacing. A second run on the same cache file stands in for a restarted (or sibling) worker.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+
+from app.features.chat.prompts.debate_prompts import build_meta_extraction_prompt
+from app.features.chat.services.llm_service import LLMService
+from app.features.chat.services.meta_extraction_cache import MetaExtractionCache
+from benchmarks.fakes import FakeGenerativeModel
+from benchmarks.report import summarize
+
+STATEMENTS = [
+    "The earth is round", "Vaccines are safe", "The moon landing was faked", "Coffee is better than tea",
+    "Remote work is more productive", "Nuclear power is the future", "Social media is harmful",
+    "Cats are better than dogs", "AI will replace programmers", "Pineapple belongs on pizza",
+    "hello", "what's up",
+]
+
+
+def variant(statement: str, rng: random.Random) -> str:
+    words = [w.upper() if rng.random() < 0.1 else w for w in statement.split()]
+    text = (" " * rng.randint(1, 2)).join(words)
+    text = text.lower() if rng.random() < 0.5 else text
+    return text + rng.choice(["", ".", "!", "?", "!!", " ."])
+
+
+async def run(openers, cache, llm_latency: float):
+    llm = LLMService(meta_cache=cache)
+    llm.model = FakeGenerativeModel(latency=llm_latency)
+    latencies = []
+    for message in openers:
+        start = time.perf_counter()
+        await llm.extract_meta_from_message(message)
+        latencies.append(time.perf_counter() - start)
+    return {**summarize(latencies), "llm_calls": sum(llm.model.calls.values())}
+
+
+async def main(args: argparse.Namespace):
+    rng = random.Random(args.seed)
+    openers = [variant(rng.choice(STATEMENTS), rng) for _ in range(args.openers)]
+    prompt = build_meta_extraction_prompt()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "meta.db")
+        cached = MetaExtractionCache(prompt=prompt, model="bench", path=path)
+        results = {
+            "uncached": await run(openers, None, args.llm_latency),
+            "cached": {**await run(openers, cached, args.llm_latency), **cached.stats()},
+        }
+        cached.close()
+        restarted = MetaExtractionCache(prompt=prompt, model="bench", path=path)
+        results["restarted"] = {**await run(openers, restarted, args.llm_latency), **restarted.stats()}
+        restarted.close()
+    return {"distinct_openers": len(set(openers)), **results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--openers", type=int, default=1000)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args)), indent=2))
@@ -0,0 +1,27 @@
+"""Fast-path hit rate and per-call cost of the rule-based meta extractor over the labeled corpus.
+
+    python -m benchmarks.bench_meta_extractor
+"""
+import json
+import time
+
+from app.features.chat.services.meta_extractor import RuleBasedMetaExtractor
+from benchmarks.meta_corpus import META_CORPUS
+
+
+def main(rounds: int = 200):
+    extractor = RuleBasedMetaExtractor()
+    for message, _ in META_CORPUS:
+        extractor.extract(message)
+    stats = extractor.stats()
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for message, _ in META_CORPUS:
+            extractor.extract(message)
+    per_call_us = (time.perf_counter() - start) / (rounds * len(META_CORPUS)) * 1e6
+    return {**stats, "corpus_size": len(META_CORPUS), "us_per_call": round(per_call_us, 2)}
+
+
+if __name__ == "__main__":
+    print(json.dumps(main(), indent=2))
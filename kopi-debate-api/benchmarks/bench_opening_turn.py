@@ -0,0 +1,45 @@
+"""First-turn latency with and without the single-call opening turn.
+
+    python -m benchmarks.bench_opening_turn --turns 200 --llm-latency 0.05
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from app.features.chat.repositories.chat_repository import ChatRepository
+from app.features.chat.services.chat_service import ChatService
+from app.features.chat.services.llm_service import LLMService
+from benchmarks.fakes import FakeGenerativeModel, FakeSupabaseClient
+from benchmarks.report import summarize
+
+
+async def first_turn_latencies(single_call: bool, turns: int, llm_latency: float):
+    llm = LLMService()
+    llm.model = FakeGenerativeModel(latency=llm_latency)
+    service = ChatService(repository=ChatRepository(client=FakeSupabaseClient()), llm_service=llm)
+    service.single_call_opening = single_call
+
+    latencies = []
+    for _ in range(turns):
+        start = time.perf_counter()
+        # a direct statement, so the opener needs the LLM (see bench_meta_extractor for the local fast path)
+        result = await service.post_message(None, "The earth is round")
+        latencies.append(time.perf_counter() - start)
+        assert not result._is_error, result._value.error
+    return {**summarize(latencies), "llm_calls_per_turn": sum(llm.model.calls.values()) / turns}
+
+
+async def main(turns: int, llm_latency: float):
+    return {
+        "two_call": await first_turn_latencies(False, turns, llm_latency),
+        "single_call": await first_turn_latencies(True, turns, llm_latency),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds per fake Gemini call")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.turns, args.llm_latency)), indent=2))
@@ -0,0 +1,94 @@
+"""Per-query latency of each repository backend on a turn-shaped workload.
+
+    python -m benchmarks.bench_repository --turns 200
+
+Each turn reads the conversation with its recent messages and bulk-inserts a user/bot pair, the two
+queries a chat turn makes. SQLite always runs (on a temporary file). The postgres backend runs when
+DATABASE_URL is set and the supabase backend when SUPABASE_URL/SUPABASE_KEY are set, both against the
+schema in supabase_schema.sql; rows written by the benchmark are deleted afterwards.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import uuid
+from contextlib import asynccontextmanager
+
+from app.core.config import get_settings
+from app.core.db import create_async_supabase_client, init_postgres_pool
+from app.features.chat.repositories.chat_repository import ChatRepository
+from app.features.chat.repositories.postgres_chat_repository import PostgresChatRepository
+from app.features.chat.repositories.sqlite_chat_repository import SqliteChatRepository
+from benchmarks.report import summarize
+
+settings = get_settings()
+
+
+@asynccontextmanager
+async def sqlite_backend():
+    with tempfile.TemporaryDirectory() as directory:
+        repository = SqliteChatRepository(os.path.join(directory, "bench.db"))
+        try:
+            yield repository
+        finally:
+            repository.close()
+
+
+@asynccontextmanager
+async def postgres_backend():
+    pools = init_postgres_pool()
+    try:
+        yield PostgresChatRepository(await pools.__anext__())
+    finally:
+        await pools.aclose()
+
+
+@asynccontextmanager
+async def supabase_backend():
+    yield ChatRepository(client=await create_async_supabase_client())
+
+
+async def run(repository, turns: int):
+    conversation_id = f"bench-{uuid.uuid4()}"
+    await repository.save_conversation_meta(conversation_id, "Benchmarks", "are worth running")
+    await repository.ping()
+
+    reads, writes = [], []
+    try:
+        for turn in range(turns):
+            start = time.perf_counter()
+            await repository.get_conversation_with_messages(conversation_id, limit=settings.CHAT_HISTORY_WINDOW)
+            reads.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            await repository.save_messages([
+                {"conversation_id": conversation_id, "role": "user", "message": f"argument {turn}"},
+                {"conversation_id": conversation_id, "role": "bot", "message": f"rebuttal {turn}"},
+            ])
+            writes.append(time.perf_counter() - start)
+    finally:
+        await repository.delete_chat(conversation_id)
+    return {"read_turn_state": summarize(reads), "save_turn": summarize(writes)}
+
+
+async def main(turns: int):
+    backends = {"sqlite": sqlite_backend}
+    if settings.DATABASE_URL:
+        backends["postgres"] = postgres_backend
+    if settings.SUPABASE_URL and settings.SUPABASE_KEY:
+        backends["supabase"] = supabase_backend
+
+    results = {}
+    for name, backend in backends.items():
+        async with backend() as repository:
+            results[name] = await run(repository, turns)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=200)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.turns)), indent=2))
@@ -0,0 +1,112 @@
+"""Purging expired conversations: one cascading delete vs the batched retention purge.
+
+    python -m benchmarks.bench_retention --conversations 20000 --messages-per-conversation 50
+
+Fills a temporary SQLite file with `--conversations` expired conversations of
+`--messages-per-conversation` messages each, plus one live conversation, then purges the expired ones
+once per mode while a writer keeps adding messages to the live conversation every `--write-every` ms:
+
+- single: delete_chats with every expired id, one statement
+- batched: ConversationPurger.purge_created_before, RETENTION_BATCH_SIZE at a time
+
+Reports rows purged, rows/s, per-batch latency and the latency the concurrent writer saw, which is
+how long it waited behind the purge's locks.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from app.core.config import get_settings
+from app.features.chat.repositories.sqlite_chat_repository import SqliteChatRepository
+from app.features.chat.services.retention import ConversationPurger
+from benchmarks.report import summarize
+
+settings = get_settings()
+
+_MODES = ("single", "batched")
+_ARGUMENT = "We should weigh the evidence on both sides before deciding; the data so far points one way."
+
+
+async def populate(repository: SqliteChatRepository, conversations: int, per_conversation: int) -> None:
+    repository.connection.executemany(
+        "INSERT INTO conversations (conversation_id, topic, stance, created_at) VALUES (?, 'Retention', 'matters', ?)",
+        [(f"old{i}", f"2020-01-01T00:00:{i % 60:02d}.{i:06d}+00:00") for i in range(conversations)]
+    )
+    ids = [f"old{i}" for i in range(conversations)]
+    for start in range(0, len(ids), 200):
+        await repository.save_messages([
+            {"conversation_id": conversation_id, "role": "user" if n % 2 == 0 else "bot", "message": _ARGUMENT}
+            for conversation_id in ids[start:start + 200] for n in range(per_conversation)
+        ])
+    await repository.save_conversation_meta("live", "Retention", "is being tested")
+
+
+async def run(mode: str, args: argparse.Namespace):
+    with tempfile.TemporaryDirectory() as directory:
+        repository = SqliteChatRepository(os.path.join(directory, "bench.db"))
+        try:
+            await populate(repository, args.conversations, args.messages_per_conversation)
+            purger = ConversationPurger(
+                repository,
+                batch_size=args.batch_size,
+                batch_target_seconds=settings.RETENTION_BATCH_TARGET_MS / 1000,
+                pause_seconds=settings.RETENTION_BATCH_PAUSE_MS / 1000
+            )
+            writes = []
+            purging = True
+
+            async def writer():
+                while purging:
+                    # a write queued while the purge holds the database waits for it
+                    queued = time.perf_counter()
+                    await asyncio.sleep(args.write_every / 1000)
+                    await repository.save_message("live", "user", _ARGUMENT)
+                    writes.append(time.perf_counter() - queued - args.write_every / 1000)
+
+            writing = asyncio.create_task(writer())
+            await asyncio.sleep(args.write_every / 2000)
+            start = time.perf_counter()
+            if mode == "single":
+                ids = [chat["conversation_id"] for chat in await repository.get_chats(desc=False)][:-1]
+                batch_start = time.perf_counter()
+                deleted = await repository.delete_chats(ids)
+                conversations, messages, batch_seconds = deleted["conversations"], deleted["messages"], [
+                    time.perf_counter() - batch_start
+                ]
+            else:
+                report = await purger.purge_created_before(datetime(2021, 1, 1, tzinfo=timezone.utc))
+                conversations, messages, batch_seconds = report.conversations, report.messages, report.batch_seconds
+            elapsed = time.perf_counter() - start
+            purging = False
+            await writing
+        finally:
+            repository.close()
+    return {
+        "conversations_purged": conversations,
+        "messages_purged": messages,
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round((conversations + messages) / elapsed),
+        "batches": len(batch_seconds),
+        "batch_latency": summarize(batch_seconds),
+        "longest_batch_ms": round(max(batch_seconds) * 1000, 1),
+        "writer_wait": summarize(writes),
+        "longest_writer_wait_ms": round(max(writes, default=0) * 1000, 1)
+    }
+
+
+async def main(args: argparse.Namespace):
+    return {mode: await run(mode, args) for mode in _MODES}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--conversations", type=int, default=20000)
+    parser.add_argument("--messages-per-conversation", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=settings.RETENTION_BATCH_SIZE)
+    parser.add_argument("--write-every", type=float, default=10, help="ms between the live writer's messages")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args)), indent=2))
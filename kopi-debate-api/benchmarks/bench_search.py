@@ -0,0 +1,175 @@
+"""Full-text search latency over a synthetic corpus, indexed vs a LIKE scan.
+
+    python -m benchmarks.bench_search --messages 1000000
+
+Builds `--messages` messages over conversations of `--per-conversation` each, drawing words from a
+Zipf-distributed vocabulary so queries range from very common to rare terms. Each query is timed for
+its first page, a page deep into the results (following cursors) and, for comparison, an unindexed
+`LIKE '%term%'` scan over chat_messages. SQLite always runs (on a temporary file); the postgres backend
+runs when DATABASE_URL is set, against search_chats from supabase_schema.sql, and its rows are deleted
+afterwards.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import tempfile
+import time
+import uuid
+from contextlib import asynccontextmanager
+
+from app.core.config import get_settings
+from app.core.db import init_postgres_pool
+from app.features.chat.repositories.postgres_chat_repository import PostgresChatRepository
+from app.features.chat.repositories.sqlite_chat_repository import SqliteChatRepository
+from benchmarks.report import summarize
+
+settings = get_settings()
+
+_SYLLABLES = ["ka", "lo", "mi", "ren", "tu", "sa", "vo", "ne", "pri", "dal", "gor", "bes", "ti", "um", "qua", "zel"]
+_VOCABULARY = 20000
+# frequency ranks of the queried words: the 5th most common word down to one used a few dozen times
+_QUERY_RANKS = {"common": 5, "frequent": 100, "uncommon": 2000, "rare": 15000}
+
+
+def vocabulary(rng: random.Random):
+    words = set()
+    while len(words) < _VOCABULARY:
+        words.add("".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4))))
+    words = sorted(words)
+    rng.shuffle(words)
+    # Zipf: the word of rank r turns up in proportion to 1 / r
+    return words, list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+
+
+def corpus(messages: int, per_conversation: int, seed: int):
+    """(conversations, message batches, words by frequency rank) for a reproducible synthetic corpus."""
+    rng = random.Random(seed)
+    words, weights = vocabulary(rng)
+    prefix = f"bench-{uuid.uuid4().hex[:8]}"
+    conversations = [
+        {
+            "conversation_id": f"{prefix}-{i}",
+            "topic": " ".join(rng.choices(words, cum_weights=weights, k=3)),
+            "stance": " ".join(rng.choices(words, cum_weights=weights, k=6))
+        }
+        for i in range(-(-messages // per_conversation))
+    ]
+
+    def batches(size: int = 10000):
+        for start in range(0, messages, size):
+            yield [
+                {
+                    "conversation_id": conversations[i // per_conversation]["conversation_id"],
+                    "role": "user" if i % 2 == 0 else "bot",
+                    "message": " ".join(rng.choices(words, cum_weights=weights, k=rng.randint(6, 30)))
+                }
+                for i in range(start, min(start + size, messages))
+            ]
+
+    return conversations, batches, words
+
+
+@asynccontextmanager
+async def sqlite_backend():
+    with tempfile.TemporaryDirectory() as directory:
+        repository = SqliteChatRepository(os.path.join(directory, "bench.db"))
+        try:
+            yield repository, lambda term: repository.connection.execute(
+                "SELECT id FROM chat_messages WHERE message LIKE ? LIMIT 20", (f"%{term}%",)
+            ).fetchall()
+        finally:
+            repository.close()
+
+
+@asynccontextmanager
+async def postgres_backend():
+    pools = init_postgres_pool()
+    pool = await pools.__anext__()
+
+    async def scan(term: str):
+        return await pool.fetch("SELECT id FROM chat_messages WHERE message ILIKE $1 LIMIT 20", f"%{term}%")
+
+    try:
+        yield PostgresChatRepository(pool), scan
+    finally:
+        await pools.aclose()
+
+
+async def timed(call, *args):
+    start = time.perf_counter()
+    result = call(*args)
+    if asyncio.iscoroutine(result):
+        result = await result
+    return result, time.perf_counter() - start
+
+
+async def run(repository, scan, args: argparse.Namespace, temporary: bool):
+    conversations, batches, words = corpus(args.messages, args.per_conversation, args.seed)
+    start = time.perf_counter()
+    for offset in range(0, len(conversations), 10000):
+        await repository.save_conversations(conversations[offset:offset + 10000])
+    for batch in batches():
+        await repository.save_messages(batch)
+    result = {"load_seconds": round(time.perf_counter() - start, 1), "queries": {}}
+
+    try:
+        for label, rank in _QUERY_RANKS.items():
+            term = words[rank - 1]
+            first, deep, scans = [], [], []
+            for _ in range(args.repeats):
+                hits, elapsed = await timed(repository.search, term, args.page_size + 1)
+                first.append(elapsed)
+                # the scan stops at its first 20 rows, so a common word is found quickly; a rare one is a full scan
+                _, elapsed = await timed(scan, term)
+                scans.append(elapsed)
+
+            for _ in range(args.repeats):
+                hits = await repository.search(term, limit=args.page_size + 1)
+                for page in range(2, args.deep_page + 1):
+                    if len(hits) <= args.page_size:
+                        break
+                    last = hits[args.page_size - 1]
+                    after = (repr(float(last["rank"])), last["key"])
+                    hits, elapsed = await timed(repository.search, term, args.page_size + 1, after)
+                    if page == args.deep_page:
+                        deep.append(elapsed)
+
+            result["queries"][f"{label} ({term})"] = {
+                "first_page": summarize(first),
+                # None when the term has fewer matches than that
+                f"page_{args.deep_page}": summarize(deep) if deep else None,
+                "like_scan": summarize(scans)
+            }
+    finally:
+        if not temporary:
+            for conversation in conversations:
+                await repository.delete_chat(conversation["conversation_id"])
+    return result
+
+
+async def main(args: argparse.Namespace):
+    backends = {"sqlite": sqlite_backend}
+    if settings.DATABASE_URL:
+        backends["postgres"] = postgres_backend
+
+    results = {}
+    for name, backend in backends.items():
+        async with backend() as (repository, scan):
+            # the sqlite file is thrown away afterwards, so its rows need no cleanup
+            results[name] = await run(repository, scan, args, temporary=name == "sqlite")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=1000000)
+    parser.add_argument("--per-conversation", type=int, default=100)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--deep-page", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args)), indent=2))
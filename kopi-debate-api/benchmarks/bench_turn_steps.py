@@ -0,0 +1,62 @@
+"""Turn latency with a turn's independent steps run in order vs concurrently (ChatService._turn_steps).
+
+    python -m benchmarks.bench_turn_steps --turns 50 --llm-latency 0.3 --db-latency 0.05
+
+For a new conversation the meta row write overlaps the reply, taking one DB round trip off the critical
+path; follow-up turns have nothing independent to overlap and are shown as the control.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from app.features.chat.repositories.chat_repository import ChatRepository
+from app.features.chat.services.chat_service import ChatService
+from app.features.chat.services.llm_service import LLMService
+from app.features.chat.services.meta_extractor import RuleBasedMetaExtractor
+from benchmarks.fakes import FakeGenerativeModel, FakeSupabaseClient
+from benchmarks.report import summarize
+
+# recognised by the rule-based extractor, so the reply is the only LLM call of the first turn
+OPENER = "I believe vaccines are safe, convince me otherwise"
+
+
+async def turn_latencies(concurrent: bool, turns: int, llm_latency: float, db_latency: float):
+    llm = LLMService()
+    llm.model = FakeGenerativeModel(latency=llm_latency)
+    service = ChatService(
+        repository=ChatRepository(client=FakeSupabaseClient(latency=db_latency)),
+        llm_service=llm,
+        meta_extractor=RuleBasedMetaExtractor()
+    )
+    service.concurrent_turn_steps = concurrent
+    service.rolling_summary = False
+
+    first, follow_up = [], []
+    for _ in range(turns):
+        start = time.perf_counter()
+        result = await service.post_message(None, OPENER)
+        first.append(time.perf_counter() - start)
+        assert not result._is_error, result._value.error
+
+        start = time.perf_counter()
+        result = await service.post_message(result._value.conversation_id, "They were rushed through trials")
+        follow_up.append(time.perf_counter() - start)
+        assert not result._is_error, result._value.error
+    return {"first_turn": summarize(first), "follow_up_turn": summarize(follow_up)}
+
+
+async def main(turns: int, llm_latency: float, db_latency: float):
+    return {
+        "sequential": await turn_latencies(False, turns, llm_latency, db_latency),
+        "concurrent": await turn_latencies(True, turns, llm_latency, db_latency),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="seconds per fake Gemini call")
+    parser.add_argument("--db-latency", type=float, default=0.05, help="seconds per fake PostgREST round trip")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.turns, args.llm_latency, args.db_latency)), indent=2))
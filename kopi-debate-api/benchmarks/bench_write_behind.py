@@ -0,0 +1,67 @@
+"""Message writes inline vs through the write-behind queue (WRITE_BEHIND=true).
+
+    python -m benchmarks.bench_write_behind --conversations 200 --turns 5 --db-latency 0.02
+
+Every conversation saves its turns' rows concurrently, as peak traffic does. Reports the latency a
+request sees for the write and the inserts that reach the (fake PostgREST) database.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from app.features.chat.repositories.chat_repository import ChatRepository
+from app.features.chat.repositories.write_behind_chat_repository import WriteBehindChatRepository
+from benchmarks.fakes import FakeSupabaseClient
+from benchmarks.report import summarize
+
+
+async def run(write_behind: bool, conversations: int, turns: int, db_latency: float):
+    db = FakeSupabaseClient(latency=db_latency)
+    store = ChatRepository(client=db)
+    for i in range(conversations):
+        await store.save_conversation_meta(f"c{i}", "Benchmarks", "are worth running")
+    repository = WriteBehindChatRepository(store) if write_behind else store
+    before = store.round_trips
+
+    latencies = []
+
+    async def converse(conversation_id: str):
+        for turn in range(turns):
+            start = time.perf_counter()
+            await repository.save_messages([
+                {"conversation_id": conversation_id, "role": "user", "message": f"argument {turn}"},
+                {"conversation_id": conversation_id, "role": "bot", "message": f"rebuttal {turn}"},
+            ])
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(converse(f"c{i}") for i in range(conversations)))
+    if write_behind:
+        await repository.drain(timeout=60)
+    elapsed = time.perf_counter() - start
+
+    stored = len(db.tables["chat_messages"])
+    assert stored == conversations * turns * 2, stored
+    return {
+        "save_latency": summarize(latencies),
+        "inserts": store.round_trips - before,
+        "rows_stored": stored,
+        "seconds_until_stored": round(elapsed, 3)
+    }
+
+
+async def main(args: argparse.Namespace):
+    return {
+        mode: await run(mode == "write_behind", args.conversations, args.turns, args.db_latency)
+        for mode in ("inline", "write_behind")
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--db-latency", type=float, default=0.02)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args)), indent=2))
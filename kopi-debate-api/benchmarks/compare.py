@@ -0,0 +1,25 @@
+"""Diffs two saved benchmark results endpoint by endpoint.
+
+    python -m benchmarks.compare benchmarks/results/load_A.json benchmarks/results/load_B.json
+"""
+import json
+import sys
+
+_METRICS = ("p50_ms", "p95_ms", "p99_ms", "req_per_s", "db_calls_per_request", "llm_calls_per_request")
+
+
+def compare(before: dict, after: dict) -> str:
+    lines = [f"{before.get('commit', '?')} -> {after.get('commit', '?')}"]
+    for endpoint in sorted(set(before["endpoints"]) | set(after["endpoints"])):
+        old, new = before["endpoints"].get(endpoint, {}), after["endpoints"].get(endpoint, {})
+        lines.append(endpoint)
+        for metric in _METRICS:
+            if metric in old and metric in new:
+                change = f"{(new[metric] - old[metric]) / old[metric]:+.1%}" if old[metric] else "n/a"
+                lines.append(f"  {metric:<24}{old[metric]:>12}{new[metric]:>12}  {change}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    with open(sys.argv[1]) as f_before, open(sys.argv[2]) as f_after:
+        print(compare(json.load(f_before), json.load(f_after)))
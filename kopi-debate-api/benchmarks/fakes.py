@@ -0,0 +1,253 @@
+"""In-process stand-ins for Gemini and Supabase/PostgREST used by the benchmarks."""
+import asyncio
+import contextvars
+import json
+import random
+import re
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+import google.api_core.exceptions
+
+from app.features.chat.services.history_budget import estimate_tokens
+_SUMMARY = (
+    "The user argued the earth is round, citing ship hulls vanishing over the horizon and photos from orbit. "
+    "DebateBot rebutted with flat horizons at altitude and distrust of agency imagery."
+)
+
+# label of the request being driven; counters below are attributed to it
+current_label: contextvars.ContextVar[str] = contextvars.ContextVar("current_label", default="other")
+
+_REPLY = (
+    "I maintain my position. First, the evidence is overwhelming. Second, the strongest counter-argument "
+    "collapses under scrutiny. Third, every credible source agrees with me, so your point does not hold."
+)
+
+
+class FakeGenerativeModel:
+    """Stands in for genai.GenerativeModel.
+
+    Each call waits `latency` seconds (time to first token) and then emits the reply at `token_rate`
+    tokens/s. `error_rate` of calls raise ResourceExhausted (HTTP 429) instead, as do the next calls
+    after `fail_next()`.
+    """
+
+    def __init__(self, latency: float = 0.2, token_rate: float = 0.0, error_rate: float = 0.0, seed: int = 0) -> None:
+        self.latency = latency
+        self.token_rate = token_rate
+        self.error_rate = error_rate
+        self.calls: Counter = Counter()
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._scripted: List[Exception] = []
+        # estimated prompt size of every non-streaming call, in order
+        self.prompt_tokens: List[int] = []
+        self._random = random.Random(seed)
+
+    def start_chat(self, history: Optional[List[Dict[str, Any]]] = None) -> "FakeChatSession":
+        return FakeChatSession(self, history or [])
+
+    async def count_tokens_async(self, contents: Any):
+        return SimpleNamespace(total_tokens=len(str(contents).split()))
+
+    def respond(self, content: str) -> str:
+        if "'reply'" in content:
+            return json.dumps({"topic": "Earth's Shape", "stance": "The earth is flat", "reply": _REPLY})
+        if "debate topic analyzer" in content:
+            return json.dumps({"topic": "Earth's Shape", "stance": "The earth is flat"})
+        if "running summary" in content:
+            return _SUMMARY
+        return _REPLY
+
+    def fail_next(self, count: int, retry_after: Optional[float] = None) -> None:
+        hint = f" Please retry in {retry_after}s." if retry_after is not None else ""
+        self._scripted.extend(
+            google.api_core.exceptions.ResourceExhausted(f"429 Resource has been exhausted (fake).{hint}")
+            for _ in range(count)
+        )
+
+    async def _begin(self) -> None:
+        self.calls[current_label.get()] += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        if self._scripted:
+            self.errors += 1
+            raise self._scripted.pop(0)
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.errors += 1
+            raise google.api_core.exceptions.ResourceExhausted("429 Resource has been exhausted (fake)")
+
+    def _token_delay(self) -> float:
+        return 1 / self.token_rate if self.token_rate else 0.0
+
+
+class FakeChatSession:
+    def __init__(self, model: FakeGenerativeModel, history: List[Dict[str, Any]]) -> None:
+        self.model = model
+        self.history = history
+
+    async def send_message_async(self, content: str, stream: bool = False, **kwargs):
+        await self.model._begin()
+        text = self.model.respond(content)
+        tokens = re.findall(r"\S+\s*", text)
+        if stream:
+            return self._stream(tokens)
+        await asyncio.sleep(self.model._token_delay() * len(tokens))
+        prompt_tokens = sum(estimate_tokens(part) for turn in self.history for part in turn["parts"])
+        prompt_tokens += estimate_tokens(content)
+        self.model.prompt_tokens.append(prompt_tokens)
+        usage = SimpleNamespace(prompt_token_count=prompt_tokens, candidates_token_count=estimate_tokens(text))
+        return SimpleNamespace(text=text, usage_metadata=usage)
+
+    async def _stream(self, tokens: List[str]):
+        for token in tokens:
+            await asyncio.sleep(self.model._token_delay())
+            yield SimpleNamespace(text=token)
+
+
+class FakeSupabaseClient:
+    """In-memory `conversations` and `chat_messages` tables (see supabase_schema.sql) behind the
+    subset of the PostgREST query builder ChatRepository uses. Every execute() is one round trip.
+    """
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.tables: Dict[str, List[Dict[str, Any]]] = {"conversations": [], "chat_messages": []}
+        self.calls: Counter = Counter()
+
+    def table(self, name: str) -> "FakeQuery":
+        return FakeQuery(self, name)
+
+    async def execute(self, query: "FakeQuery"):
+        self.calls[current_label.get()] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return SimpleNamespace(data=query.run())
+
+
+class FakeQuery:
+    def __init__(self, client: FakeSupabaseClient, table: str) -> None:
+        self.client = client
+        self.table = table
+        self.action = "select"
+        self.columns = "*"
+        self.payload: Any = None
+        self.filters: List[Any] = []
+        self.orders: Dict[Optional[str], List[Any]] = {}
+        self.limits: Dict[Optional[str], int] = {}
+
+    def select(self, columns: str = "*", **kwargs) -> "FakeQuery":
+        if self.action == "select":
+            self.columns = columns
+        return self
+
+    def insert(self, json: Any, **kwargs) -> "FakeQuery":
+        self.action, self.payload = "insert", json
+        return self
+
+    def upsert(self, json: Any, ignore_duplicates: bool = False, **kwargs) -> "FakeQuery":
+        # only the ignore-duplicates form ChatRepository.save_messages_once uses
+        assert ignore_duplicates
+        self.action, self.payload = "upsert", json
+        return self
+
+    def update(self, json: Dict[str, Any], **kwargs) -> "FakeQuery":
+        self.action, self.payload = "update", json
+        return self
+
+    def delete(self, **kwargs) -> "FakeQuery":
+        self.action = "delete"
+        return self
+
+    def eq(self, column: str, value: Any) -> "FakeQuery":
+        self.filters.append(lambda row: str(row.get(column)) == str(value))
+        return self
+
+    def is_(self, column: str, value: Any) -> "FakeQuery":
+        self.filters.append(lambda row: row.get(column) is None if value == "null" else row.get(column) == value)
+        return self
+
+    def order(self, column: str, desc: bool = False, foreign_table: Optional[str] = None, **kwargs) -> "FakeQuery":
+        self.orders.setdefault(foreign_table, []).append((column, desc))
+        return self
+
+    def limit(self, size: int, foreign_table: Optional[str] = None) -> "FakeQuery":
+        self.limits[foreign_table] = size
+        return self
+
+    async def execute(self):
+        return await self.client.execute(self)
+
+    def run(self) -> List[Dict[str, Any]]:
+        rows = self.client.tables[self.table]
+        if self.action == "insert":
+            return self._insert(rows)
+        if self.action == "upsert":
+            stored = {row.get("id") for row in rows}
+            self.payload = [data for data in self.payload if data["id"] not in stored]
+            return self._insert(rows)
+        matched = [row for row in rows if all(f(row) for f in self.filters)]
+        if self.action == "delete":
+            self._delete(matched)
+            return [dict(row) for row in matched]
+        if self.action == "update":
+            for row in matched:
+                row.update(self.payload)
+            return [dict(row) for row in matched]
+        return [self._project(row) for row in self._page(matched, None)]
+
+    def _insert(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        payload = self.payload if isinstance(self.payload, list) else [self.payload]
+        inserted = []
+        for data in payload:
+            row = dict(data)
+            row.setdefault("created_at", datetime.now(timezone.utc).isoformat())
+            if self.table == "chat_messages":
+                row.setdefault("id", str(uuid.uuid4()))
+                row.setdefault("partial", False)
+                if not any(c["conversation_id"] == row["conversation_id"] for c in self.client.tables["conversations"]):
+                    raise ValueError("insert or update on table \"chat_messages\" violates foreign key constraint")
+            elif any(c["conversation_id"] == row["conversation_id"] for c in rows):
+                raise ValueError("duplicate key value violates unique constraint \"conversations_pkey\"")
+            inserted.append(row)
+        rows.extend(inserted)
+        return [dict(row) for row in inserted]
+
+    def _delete(self, matched: List[Dict[str, Any]]) -> None:
+        ids = {id(row) for row in matched}
+        self.client.tables[self.table] = [row for row in self.client.tables[self.table] if id(row) not in ids]
+        if self.table == "conversations":
+            # ON DELETE CASCADE
+            gone = {row["conversation_id"] for row in matched}
+            self.client.tables["chat_messages"] = [
+                row for row in self.client.tables["chat_messages"] if row["conversation_id"] not in gone
+            ]
+
+    def _page(self, rows: List[Dict[str, Any]], table: Optional[str]) -> List[Dict[str, Any]]:
+        for column, desc in reversed(self.orders.get(table, [])):
+            rows = sorted(rows, key=lambda row: row.get(column) or "", reverse=desc)
+        if table in self.limits:
+            rows = rows[:self.limits[table]]
+        return rows
+
+    def _project(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        projected: Dict[str, Any] = {}
+        for column in (c.strip() for c in self.columns.split(",")):
+            embedded = re.fullmatch(r"(\w+)\((.*)\)", column)
+            if embedded:
+                table = embedded.group(1)
+                children = [c for c in self.client.tables[table] if c["conversation_id"] == row["conversation_id"]]
+                projected[table] = [dict(c) for c in self._page(children, table)]
+            elif column == "*":
+                projected.update(row)
+            else:
+                projected[column] = row.get(column)
+        return projected
@@ -0,0 +1,179 @@
+"""Offline load test of the HTTP API against fake Gemini and Supabase backends.
+
+    python -m benchmarks.load --conversations 200 --turns 5 --concurrency 50 --llm-latency 0.3
+
+Each simulated user opens a debate, then alternates POST /chat/message turns with the sidebar and
+history polls (GET /chat/chats, GET /chat/history/{id}). Results are printed and written as JSON
+under benchmarks/results/ so runs can be diffed across commits with `python -m benchmarks.compare`.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import subprocess
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+import httpx
+from dependency_injector import providers
+
+from app.core.config import get_settings
+from app.core.container import get_container
+from benchmarks.fakes import FakeGenerativeModel, FakeSupabaseClient, current_label
+from benchmarks.meta_corpus import META_CORPUS
+from benchmarks.report import summarize
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+_OPENERS = [message for message, expected in META_CORPUS if expected not in (None, "INVALID")]
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def request(self, client: httpx.AsyncClient, label: str, method: str, url: str, **kwargs) -> httpx.Response:
+        # ASGITransport runs the app in this task, so the label follows the request into the fakes
+        token = current_label.set(label)
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        finally:
+            self.latencies[label].append(time.perf_counter() - start)
+            current_label.reset(token)
+        if response.status_code >= 400:
+            self.errors[label] += 1
+        return response
+
+
+async def _simulate_user(client: httpx.AsyncClient, recorder: Recorder, index: int, turns: int, reads_per_turn: int):
+    opener = _OPENERS[index % len(_OPENERS)]
+    response = await recorder.request(client, "POST /chat/message (first)", "POST", "/chat/message", json={"message": opener})
+    if response.status_code != 200:
+        return
+    conversation_id = response.json()["conversation_id"]
+    for turn in range(1, turns):
+        await recorder.request(
+            client, "POST /chat/message", "POST", "/chat/message",
+            json={"conversation_id": conversation_id, "message": f"Counterpoint number {turn}: you are wrong."}
+        )
+        for _ in range(reads_per_turn):
+            await recorder.request(client, "GET /chat/chats", "GET", "/chat/chats")
+            await recorder.request(client, "GET /chat/history", "GET", f"/chat/history/{conversation_id}", params={"limit": 20})
+
+
+@contextlib.contextmanager
+def installed_fakes(db: FakeSupabaseClient):
+    """Points the app container at the fakes for the duration of a run."""
+    container = get_container()
+    settings = get_settings()
+    saved = settings.WARMUP_ON_STARTUP, settings.CACHE_INVALIDATION_CHANNEL
+    settings.WARMUP_ON_STARTUP, settings.CACHE_INVALIDATION_CHANNEL = False, ""
+    container.reset_singletons()
+    # still async resources, like the real ones, so the app's await-based wiring is exercised unchanged
+    container.http_client.override(providers.Resource(_provide, None))
+    container.supabase_client.override(providers.Resource(_provide, db))
+    # no extractions carried over from earlier runs (or shared with a local server) through the disk tier
+    container.meta_extraction_cache.override(providers.Object(None))
+    try:
+        yield container
+    finally:
+        container.http_client.reset_override()
+        container.supabase_client.reset_override()
+        container.meta_extraction_cache.reset_override()
+        container.reset_singletons()
+        settings.WARMUP_ON_STARTUP, settings.CACHE_INVALIDATION_CHANNEL = saved
+
+
+async def _provide(value):
+    return value
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    llm_model = FakeGenerativeModel(
+        latency=args.llm_latency, token_rate=args.token_rate, error_rate=args.llm_error_rate, seed=args.seed
+    )
+    db = FakeSupabaseClient(latency=args.db_latency)
+
+    from app.main import app
+
+    recorder = Recorder()
+    with installed_fakes(db) as container:
+        async with app.router.lifespan_context(app):
+            container.llm_service().model = llm_model
+
+            transport = httpx.ASGITransport(app=app)
+            base_url = f"http://bench{get_settings().API_PREFIX}"
+            async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=None) as client:
+                semaphore = asyncio.Semaphore(args.concurrency)
+
+                async def user(index: int):
+                    async with semaphore:
+                        await _simulate_user(client, recorder, index, args.turns, args.reads_per_turn)
+
+                start = time.perf_counter()
+                await asyncio.gather(*(user(i) for i in range(args.conversations)))
+                elapsed = time.perf_counter() - start
+
+    endpoints = {}
+    for label, latencies in sorted(recorder.latencies.items()):
+        endpoints[label] = {
+            **summarize(latencies),
+            "errors": recorder.errors[label],
+            "req_per_s": round(len(latencies) / elapsed, 2),
+            "db_calls_per_request": round(db.calls[label] / len(latencies), 3),
+            "llm_calls_per_request": round(llm_model.calls[label] / len(latencies), 3),
+        }
+    total = sum(len(latencies) for latencies in recorder.latencies.values())
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": _git_commit(),
+        "config": vars(args),
+        "elapsed_s": round(elapsed, 3),
+        "total_requests": total,
+        "req_per_s": round(total / elapsed, 2),
+        "endpoints": endpoints,
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def save(result: Dict[str, Any], path: str = "") -> str:
+    if not path:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = result["timestamp"].replace(":", "").replace("-", "")[:15]
+        path = os.path.join(RESULTS_DIR, f"load_{stamp}_{result['commit']}.json")
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2)
+    return path
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=100)
+    parser.add_argument("--turns", type=int, default=4, help="messages per conversation, including the opener")
+    parser.add_argument("--reads-per-turn", type=int, default=1, help="chat list + history polls after each turn")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="fake Gemini time to first token (s)")
+    parser.add_argument("--token-rate", type=float, default=0.0, help="fake Gemini tokens/s after the first (0 = instant)")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="fraction of Gemini calls failing with 429")
+    parser.add_argument("--db-latency", type=float, default=0.005, help="fake PostgREST round-trip time (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="", help="result file (default: benchmarks/results/load_<time>_<commit>.json)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    outcome = asyncio.run(run(arguments))
+    print(json.dumps(outcome, indent=2))
+    print(f"saved to {save(outcome, arguments.output)}")
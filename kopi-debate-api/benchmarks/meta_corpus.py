@@ -0,0 +1,68 @@
+"""Labeled opening messages for the rule-based meta extractor.
+
+Each entry is (message, expected) where expected is a (topic, stance) tuple, "INVALID" for messages
+that are not a debate, or None for messages the fast path should leave to the LLM.
+"""
+
+META_CORPUS = [
+    # "Let's debate X, I'll argue for Y, you argue for Z"
+    ("Let's debate remote work, I'll argue it boosts productivity, you argue it hurts productivity",
+     ("Remote work", "It hurts productivity")),
+    ("lets debate pineapple on pizza. I will argue that it is delicious and you argue that it is disgusting",
+     ("Pineapple on pizza", "It is disgusting")),
+    ("Let us debate nuclear power; I'll argue for nuclear power being safe, you argue for nuclear power being dangerous",
+     ("Nuclear power", "Nuclear power being dangerous")),
+    ("Can we debate school uniforms, I'll argue uniforms should be mandatory, you take the opposing view",
+     ("School uniforms", "Uniforms should not be mandatory")),
+    ("Let's debate about social media, I will argue social media is harmful, you take the other side",
+     ("Social media", "Social media is not harmful")),
+    ("Let's debate climate change, I'll argue it's real, you take the opposing view", None),
+    # "I believe X, convince me otherwise"
+    ("I believe vaccines are safe, convince me otherwise", ("Vaccines", "Vaccines are not safe")),
+    ("I think that cats are better than dogs. Change my mind.", ("Cats", "Cats are not better than dogs")),
+    ("I believe the moon landing was real - prove me wrong", ("The moon landing", "The moon landing was not real")),
+    ("In my opinion homework should be banned, convince me otherwise",
+     ("Homework", "Homework should not be banned")),
+    ("I think AI can't be creative, change my mind", ("AI", "AI can be creative")),
+    ("I believe that money isn't everything. Persuade me otherwise", ("Money", "Money is everything")),
+    ("i feel like it is fine, convince me otherwise", None),
+    ("I think you are wrong, prove me wrong", None),
+    ("I believe there is no god, change my mind", None),
+    ("I think there are too many cars, change my mind", None),
+    ("I believe nothing is true, change my mind", None),
+    ("I believe people who say the earth is flat are wrong, prove me wrong", None),
+    # "Argue against my view that X"
+    ("Argue against my view that the earth is round", ("The earth", "The earth is not round")),
+    ("Please argue against my belief that coffee is healthy.", ("Coffee", "Coffee is not healthy")),
+    ("Argue against the idea that college should be free", ("College", "College should not be free")),
+    ("debate against my position that video games are not art", ("Video games", "Video games are art")),
+    # "Argue for X"
+    ("Argue that the earth is flat", ("The earth", "The earth is flat")),
+    ("Defend the position that tabs are better than spaces", ("Tabs", "Tabs are better than spaces")),
+    ("You argue for a four day work week", None),
+    ("Argue that I am right", None),
+    ("Argue for pizza", None),
+    ("argue that you're wrong", None),
+    # greetings and other non-debate openers
+    ("Hello how are you?", "INVALID"),
+    ("hi", "INVALID"),
+    ("Hey there!", "INVALID"),
+    ("good morning", "INVALID"),
+    ("thanks", "INVALID"),
+    ("Hi, how's it going?", "INVALID"),
+    ("Thank you bot", "INVALID"),
+    ("???", "INVALID"),
+    ("I'm not sure what to debate", "INVALID"),
+    ("I don't know what to debate", "INVALID"),
+    ("What should we debate about?", "INVALID"),
+    # direct statements and free-form openers go to the LLM
+    ("The earth is round", None),
+    # short claims made of everyday words are not small talk
+    ("Testing is good", None),
+    ("You are good", None),
+    ("It is good to you", None),
+    ("we will have a debate i will argue the earth is round you will argue the earth is flat", None),
+    ("Why did the flag wave on the moon?", None),
+    ("Is a hot dog a sandwich?", None),
+    ("Capitalism is the best economic system ever devised and I can prove it with three points", None),
+]
@@ -3,6 +3,8 @@ CREATE TABLE IF NOT EXISTS conversations (
     conversation_id text PRIMARY KEY,
     topic text NOT NULL,
     stance text NOT NULL,
+    summary text,
+    summary_upto timestamp with time zone,
     created_at timestamp with time zone DEFAULT now()
 );
 
@@ -11,11 +13,82 @@ CREATE TABLE IF NOT EXISTS chat_messages (
     conversation_id text NOT NULL,
     role text NOT NULL CHECK (role IN ('user', 'bot')),
     message text NOT NULL,
+    partial boolean NOT NULL DEFAULT false,
     created_at timestamp with time zone DEFAULT now()
 );
 
---ik it's overkill just for showing ik what indexs are 
-CREATE INDEX IF NOT EXISTS idx_conversation_id ON chat_messages(conversation_id);
+-- bot replies cut short by a client disconnect on the streaming endpoint
+ALTER TABLE chat_messages ADD COLUMN IF NOT EXISTS partial boolean NOT NULL DEFAULT false;
+
+-- rolling summary of the messages older than the verbatim history window, and the created_at of the
+-- newest message folded into it (also the compare-and-set token for concurrent folds)
+ALTER TABLE conversations ADD COLUMN IF NOT EXISTS summary text;
+ALTER TABLE conversations ADD COLUMN IF NOT EXISTS summary_upto timestamp with time zone;
+
+-- keyset pagination: each history / chat list page is a range scan on (created_at, id) from the cursor.
+-- The first index also serves every conversation_id lookup, so it replaces idx_conversation_id,
+-- dropped here from databases created before it
+CREATE INDEX IF NOT EXISTS idx_chat_messages_conversation_created ON chat_messages(conversation_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_conversations_created ON conversations(created_at, conversation_id);
+DROP INDEX IF EXISTS idx_conversation_id;
+
+-- full-text search (GET /chat/search). Generated columns keep the vectors current on every insert,
+-- and the GIN indexes make a match a lookup rather than a scan of every message
+ALTER TABLE conversations ADD COLUMN IF NOT EXISTS search tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', topic), 'A') || setweight(to_tsvector('english', stance), 'B')
+) STORED;
+ALTER TABLE chat_messages ADD COLUMN IF NOT EXISTS search tsvector GENERATED ALWAYS AS (
+    to_tsvector('english', message)
+) STORED;
+CREATE INDEX IF NOT EXISTS idx_conversations_search ON conversations USING GIN (search);
+CREATE INDEX IF NOT EXISTS idx_chat_messages_search ON chat_messages USING GIN (search);
+
+-- one ranked page of conversation and message hits, keyset on (rank, key) after the previous page's last
+-- row. A word found in a third of all messages would mean ranking all of them, so only the newest
+-- max_candidates matches of each table are ranked. ts_headline re-parses the text, so it only runs on the page
+CREATE OR REPLACE FUNCTION search_chats(
+    q text, page_size int, after_rank real DEFAULT NULL, after_key text DEFAULT NULL, max_candidates int DEFAULT 10000
+)
+RETURNS TABLE (
+    conversation_id text, topic text, message_id uuid, role text, snippet text,
+    rank real, created_at timestamp with time zone, key text
+)
+LANGUAGE sql STABLE AS $$
+    WITH query AS (SELECT websearch_to_tsquery('english', q) AS tsq),
+    conversation_hits AS (
+        SELECT c.conversation_id, NULL::uuid AS message_id, NULL::text AS role, c.topic || ' ' || c.stance AS body,
+            ts_rank(c.search, query.tsq) AS rank, c.created_at, c.conversation_id AS key
+        FROM conversations c, query WHERE c.search @@ query.tsq
+        ORDER BY c.created_at DESC LIMIT max_candidates
+    ),
+    message_hits AS (
+        SELECT m.conversation_id, m.id, m.role, m.message, ts_rank(m.search, query.tsq), m.created_at, m.id::text
+        FROM chat_messages m, query WHERE m.search @@ query.tsq
+        ORDER BY m.created_at DESC LIMIT max_candidates
+    ),
+    page AS (
+        SELECT * FROM (SELECT * FROM conversation_hits UNION ALL SELECT * FROM message_hits) AS hits
+        WHERE after_rank IS NULL OR (hits.rank, hits.key) < (after_rank, after_key)
+        ORDER BY hits.rank DESC, hits.key DESC
+        LIMIT page_size
+    )
+    SELECT page.conversation_id, c.topic, page.message_id, page.role,
+        ts_headline('english', page.body, query.tsq, 'StartSel=**, StopSel=**, MaxWords=24, MinWords=8, MaxFragments=1'),
+        page.rank, page.created_at, page.key
+    FROM page JOIN conversations c USING (conversation_id), query
+    ORDER BY page.rank DESC, page.key DESC
+$$;
+
+-- bulk delete (POST /chat/chats:delete and the retention purge) in one statement: the cascade takes the
+-- messages with their conversations, and the count reads the snapshot from before it did
+CREATE OR REPLACE FUNCTION delete_chats(ids text[])
+RETURNS TABLE (conversations bigint, messages bigint)
+LANGUAGE sql AS $$
+    WITH gone AS (DELETE FROM conversations WHERE conversation_id = ANY(ids) RETURNING conversation_id)
+    SELECT (SELECT count(*) FROM gone),
+        (SELECT count(*) FROM chat_messages WHERE conversation_id IN (SELECT conversation_id FROM gone))
+$$;
+
 ALTER TABLE chat_messages 
     ADD CONSTRAINT fk_conversation 
     FOREIGN KEY (conversation_id) 
@@ -1,40 +1,37 @@
 import pytest
-from unittest.mock import Mock, patch
-from app.core.container import Container
+from unittest.mock import AsyncMock, Mock, patch
+from app.core.errors import Result
 from app.features.chat.models.chat_meta import ChatMeta
 from app.features.chat.services.chat_service import ChatService
 
 
-def get_container_override():
-    container = Container()
-    container.chat_repository.override(Mock())
-    container.llm_service.override(Mock())
-    container.chat_service.override(Mock())
-    return container
-
 @pytest.fixture(autouse=True)
 def override_container():
-    with patch('app.core.container.Container', return_value=get_container_override()):
+    # every test that reaches the app's container gets a fresh one, with no singletons or overrides from another test
+    with patch('app.core.container._container', None):
         yield
 
 @pytest.fixture
 def fake_repo():
-    repo = Mock()
+    repo = AsyncMock()
     repo.get_conversation_meta.return_value = None
     repo.save_conversation_meta.return_value = None
     repo.save_message.return_value = None
     repo.get_messages.return_value = []
+    repo.get_conversation_with_messages.return_value = None
+    repo.save_messages.side_effect = lambda rows: rows
     repo.get_chats.return_value = []
     repo.delete_chat.return_value = None
     return repo
 
 @pytest.fixture
 def fake_llm():
-    llm = Mock()
+    llm = AsyncMock()
     llm.extract_meta_from_message.return_value = \
         Mock(_is_error=False, _value=ChatMeta(topic="Moon landing", stance="was faked"))
     llm.generate_debate_response.return_value = \
         Mock(_is_error=False, _value="Sure, the flag shouldn't wave!")
+    llm.open_debate.return_value = Result.fail("Could not extract valid topic, stance and reply from message")
     return llm
 
 @pytest.fixture
@@ -1,3 +1,5 @@
+import gzip
+import json
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
@@ -7,6 +9,8 @@ from app.features.chat.models.chat_message import ChatMessage
 from app.features.chat.models.chat_response import ChatMessageResponse
 from app.features.chat.services.chat_service import ChatService
 from app.core.errors import Result
+from app.core.pagination import Page
+from app.features.chat.models.chat_response import BulkDeleteResponse, ChatSummary, SearchHit
 
 @pytest.fixture
 def mock_chat_service():
@@ -34,3 +38,114 @@ def test_post_message_endpoint(test_client):
     response = test_client.post("/api/v1/chat/message", json=request_payload)
     assert response.status_code == 200
     assert response.json() == expected_response_data
+
+def test_post_message_stream_endpoint(test_client, mock_chat_service):
+    async def events():
+        yield {"event": "meta", "data": {"conversation_id": "123", "topic": "T", "stance": "S"}}
+        yield {"event": "token", "data": {"text": "Hello"}}
+        yield {"event": "done", "data": {"conversation_id": "123"}}
+    mock_chat_service.stream_message.return_value = Result.ok(events())
+
+    response = test_client.post("/api/v1/chat/message/stream", json={"message": "hi"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text.startswith('event: meta\ndata: {"conversation_id": "123"')
+    assert 'event: token\ndata: {"text": "Hello"}\n\n' in response.text
+
+def test_overloaded_llm_maps_to_503_with_retry_after(test_client, mock_chat_service):
+    mock_chat_service.post_message.return_value = Result.fail(
+        "Gemini is overloaded, try again later (queue_full)", status_code=503, headers={"Retry-After": "3"}
+    )
+    response = test_client.post("/api/v1/chat/message", json={"conversation_id": None, "message": "hi"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "3"
+
+def test_post_message_passes_idempotency_key(test_client, mock_chat_service):
+    test_client.post(
+        "/api/v1/chat/message", json={"conversation_id": None, "message": "hi"}, headers={"Idempotency-Key": "abc"}
+    )
+    assert mock_chat_service.post_message.call_args.kwargs["idempotency_key"] == "abc"
+
+def test_get_chats_returns_cursors_in_headers(test_client, mock_chat_service):
+    mock_chat_service.get_chats.return_value = Result.ok(Page(
+        [ChatSummary(conversation_id="c1", topic="T", created_at="2024-01-01T00:00:00+00:00")],
+        next_cursor="older", prev_cursor=None
+    ))
+    response = test_client.get("/api/v1/chat/chats", params={"limit": 1, "cursor": "abc"})
+    assert response.status_code == 200
+    assert response.json()[0]["conversation_id"] == "c1"
+    assert response.headers["X-Next-Cursor"] == "older"
+    assert "X-Prev-Cursor" not in response.headers
+    mock_chat_service.get_chats.assert_called_once_with(limit=1, cursor="abc")
+
+def test_search_returns_hits_and_next_cursor(test_client, mock_chat_service):
+    mock_chat_service.search.return_value = Result.ok(Page(
+        [SearchHit(conversation_id="c1", topic="T", snippet="the **moon**", created_at="2024-01-01T00:00:00+00:00", rank=0.5)],
+        next_cursor="more"
+    ))
+    response = test_client.get("/api/v1/chat/search", params={"q": "moon", "limit": 1})
+    assert response.status_code == 200
+    assert response.json()[0]["snippet"] == "the **moon**" and response.json()[0]["message_id"] is None
+    assert response.headers["X-Next-Cursor"] == "more"
+    mock_chat_service.search.assert_called_once_with("moon", limit=1, cursor=None)
+    assert test_client.get("/api/v1/chat/search").status_code == 422
+
+def test_get_history_latest_page(test_client, mock_chat_service):
+    mock_chat_service.get_history.return_value = Result.ok(Page([], prev_cursor="earlier"))
+    response = test_client.get("/api/v1/chat/history/c1", params={"limit": 10, "latest": "true"})
+    assert response.json() == {"conversation_id": "c1", "message": []}
+    assert response.headers["X-Prev-Cursor"] == "earlier"
+    mock_chat_service.get_history.assert_called_once_with("c1", limit=10, cursor=None, latest=True)
+
+def test_repeated_history_request_is_not_modified(test_client, mock_chat_service):
+    mock_chat_service.get_history.return_value = Result.ok(Page([], prev_cursor="earlier"))
+    first = test_client.get("/api/v1/chat/history/c1")
+    etag = first.headers["ETag"]
+
+    second = test_client.get("/api/v1/chat/history/c1", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.headers["ETag"] == etag
+    assert second.headers["X-Prev-Cursor"] == "earlier"
+    # served from the response cache: the service isn't asked again
+    mock_chat_service.get_history.assert_called_once()
+
+def test_export_streams_ndjson_optionally_gzipped(test_client, mock_chat_service):
+    async def chunks():
+        yield [{"conversation_id": "c1", "message": "a"}, {"conversation_id": "c1", "message": "b"}]
+        yield []
+        yield [{"conversation_id": "c1", "message": "c"}]
+    mock_chat_service.export.side_effect = lambda *args, **kwargs: Result.ok(chunks())
+
+    response = test_client.get("/api/v1/chat/export", params={"conversation_id": "c1"})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line)["message"] for line in response.text.splitlines()] == ["a", "b", "c"]
+
+    response = test_client.get("/api/v1/chat/export", params={"since": "2024-01-01T00:00:00", "gzip": "true"})
+    assert response.headers["content-type"] == "application/gzip"
+    assert len(gzip.decompress(response.content).splitlines()) == 3
+    assert mock_chat_service.export.call_args.kwargs["since"].year == 2024
+
+def test_bulk_delete_endpoint(test_client, mock_chat_service):
+    mock_chat_service.delete_chats.return_value = Result.ok(
+        BulkDeleteResponse(conversations=2, messages=5, batches=1)
+    )
+
+    response = test_client.post("/api/v1/chat/chats:delete", json={"conversation_ids": ["a", "b"]})
+
+    assert response.status_code == 200
+    assert response.json() == {"conversations": 2, "messages": 5, "batches": 1, "complete": True}
+    mock_chat_service.delete_chats.assert_called_once_with(["a", "b"], created_before=None)
+
+def test_batch_endpoint_streams_ndjson(test_client, mock_chat_service):
+    async def results():
+        yield {"index": 1, "ok": True, "conversation_id": "b", "message": [{"role": "bot", "message": "B"}]}
+        yield {"index": 0, "ok": False, "conversation_id": None, "error": "no topic", "status_code": 400}
+    mock_chat_service.post_messages_batch.return_value = Result.ok(results())
+
+    response = test_client.post("/api/v1/chat/messages:batch", json={"items": [{"message": "a"}, {"message": "b"}]})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["index"] for line in lines] == [1, 0]
+    assert [item.message for item in mock_chat_service.post_messages_batch.call_args.args[0]] == ["a", "b"]
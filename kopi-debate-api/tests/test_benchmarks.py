@@ -0,0 +1,20 @@
+import pytest
+from benchmarks import load
+
+
+@pytest.mark.asyncio
+async def test_load_smoke():
+    args = load.parse_args([
+        "--conversations", "4", "--turns", "3", "--concurrency", "2",
+        "--llm-latency", "0", "--db-latency", "0"
+    ])
+
+    result = await load.run(args)
+
+    endpoints = result["endpoints"]
+    assert result["total_requests"] == 4 + 4 * 2 * 3
+    assert all(stats["errors"] == 0 for stats in endpoints.values())
+    # storage round trips per turn (see ChatService._start_turn/_commit_turn)
+    assert endpoints["POST /chat/message (first)"]["db_calls_per_request"] <= 2
+    assert endpoints["POST /chat/message"]["db_calls_per_request"] <= 2
+    assert endpoints["POST /chat/message"]["llm_calls_per_request"] == 1
@@ -0,0 +1,85 @@
+import pytest
+from unittest.mock import AsyncMock, Mock
+from app.features.chat.repositories.chat_repository import ChatRepository
+
+
+class FakeQuery:
+    """Chainable stand-in for a PostgREST request builder."""
+    def __init__(self, data):
+        self.data = data
+        self.calls = []
+
+    def __getattr__(self, name):
+        def method(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return method
+
+    async def execute(self):
+        return Mock(data=self.data)
+
+
+def make_repo(data):
+    query = FakeQuery(data)
+    repo = ChatRepository()
+    repo.use_async = True
+    repo._client = AsyncMock(return_value=query)
+    return repo, query
+
+@pytest.mark.asyncio
+async def test_get_conversation_with_messages_is_one_round_trip():
+    messages = [{"role": "bot", "message": "b"}, {"role": "user", "message": "u"}]
+    repo, query = make_repo([{"topic": "T", "stance": "S", "chat_messages": messages}])
+
+    state = await repo.get_conversation_with_messages("c123", limit=5)
+
+    assert state == {"topic": "T", "stance": "S", "summary": None, "summary_upto": None, "messages": messages}
+    assert repo.round_trips == 1
+    assert ("limit", (5,), {"foreign_table": "chat_messages"}) in query.calls
+
+@pytest.mark.asyncio
+async def test_get_conversation_with_messages_missing():
+    repo, _ = make_repo([])
+    assert await repo.get_conversation_with_messages("nope") is None
+
+@pytest.mark.asyncio
+async def test_save_messages_is_one_round_trip():
+    rows = [{"role": "user", "message": "u"}, {"role": "bot", "message": "b"}]
+    repo, query = make_repo(rows)
+
+    saved = await repo.save_messages(rows)
+
+    assert saved == rows
+    assert repo.round_trips == 1
+    assert query.calls[-1] == ("insert", (rows,), {})
+
+@pytest.mark.asyncio
+async def test_update_conversation_summary_is_compare_and_set():
+    repo, query = make_repo([{"conversation_id": "c1"}])
+    assert await repo.update_conversation_summary("c1", "S", "2024-01-01T10:00:00+00:00", None)
+    assert ("is_", ("summary_upto", "null"), {}) in query.calls
+
+    repo, query = make_repo([])
+    assert not await repo.update_conversation_summary("c1", "S", "2024-01-01T10:05:00+00:00", "2024-01-01T10:00:00+00:00")
+    assert ("eq", ("summary_upto", "2024-01-01T10:00:00+00:00"), {}) in query.calls
+
+@pytest.mark.asyncio
+async def test_get_messages_after_position_filters_ties_on_id():
+    repo, query = make_repo([])
+    await repo.get_messages("c1", limit=3, desc=True, after=("2024-01-01T00:00:00+00:00", "m9"))
+
+    assert ("lte", ("created_at", "2024-01-01T00:00:00+00:00"), {}) in query.calls
+    assert ("or_", (
+        'created_at.lt."2024-01-01T00:00:00+00:00",and(created_at.eq."2024-01-01T00:00:00+00:00",id.lt."m9")',
+    ), {}) in query.calls
+    assert [c for c in query.calls if c[0] == "order"] == [
+        ("order", ("created_at",), {"desc": True}), ("order", ("id",), {"desc": True})
+    ]
+
+@pytest.mark.asyncio
+async def test_delete_chats_is_one_statement():
+    repo, query = make_repo([{"conversations": 2, "messages": 7}])
+
+    assert await repo.delete_chats(["a", "b"]) == {"conversations": 2, "messages": 7}
+    assert repo.round_trips == 1
+    assert query.calls == [("rpc", ("delete_chats", {"ids": ["a", "b"]}), {})]
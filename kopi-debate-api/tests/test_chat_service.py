@@ -1,11 +1,21 @@
+from app.core.config import get_settings
 from app.core.errors import Result
+from app.core.pagination import encode_cursor
+from app.features.chat.models.chat_request import ChatMessageRequest
 from app.features.chat.models.chat_message import ChatMessage
+from app.features.chat.models.chat_meta import OpeningTurn
+from app.features.chat.services.chat_service import ChatService
 from app.features.chat.services.llm_service import LLMService
-from unittest.mock import Mock
+from app.features.chat.services.meta_extractor import RuleBasedMetaExtractor
+from unittest.mock import AsyncMock, Mock, patch
+import pytest
 import uuid
+import asyncio
 
-def test_post_message_happy(chat_service, fake_repo, fake_llm):
-    fake_repo.get_conversation_meta.return_value = None
+settings = get_settings()
+
+@pytest.mark.asyncio
+async def test_post_message_happy(chat_service, fake_repo, fake_llm):
     fake_llm.extract_meta_from_message.return_value = Mock(
         _is_error=False,
         _value=Mock(topic="Moon landing", stance="was faked")
@@ -14,36 +24,177 @@ def test_post_message_happy(chat_service, fake_repo, fake_llm):
         _is_error=False,
         _value="The flag waved because of mechanical movement"
     )
-    fake_repo.get_messages.return_value = [
-        {"role": "user", "message": "Why did the flag wave?"},
-        {"role": "bot", "message": "The flag waved because of mechanical movement"}
-    ]
 
-    res = chat_service.post_message(None, "Why did the flag wave?")
+    res = await chat_service.post_message(None, "Why did the flag wave?")
     assert res.ok
     assert not res._is_error
     assert res._value.conversation_id is not None
     assert len(res._value.message) == 2
-    assert fake_repo.save_message.call_count == 2
+    assert res._value.message[0].role == "bot"
+    fake_repo.save_messages.assert_awaited_once()
+    fake_repo.save_message.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_post_message_new_conversation_round_trips(chat_service, fake_repo):
+    await chat_service.post_message(None, "The earth is round")
+    # save_conversation_meta + one bulk insert of the user and bot rows
+    assert [call[0] for call in fake_repo.method_calls] == ["save_conversation_meta", "save_messages"]
+
+@pytest.mark.asyncio
+async def test_post_message_existing_conversation_round_trips(chat_service, fake_repo, fake_llm):
+    history = [
+        {"role": "bot", "message": "I maintain it was faked"},
+        {"role": "user", "message": "It was real"},
+    ]
+    fake_repo.get_conversation_with_messages.return_value = {
+        "topic": "Moon landing", "stance": "was faked", "messages": history
+    }
+
+    res = await chat_service.post_message("c123", "Why did the flag wave?")
+
+    # one joined meta+history read and one bulk insert; no re-read of the rows just written
+    assert [call[0] for call in fake_repo.method_calls] == ["get_conversation_with_messages", "save_messages"]
+    fake_llm.extract_meta_from_message.assert_not_called()
+    assert fake_llm.generate_debate_response.call_args.kwargs["chat_history"] == history
+    saved_rows = fake_repo.save_messages.call_args.args[0]
+    assert [row["role"] for row in saved_rows] == ["user", "bot"]
+    assert saved_rows[0]["created_at"] <= saved_rows[1]["created_at"]
+    assert [m.message for m in res._value.message] == [
+        "Sure, the flag shouldn't wave!", "Why did the flag wave?", "I maintain it was faked", "It was real"
+    ]
 
-def test_extract_meta_error(chat_service, fake_repo, fake_llm):
+@pytest.mark.asyncio
+async def test_extract_meta_error(chat_service, fake_repo, fake_llm):
     fake_repo.get_conversation_meta.return_value = None
     fake_llm.extract_meta_from_message.return_value = Result.fail("Failed to extract metadata")
     
-    res = chat_service.post_message(None, "hi")
+    res = await chat_service.post_message(None, "hi")
     assert res._is_error
     assert "Failed to extract conversation metadata" in res._value.error
 
-def test_get_history_ok(chat_service, fake_repo):
+@pytest.mark.asyncio
+async def test_post_message_opening_turn_single_call(chat_service, fake_repo, fake_llm):
+    fake_llm.open_debate.return_value = Result.ok(
+        OpeningTurn(topic="Earth's Shape", stance="The earth is flat", reply="The horizon looks flat.")
+    )
+
+    res = await chat_service.post_message(None, "The earth is round")
+
+    fake_llm.extract_meta_from_message.assert_not_called()
+    fake_llm.generate_debate_response.assert_not_called()
+    fake_repo.save_conversation_meta.assert_awaited_once()
+    assert res._value.message[0].message == "The horizon looks flat."
+
+@pytest.mark.asyncio
+async def test_post_message_opening_turn_falls_back_to_two_calls(chat_service, fake_llm):
+    res = await chat_service.post_message(None, "The earth is round")
+
+    fake_llm.open_debate.assert_awaited_once()
+    fake_llm.extract_meta_from_message.assert_awaited_once()
+    fake_llm.generate_debate_response.assert_awaited_once()
+    assert res._value.message[0].message == "Sure, the flag shouldn't wave!"
+
+@pytest.mark.asyncio
+async def test_post_message_fast_path_skips_meta_llm_call(fake_repo, fake_llm):
+    service = ChatService(repository=fake_repo, llm_service=fake_llm, meta_extractor=RuleBasedMetaExtractor())
+
+    res = await service.post_message(None, "I believe vaccines are safe, convince me otherwise")
+
+    fake_llm.open_debate.assert_not_called()
+    fake_llm.extract_meta_from_message.assert_not_called()
+    fake_llm.generate_debate_response.assert_awaited_once()
+    fake_repo.save_conversation_meta.assert_awaited_once_with(
+        conversation_id=res._value.conversation_id, topic="Vaccines", stance="Vaccines are not safe"
+    )
+
+    res = await service.post_message(None, "Hello how are you?")
+    assert "Failed to extract conversation metadata" in res._value.error
+    fake_llm.extract_meta_from_message.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_new_conversation_saves_meta_while_reply_is_generated(fake_repo, fake_llm):
+    service = ChatService(repository=fake_repo, llm_service=fake_llm, meta_extractor=RuleBasedMetaExtractor())
+    meta_saved = asyncio.Event()
+    reply_started = asyncio.Event()
+
+    async def save_meta(**_):
+        # only finishes once the reply is underway, so this deadlocks if the steps ran in sequence
+        await asyncio.wait_for(reply_started.wait(), 1)
+        meta_saved.set()
+
+    async def reply(**_):
+        reply_started.set()
+        return Result.ok("Vaccines have side effects")
+
+    async def save_messages(rows):
+        assert meta_saved.is_set()
+        return rows
+
+    fake_repo.save_conversation_meta.side_effect = save_meta
+    fake_llm.generate_debate_response.side_effect = reply
+    fake_repo.save_messages.side_effect = save_messages
+
+    res = await service.post_message(None, "I believe vaccines are safe, convince me otherwise")
+
+    assert [m.message for m in res._value.message] == [
+        "Vaccines have side effects", "I believe vaccines are safe, convince me otherwise"
+    ]
+
+@pytest.mark.asyncio
+async def test_failed_meta_write_fails_the_turn_without_saving_messages(fake_repo, fake_llm):
+    service = ChatService(repository=fake_repo, llm_service=fake_llm, meta_extractor=RuleBasedMetaExtractor())
+    fake_repo.save_conversation_meta.side_effect = RuntimeError("db down")
+
+    res = await service.post_message(None, "I believe vaccines are safe, convince me otherwise")
+
+    assert res._is_error
+    assert "db down" in res._value.error
+    fake_repo.save_messages.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_open_debate_parses_and_validates():
+    llm = LLMService()
+    chat = Mock()
+    chat.send_message_async = AsyncMock(return_value=Mock(
+        text='```json\n{"topic": "Earth\'s Shape", "stance": "The earth is flat", "reply": " Look outside. "}\n```'
+    ))
+    llm.model = Mock(start_chat=Mock(return_value=chat))
+
+    res = await llm.open_debate("The earth is round")
+    assert res._value == OpeningTurn(topic="Earth's Shape", stance="The earth is flat", reply="Look outside.")
+
+    chat.send_message_async.return_value = Mock(text='{"topic": "INVALID", "stance": "INVALID", "reply": ""}')
+    assert (await llm.open_debate("hello"))._is_error
+    chat.send_message_async.return_value = Mock(text='{"topic": "A", "stance": "B"}')
+    assert (await llm.open_debate("hello"))._is_error
+
+@pytest.mark.asyncio
+async def test_get_history_ok(chat_service, fake_repo):
     fake_repo.get_messages.return_value = [
         {"role": "user", "message": "hi", "id": 1, "conversation_id": "c123", "created_at": "2024-01-01"}
     ]
     
-    res = chat_service.get_history("c123")
+    res = await chat_service.get_history("c123")
     assert res.ok
-    assert res._value.conversation_id == "c123"
-    assert len(res._value.message) == 1
-    assert res._value.message[0].message == "hi"
+    assert len(res._value.items) == 1
+    assert res._value.items[0].message == "hi"
+    assert res._value.next_cursor is None and res._value.prev_cursor is None
+    fake_repo.get_messages.assert_awaited_once_with("c123", limit=6, desc=False, after=None)
+
+@pytest.mark.asyncio
+async def test_get_history_rejects_bad_cursor(chat_service, fake_repo):
+    res = await chat_service.get_history("c123", cursor="not-a-cursor")
+    assert res._is_error
+    assert res._value.status_code == 400
+    fake_repo.get_messages.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_search_rejects_empty_query_and_foreign_cursors(chat_service, fake_repo):
+    chats_cursor = encode_cursor(("2024-01-01T00:00:00+00:00", "c1"))
+    for query, cursor in (("   ", None), ("moon", chats_cursor), ("moon", encode_cursor(("1.5", "k"), backward=True))):
+        res = await chat_service.search(query, cursor=cursor)
+        assert res._is_error and res._value.status_code == 400
+    fake_repo.search.assert_not_called()
 
 def test_clean_json_response():
     raw = "```json\n{\"topic\": \"A\", \"stance\": \"B\"}\n```"
@@ -51,3 +202,254 @@ def test_clean_json_response():
     assert cleaned == '{"topic": "A", "stance": "B"}'
 
 
+
+
+@pytest.mark.asyncio
+async def test_send_uses_async_client():
+    llm = LLMService()
+    chat = Mock()
+    chat.send_message_async = AsyncMock(return_value=Mock(text="async"))
+    response = await llm._send(chat, "hi")
+    assert response.text == "async"
+    chat.send_message.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_send_sync_path_runs_blocking_client():
+    llm = LLMService()
+    llm.use_async = False
+    chat = Mock()
+    chat.send_message.return_value = Mock(text="sync")
+    response = await llm._send(chat, "hi")
+    assert response.text == "sync"
+    chat.send_message.assert_called_once_with("hi")
+
+
+def _token_stream(*tokens):
+    async def stream(**kwargs):
+        for token in tokens:
+            yield token
+    return stream
+
+@pytest.mark.asyncio
+async def test_stream_message_persists_reply_once(chat_service, fake_repo, fake_llm):
+    fake_repo.get_conversation_with_messages.return_value = {"topic": "Moon landing", "stance": "was faked", "messages": []}
+    fake_llm.stream_debate_response = _token_stream("The flag ", "waved.")
+
+    res = await chat_service.stream_message("c123", "Why did the flag wave?")
+    events = [event async for event in res._value]
+
+    assert events[0] == {"event": "meta", "data": {"conversation_id": "c123", "topic": "Moon landing", "stance": "was faked"}}
+    assert [e["data"]["text"] for e in events if e["event"] == "token"] == ["The flag ", "waved."]
+    assert events[-1]["event"] == "done"
+    fake_repo.save_messages.assert_awaited_once()
+    user_row, bot_row = fake_repo.save_messages.call_args.args[0]
+    assert user_row["message"] == "Why did the flag wave?"
+    assert bot_row["message"] == "The flag waved."
+    assert "partial" not in bot_row
+
+@pytest.mark.asyncio
+async def test_stream_message_disconnect_saves_partial(chat_service, fake_repo, fake_llm):
+    fake_repo.get_conversation_with_messages.return_value = {"topic": "Moon landing", "stance": "was faked", "messages": []}
+    fake_llm.stream_debate_response = _token_stream("The flag ", "waved.")
+
+    res = await chat_service.stream_message("c123", "Why did the flag wave?")
+    events = res._value
+    await events.__anext__()  # meta
+    await events.__anext__()  # first token
+    await events.aclose()  # client went away
+
+    fake_repo.save_messages.assert_awaited_once()
+    _, bot_row = fake_repo.save_messages.call_args.args[0]
+    assert bot_row["message"] == "The flag"
+    assert bot_row["partial"] is True
+
+@pytest.mark.asyncio
+async def test_warmup_opens_connections_and_tolerates_failures(chat_service, fake_repo, fake_llm):
+    fake_llm.warmup.side_effect = RuntimeError("no credentials")
+
+    await chat_service.warmup()
+
+    fake_repo.ping.assert_awaited_once()
+    fake_llm.warmup.assert_awaited_once()
+
+def _long_history(count, start_minute=0):
+    # newest first, like get_conversation_with_messages
+    return [
+        {"role": "user" if i % 2 else "bot", "message": f"argument {i} " + "x" * 200,
+         "created_at": f"2024-01-01T10:{start_minute + i:02d}:00+00:00"}
+        for i in reversed(range(count))
+    ]
+
+@pytest.mark.asyncio
+async def test_post_message_folds_overflow_into_summary(chat_service, fake_repo, fake_llm):
+    chat_service.history_token_budget = 30
+    history = _long_history(4)
+    fake_repo.get_conversation_with_messages.return_value = {
+        "topic": "Moon landing", "stance": "was faked", "summary": "Earlier points.",
+        "summary_upto": None, "messages": history
+    }
+    fake_repo.get_conversation_meta.return_value = {
+        "topic": "Moon landing", "stance": "was faked", "summary": "Earlier points.", "summary_upto": None
+    }
+    fake_llm.summarize_history.return_value = Result.ok("Folded points.")
+    fake_repo.update_conversation_summary.return_value = True
+
+    await chat_service.post_message("c123", "Why did the flag wave?")
+    await chat_service.drain_summaries()
+
+    assert fake_llm.generate_debate_response.call_args.kwargs["summary"] == "Earlier points."
+    folded = fake_llm.summarize_history.call_args.args[3]
+    # budget 30 keeps only the two new rows verbatim; the whole previous window is folded, oldest first
+    assert [m["message"].split(" x")[0] for m in folded] == ["argument 0", "argument 1", "argument 2", "argument 3"]
+    fake_repo.update_conversation_summary.assert_awaited_once_with(
+        "c123", "Folded points.", history[0]["created_at"], None
+    )
+
+@pytest.mark.asyncio
+async def test_summary_fold_retries_on_lost_race(chat_service, fake_repo, fake_llm):
+    chat_service.history_token_budget = 30
+    history = _long_history(4)
+    fake_repo.get_conversation_with_messages.return_value = {
+        "topic": "Moon landing", "stance": "was faked", "messages": history
+    }
+    # another worker folded the two oldest messages in between
+    fake_repo.get_conversation_meta.side_effect = [
+        {"topic": "Moon landing", "stance": "was faked", "summary": None, "summary_upto": None},
+        {"topic": "Moon landing", "stance": "was faked", "summary": "Theirs.", "summary_upto": history[2]["created_at"]},
+    ]
+    fake_llm.summarize_history.return_value = Result.ok("Folded points.")
+    fake_repo.update_conversation_summary.side_effect = [False, True]
+
+    await chat_service.post_message("c123", "Why did the flag wave?")
+    await chat_service.drain_summaries()
+
+    retry = fake_llm.summarize_history.call_args_list[1].args
+    assert retry[2] == "Theirs."
+    assert [m["created_at"] for m in retry[3]] == [history[1]["created_at"], history[0]["created_at"]]
+    assert fake_repo.update_conversation_summary.call_args.args[3] == history[2]["created_at"]
+
+@pytest.mark.asyncio
+async def test_short_conversations_are_not_summarized(chat_service, fake_repo, fake_llm):
+    await chat_service.post_message(None, "The earth is round")
+    await chat_service.drain_summaries()
+
+    fake_llm.summarize_history.assert_not_called()
+
+def test_build_history_applies_budget_and_summary():
+    llm = LLMService()
+    llm.history_token_budget = 120
+    history = _long_history(4)
+
+    built = llm._build_history(history, "Moon landing", "was faked", summary="Earlier points.")
+
+    assert "Earlier points." in built[0]["parts"][0]
+    assert [turn["parts"][0] for turn in built[1:]] == [history[1]["message"], history[0]["message"]]
+
+@pytest.mark.asyncio
+async def test_turns_in_one_conversation_are_serialized(chat_service, fake_repo, fake_llm):
+    fake_repo.get_conversation_with_messages.return_value = {"topic": "T", "stance": "S", "messages": []}
+    active, peak = 0, 0
+
+    async def generate(**kwargs):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return Result.ok("reply")
+    fake_llm.generate_debate_response.side_effect = generate
+
+    await asyncio.gather(*(chat_service.post_message("c123", f"turn {i}") for i in range(3)))
+
+    assert peak == 1
+    assert fake_llm.generate_debate_response.await_count == 3
+
+@pytest.mark.asyncio
+async def test_double_submitted_opener_creates_one_conversation(chat_service, fake_repo, fake_llm):
+    first, second = await asyncio.gather(
+        chat_service.post_message(None, "The earth is round", idempotency_key="key-1"),
+        chat_service.post_message(None, "The earth is round", idempotency_key="key-1"),
+    )
+    replay = await chat_service.post_message(None, "The earth is round", idempotency_key="key-1")
+
+    assert first._value.conversation_id == second._value.conversation_id == replay._value.conversation_id
+    fake_repo.save_conversation_meta.assert_awaited_once()
+    fake_llm.generate_debate_response.assert_awaited_once()
+
+async def collect(result):
+    return [item async for item in result._value]
+
+@pytest.mark.asyncio
+async def test_batch_runs_items_and_groups_writes(fake_repo, fake_llm):
+    service = ChatService(repository=fake_repo, llm_service=fake_llm)
+    items = [ChatMessageRequest(message=f"opener {i}") for i in range(6)]
+
+    results = await collect(await service.post_messages_batch(items, concurrency=3))
+
+    assert sorted(r["index"] for r in results) == list(range(6))
+    assert all(r["ok"] and r["message"][0]["role"] == "bot" for r in results)
+    # meta goes out with the messages instead of one insert per new conversation
+    fake_repo.save_conversation_meta.assert_not_called()
+    saved = sum(len(call.args[0]) for call in fake_repo.save_conversations.await_args_list)
+    assert saved == 6
+    assert fake_repo.save_messages.await_count < 6
+
+@pytest.mark.asyncio
+async def test_batch_streams_in_completion_order_with_per_item_errors(fake_repo, fake_llm):
+    async def generate(user_message, **kwargs):
+        await asyncio.sleep(0.05 if user_message == "slow" else 0)
+        return Result.ok(f"reply to {user_message}")
+    fake_llm.generate_debate_response.side_effect = generate
+    fake_repo.get_conversation_with_messages.return_value = {"topic": "T", "stance": "S", "messages": []}
+    fake_llm.extract_meta_from_message.return_value = Result.fail("no topic")
+    service = ChatService(repository=fake_repo, llm_service=fake_llm)
+    items = [
+        ChatMessageRequest(conversation_id="c1", message="slow"),
+        ChatMessageRequest(conversation_id="c2", message="fast"),
+        ChatMessageRequest(message="hi"),
+    ]
+
+    results = await collect(await service.post_messages_batch(items, concurrency=3))
+
+    assert [r["index"] for r in results][-1] == 0
+    failed = next(r for r in results if r["index"] == 2)
+    assert not failed["ok"] and "no topic" in failed["error"] and failed["status_code"] == 400
+
+@pytest.mark.asyncio
+async def test_batch_rejects_oversized_requests(chat_service):
+    items = [ChatMessageRequest(message="hi")] * (settings.BATCH_MAX_ITEMS + 1)
+    res = await chat_service.post_messages_batch(items)
+    assert res._value.status_code == 413
+    assert (await chat_service.post_messages_batch([]))._is_error
+
+@pytest.mark.asyncio
+async def test_bulk_delete_limits_the_ids_per_request(chat_service, fake_repo):
+    with patch("app.features.chat.services.chat_service.settings.BULK_DELETE_MAX_IDS", 2):
+        res = await chat_service.delete_chats(["a", "b", "c"])
+    assert res._is_error
+    assert res._value.status_code == 413
+    fake_repo.delete_chats.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_deletes_wait_for_the_turn_in_flight(chat_service, fake_repo):
+    fake_repo.delete_chats.return_value = {"conversations": 1, "messages": 2}
+    turn_done = asyncio.Event()
+
+    async def turn():
+        async with chat_service.turn_locks.hold("c1"):
+            await turn_done.wait()
+
+    in_flight = asyncio.create_task(turn())
+    await asyncio.sleep(0)
+    deletes = [
+        asyncio.create_task(chat_service.delete_chat("c1")),
+        asyncio.create_task(chat_service.delete_chats(["c0", "c1"]))
+    ]
+    await asyncio.sleep(0.01)
+    fake_repo.delete_chat.assert_not_awaited()
+    fake_repo.delete_chats.assert_not_awaited()
+
+    turn_done.set()
+    await asyncio.gather(in_flight, *deletes)
+    fake_repo.delete_chat.assert_awaited_once_with("c1")
+    fake_repo.delete_chats.assert_awaited_once_with(["c0", "c1"])
@@ -0,0 +1,36 @@
+from app.features.chat.services.history_budget import estimate_tokens, fold_candidates, is_after, select_recent
+
+
+def msg(text, minute):
+    return {"role": "user", "message": text, "created_at": f"2024-01-01T10:{minute:02d}:00+00:00"}
+
+
+def test_estimate_tokens_rounds_up():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
+
+
+def test_select_recent_stops_at_budget_and_count():
+    newest_first = [msg("a" * 40, 3), msg("b" * 40, 2), msg("c" * 40, 1)]
+
+    assert select_recent(newest_first, budget=25, max_messages=10) == newest_first[:2]
+    assert select_recent(newest_first, budget=1000, max_messages=1) == newest_first[:1]
+    # a single essay over budget leaves nothing verbatim; the summary carries it
+    assert select_recent([msg("x" * 400, 1)], budget=25, max_messages=10) == []
+
+
+def test_fold_candidates_skips_summarized_messages():
+    newest_first = [msg("a" * 40, 4), msg("b" * 40, 3), msg("c" * 40, 2), msg("d" * 40, 1)]
+
+    pending = fold_candidates(newest_first, budget=20, max_messages=10, summary_upto=None)
+    assert [m["message"][0] for m in pending] == ["d", "c"]
+
+    pending = fold_candidates(newest_first, budget=20, max_messages=10, summary_upto="2024-01-01T10:01:00+00:00")
+    assert [m["message"][0] for m in pending] == ["c"]
+
+
+def test_is_after_compares_instants_not_strings():
+    assert is_after("2024-01-01T10:00:00.5+00:00", "2024-01-01T10:00:00+00:00")
+    assert not is_after("2024-01-01T11:00:00+01:00", "2024-01-01T10:00:00+00:00")
+    assert is_after("2024-01-01T10:00:00+00:00", None)
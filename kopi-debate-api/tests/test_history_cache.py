@@ -0,0 +1,122 @@
+import pytest
+from unittest.mock import AsyncMock
+from app.features.chat.repositories.cached_chat_repository import CachedChatRepository
+from app.features.chat.repositories.history_cache import HistoryCache
+from app.features.chat.repositories.meta_cache import ConversationMetaCache
+from app.features.chat.repositories.sqlite_chat_repository import SqliteChatRepository
+
+
+def row(conversation_id, n, role="user"):
+    return {"id": str(n), "conversation_id": conversation_id, "role": role, "message": f"m{n}"}
+
+def test_ring_buffer_keeps_newest_window():
+    cache = HistoryCache(window=3, max_conversations=10, max_bytes=10**6)
+    cache.start("c1")
+    cache.append("c1", [row("c1", n) for n in range(5)])
+
+    assert [m["id"] for m in cache.get("c1", 3)] == ["4", "3", "2"]
+    # rows were rotated out, so older/oldest-first reads must go to the DB
+    assert cache.get("c1", 4) is None
+    assert cache.get("c1", 2, desc=False) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+def test_new_conversation_is_complete():
+    cache = HistoryCache(window=5, max_conversations=10, max_bytes=10**6)
+    cache.start("c1")
+    cache.append("c1", [row("c1", 0), row("c1", 1, "bot")])
+
+    assert [m["id"] for m in cache.get("c1", 5, desc=False)] == ["0", "1"]
+    assert [m["id"] for m in cache.get("c1", 50)] == ["1", "0"]
+
+def test_lru_eviction_by_count_and_bytes():
+    cache = HistoryCache(window=5, max_conversations=2, max_bytes=10**6)
+    for cid in ("c1", "c2"):
+        cache.start(cid)
+    cache.get("c1", 1)
+    cache.start("c3")
+    assert cache.get("c2", 1) is None
+    assert cache.get("c1", 1) is not None
+
+    small = HistoryCache(window=5, max_conversations=10, max_bytes=600)
+    small.start("c1")
+    small.append("c1", [row("c1", 0)])
+    small.start("c2")
+    small.append("c2", [row("c2", 0), row("c2", 1)])
+    assert small.get("c1", 1) is None
+    assert small.total_bytes <= 600
+
+def test_write_during_fill_discards_stale_read():
+    cache = HistoryCache(window=2, max_conversations=10, max_bytes=10**6)
+    cache.begin_fill("c1")
+    cache.append("c1", [row("c1", 9)])
+    cache.fill("c1", [row("c1", 1)], limit=2)
+    assert cache.get("c1", 1) is None
+
+@pytest.mark.asyncio
+async def test_repository_fills_on_miss_then_serves_from_memory():
+    inner = AsyncMock()
+    inner.get_conversation_with_messages.return_value = {
+        "topic": "T", "stance": "S", "messages": [row("c1", 1, "bot"), row("c1", 0)]
+    }
+    inner.get_conversation_meta.return_value = {"topic": "T", "stance": "S"}
+    inner.save_messages.side_effect = lambda rows: rows
+    repo = CachedChatRepository(
+        inner,
+        HistoryCache(window=5, max_conversations=10, max_bytes=10**6),
+        ConversationMetaCache(max_entries=10, ttl_seconds=60, negative_ttl_seconds=1)
+    )
+
+    first = await repo.get_conversation_with_messages("c1", limit=5)
+    await repo.save_messages([row("c1", 2), row("c1", 3, "bot")])
+    second = await repo.get_conversation_with_messages("c1", limit=5)
+
+    inner.get_conversation_with_messages.assert_awaited_once()
+    assert [m["id"] for m in first["messages"]] == ["1", "0"]
+    assert [m["id"] for m in second["messages"]] == ["3", "2", "1", "0"]
+
+    await repo.delete_chat("c1")
+    assert repo.history_cache.get("c1", 1) is None
+
+@pytest.mark.asyncio
+async def test_bulk_delete_drops_every_conversation_from_the_caches():
+    inner = AsyncMock()
+    inner.delete_chats.return_value = {"conversations": 2, "messages": 3}
+    repo = CachedChatRepository(
+        inner,
+        HistoryCache(window=5, max_conversations=10, max_bytes=10**6),
+        ConversationMetaCache(max_entries=10, ttl_seconds=60, negative_ttl_seconds=1)
+    )
+    for conversation_id in ("c1", "c2", "c3"):
+        repo.history_cache.begin_fill(conversation_id)
+        repo.history_cache.fill(conversation_id, [row(conversation_id, 1)], limit=5)
+
+    assert await repo.delete_chats(["c1", "c2"]) == {"conversations": 2, "messages": 3}
+    assert repo.history_cache.get("c1", 1) is None and repo.history_cache.get("c2", 1) is None
+    assert repo.history_cache.get("c3", 1) is not None
+
+@pytest.mark.asyncio
+async def test_turn_written_on_another_worker_shows_up_within_the_ttl():
+    db = SqliteChatRepository()
+    now = [0.0]
+
+    def worker():
+        return CachedChatRepository(
+            db,
+            HistoryCache(window=5, max_conversations=10, max_bytes=10**6, ttl_seconds=30, clock=lambda: now[0]),
+            ConversationMetaCache(max_entries=10, ttl_seconds=60, negative_ttl_seconds=1)
+        )
+
+    first, second = worker(), worker()
+    await first.save_conversation_meta("c1", "T", "S")
+    await first.save_message("c1", "user", "opening")
+    assert [m["message"] for m in await second.get_messages("c1")] == ["opening"]
+
+    await first.save_message("c1", "bot", "reply")
+    now[0] = 29
+    assert [m["message"] for m in await second.get_messages("c1")] == ["opening"]
+    now[0] = 30
+    assert [m["message"] for m in await second.get_messages("c1")] == ["reply", "opening"]
+    state = await second.get_conversation_with_messages("c1")
+    assert [m["message"] for m in state["messages"]] == ["reply", "opening"]
+    db.close()
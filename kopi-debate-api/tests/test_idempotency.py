@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from app.core.errors import Result
+from app.core.idempotency import IdempotencyStore
+from app.core.keyed_lock import KeyedLock
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_store(clock=None):
+    return IdempotencyStore(max_entries=10, ttl_seconds=60, clock=clock or FakeClock())
+
+
+def counting_call(result, delay=0.01):
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return result
+    return call, calls
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_share_one_execution():
+    store = make_store()
+    call, calls = counting_call(Result.ok("reply"))
+
+    results = await asyncio.gather(*(store.run("k1", ("c1", "hi"), call) for _ in range(3)))
+
+    assert len(calls) == 1
+    assert [r._value for r in results] == ["reply"] * 3
+    assert store.joins == 2
+
+@pytest.mark.asyncio
+async def test_completed_requests_replay_until_ttl():
+    clock = FakeClock()
+    store = make_store(clock)
+    call, calls = counting_call(Result.ok("reply"))
+
+    await store.run("k1", ("c1", "hi"), call)
+    assert (await store.run("k1", ("c1", "hi"), call))._value == "reply"
+    assert len(calls) == 1
+
+    clock.now = 61
+    await store.run("k1", ("c1", "hi"), call)
+    assert len(calls) == 2
+
+@pytest.mark.asyncio
+async def test_key_reuse_with_other_body_is_rejected():
+    store = make_store()
+    call, _ = counting_call(Result.ok("reply"))
+    await store.run("k1", ("c1", "hi"), call)
+
+    result = await store.run("k1", ("c1", "something else"), call)
+
+    assert result._is_error
+    assert result._value.status_code == 422
+
+@pytest.mark.asyncio
+async def test_failures_are_not_replayed():
+    store = make_store()
+    call, calls = counting_call(Result.fail("Gemini is overloaded", status_code=503))
+
+    await store.run("k1", ("c1", "hi"), call)
+    await store.run("k1", ("c1", "hi"), call)
+
+    assert len(calls) == 2
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_work():
+    store = make_store()
+    call, calls = counting_call(Result.ok("reply"), delay=0.05)
+
+    first = asyncio.create_task(store.run("k1", ("c1", "hi"), call))
+    await asyncio.sleep(0.01)
+    first.cancel()
+    retry = await store.run("k1", ("c1", "hi"), call)
+
+    assert retry._value == "reply"
+    assert len(calls) == 1
+
+@pytest.mark.asyncio
+async def test_keyed_lock_serializes_per_key_and_cleans_up():
+    locks = KeyedLock()
+    active, peak = {"a": 0, "b": 0}, {"a": 0, "b": 0}
+
+    async def work(key):
+        async with locks.hold(key):
+            active[key] += 1
+            peak[key] = max(peak[key], active[key])
+            await asyncio.sleep(0.01)
+            active[key] -= 1
+
+    await asyncio.gather(work("a"), work("a"), work("b"), work("b"))
+
+    assert peak == {"a": 1, "b": 1}
+    assert len(locks) == 0
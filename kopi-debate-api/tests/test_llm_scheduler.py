@@ -0,0 +1,178 @@
+import asyncio
+
+import google.api_core.exceptions
+import pytest
+
+from app.core.llm_scheduler import LLMOverloaded, LLMScheduler, retry_after_hint
+from app.features.chat.services.llm_service import LLMService
+from benchmarks.fakes import FakeGenerativeModel
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_scheduler(**kwargs):
+    delays = []
+
+    async def sleep(seconds):
+        delays.append(seconds)
+
+    options = dict(
+        max_concurrency=2, max_queue=2, queue_timeout_seconds=1, max_retries=3, retry_base_seconds=0.5,
+        retry_max_seconds=8, breaker_threshold=3, breaker_cooldown_seconds=30, clock=FakeClock(), sleep=sleep
+    )
+    options.update(kwargs)
+    return LLMScheduler(**options), delays
+
+
+def make_llm(scheduler, latency=0.0):
+    llm = LLMService(scheduler=scheduler)
+    llm.model = FakeGenerativeModel(latency=latency)
+    return llm
+
+
+async def generate(llm):
+    return await llm.generate_debate_response("The earth is round", [], "Earth's Shape", "The earth is flat")
+
+
+@pytest.mark.asyncio
+async def test_retries_429_with_backoff_then_succeeds():
+    scheduler, delays = make_scheduler()
+    llm = make_llm(scheduler)
+    llm.model.fail_next(2)
+
+    result = await generate(llm)
+
+    assert not result._is_error
+    assert sum(llm.model.calls.values()) == 3
+    assert len(delays) == 2
+    assert 0 <= delays[0] <= 0.5 and 0 <= delays[1] <= 1.0
+
+@pytest.mark.asyncio
+async def test_honors_server_retry_after():
+    scheduler, delays = make_scheduler()
+    llm = make_llm(scheduler)
+    llm.model.fail_next(1, retry_after=2.5)
+
+    assert not (await generate(llm))._is_error
+    assert 2.5 <= delays[0] <= 3.0
+
+@pytest.mark.asyncio
+async def test_exhausted_retries_become_503_with_retry_after():
+    scheduler, delays = make_scheduler(max_retries=1)
+    llm = make_llm(scheduler)
+    llm.model.fail_next(2)
+
+    result = await generate(llm)
+
+    assert result._is_error
+    assert result._value.status_code == 503
+    assert int(result._value.headers["Retry-After"]) >= 1
+    assert len(delays) == 1
+
+@pytest.mark.asyncio
+async def test_long_server_wait_fails_fast():
+    scheduler, delays = make_scheduler()
+    llm = make_llm(scheduler)
+    llm.model.fail_next(1, retry_after=60)
+
+    result = await generate(llm)
+
+    assert result._value.status_code == 503
+    assert int(result._value.headers["Retry-After"]) >= 60
+    assert delays == []
+
+@pytest.mark.asyncio
+async def test_non_retryable_errors_are_not_retried():
+    scheduler, delays = make_scheduler()
+
+    async def bad_request():
+        raise google.api_core.exceptions.InvalidArgument("bad prompt")
+
+    with pytest.raises(google.api_core.exceptions.InvalidArgument):
+        await scheduler.run(bad_request)
+    assert delays == []
+    assert scheduler.consecutive_failures == 0
+
+@pytest.mark.asyncio
+async def test_breaker_opens_then_lets_one_probe_through():
+    clock = FakeClock()
+    scheduler, _ = make_scheduler(max_retries=0, breaker_threshold=2, clock=clock)
+    llm = make_llm(scheduler)
+    llm.model.fail_next(2)
+
+    await generate(llm)
+    await generate(llm)
+    assert scheduler.breaker_open
+
+    calls_before = sum(llm.model.calls.values())
+    shed = await generate(llm)
+    assert shed._value.status_code == 503
+    assert shed._value.headers["Retry-After"] == "30"
+    assert sum(llm.model.calls.values()) == calls_before
+
+    clock.now = 31
+    assert not (await generate(llm))._is_error
+    assert not scheduler.breaker_open
+
+@pytest.mark.asyncio
+async def test_concurrency_cap_and_queue_full_rejection():
+    scheduler, _ = make_scheduler(max_concurrency=2, max_queue=2, sleep=asyncio.sleep)
+    llm = make_llm(scheduler, latency=0.05)
+
+    results = await asyncio.gather(*(generate(llm) for _ in range(6)))
+
+    assert llm.model.max_in_flight == 2
+    shed = [r for r in results if r._is_error]
+    assert len(shed) == 2
+    assert all(r._value.status_code == 503 and "queue_full" in r._value.error for r in shed)
+    assert scheduler.waiting == 0 and scheduler.in_flight == 0
+
+@pytest.mark.asyncio
+async def test_queue_timeout_sheds_waiters():
+    scheduler, _ = make_scheduler(max_concurrency=1, queue_timeout_seconds=0.01, sleep=asyncio.sleep)
+    llm = make_llm(scheduler, latency=0.1)
+
+    first, second = await asyncio.gather(generate(llm), generate(llm))
+
+    assert not first._is_error
+    assert "queue_timeout" in second._value.error
+
+@pytest.mark.asyncio
+async def test_waiter_cancelled_as_slot_frees_does_not_leak_it():
+    scheduler, _ = make_scheduler(max_concurrency=1, queue_timeout_seconds=5)
+    await scheduler._semaphore.acquire()
+    waiter = asyncio.create_task(scheduler.run(lambda: asyncio.sleep(0)))
+    await asyncio.sleep(0)
+    assert scheduler.waiting == 1
+
+    # the slot is handed to the waiter in the same tick the waiter is cancelled
+    scheduler._semaphore.release()
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    assert scheduler.waiting == 0
+    await asyncio.wait_for(scheduler.run(lambda: asyncio.sleep(0)), 1)
+
+@pytest.mark.asyncio
+async def test_stream_holds_slot_until_consumed():
+    scheduler, _ = make_scheduler(max_concurrency=1, max_queue=0)
+    llm = make_llm(scheduler)
+
+    stream = llm.stream_debate_response("The earth is round", [], "Earth's Shape", "The earth is flat")
+    assert await stream.__anext__()
+    with pytest.raises(LLMOverloaded):
+        await scheduler.run(lambda: asyncio.sleep(0))
+    await stream.aclose()
+
+    await scheduler.run(lambda: asyncio.sleep(0))
+
+def test_retry_after_hint_sources():
+    assert retry_after_hint(Exception("429 quota exceeded. Please retry in 12.5s.")) == 12.5
+    assert retry_after_hint(Exception("boom")) is None
@@ -0,0 +1,108 @@
+import pytest
+from unittest.mock import AsyncMock
+from app.core.invalidation import InvalidationBus
+from app.features.chat.repositories.cached_chat_repository import CachedChatRepository
+from app.features.chat.repositories.history_cache import HistoryCache
+from app.features.chat.repositories.meta_cache import ConversationMetaCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def make_repo(clock=None, bus=None):
+    inner = AsyncMock()
+    inner.get_conversation_meta.return_value = None
+    inner.save_messages.side_effect = lambda rows: rows
+    meta_cache = ConversationMetaCache(max_entries=10, ttl_seconds=3600, negative_ttl_seconds=5, clock=clock or FakeClock())
+    history_cache = HistoryCache(window=5, max_conversations=10, max_bytes=10**6)
+    return CachedChatRepository(inner, history_cache, meta_cache, invalidation_bus=bus), inner
+
+@pytest.mark.asyncio
+async def test_negative_entries_expire_quickly():
+    clock = FakeClock()
+    repo, inner = make_repo(clock)
+
+    assert await repo.get_conversation_meta("c1") is None
+    assert await repo.get_conversation_meta("c1") is None
+    assert inner.get_conversation_meta.await_count == 1
+
+    clock.now = 6
+    inner.get_conversation_meta.return_value = {"topic": "T", "stance": "S"}
+    assert await repo.get_conversation_meta("c1") == {"topic": "T", "stance": "S"}
+    clock.now = 3000
+    assert (await repo.get_conversation_meta("c1"))["topic"] == "T"
+    assert inner.get_conversation_meta.await_count == 2
+
+@pytest.mark.asyncio
+async def test_created_conversation_turns_need_no_reads():
+    repo, inner = make_repo()
+    await repo.save_conversation_meta("c1", "T", "S")
+    await repo.save_messages([{"conversation_id": "c1", "role": "user", "message": "u"}])
+
+    state = await repo.get_conversation_with_messages("c1", limit=5)
+
+    assert state["topic"] == "T"
+    assert [m["message"] for m in state["messages"]] == ["u"]
+    inner.get_conversation_meta.assert_not_called()
+    inner.get_conversation_with_messages.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_delete_invalidates_and_publishes():
+    bus = InvalidationBus()
+    published = []
+    async def publisher(key):
+        published.append(key)
+    bus.set_publisher(publisher)
+    repo, inner = make_repo(bus=bus)
+    bus.subscribe(repo.invalidate)
+    await repo.save_conversation_meta("c1", "T", "S")
+
+    await repo.delete_chat("c1")
+
+    assert published == ["c1"]
+    assert len(repo.meta_cache) == 0
+
+def test_remote_invalidation_reaches_local_caches():
+    repo, _ = make_repo()
+    bus = InvalidationBus(subscribers=[repo.invalidate])
+    repo.meta_cache.remember("c1", {"topic": "T", "stance": "S"})
+    repo.history_cache.start("c1")
+
+    bus.receive("c1")
+
+    assert len(repo.meta_cache) == 0
+    assert repo.history_cache.get("c1", 1) is None
+
+@pytest.mark.asyncio
+async def test_summary_update_writes_through_or_invalidates():
+    repo, inner = make_repo()
+    await repo.save_conversation_meta("c1", "T", "S")
+
+    inner.update_conversation_summary.return_value = True
+    await repo.update_conversation_summary("c1", "Folded.", "2024-01-01T10:00:00+00:00", None)
+    assert (await repo.get_conversation_meta("c1"))["summary"] == "Folded."
+
+    inner.update_conversation_summary.return_value = False
+    await repo.update_conversation_summary("c1", "Stale.", "2024-01-01T10:00:00+00:00", None)
+    assert len(repo.meta_cache) == 0
+
+@pytest.mark.asyncio
+async def test_writes_bump_change_versions():
+    repo, _ = make_repo()
+    versions = repo.versions
+    chats = versions.version("chats")
+
+    await repo.save_conversation_meta("c1", "T", "S")
+    assert versions.version("chats") > chats
+    chats, c1 = versions.version("chats"), versions.version("c1")
+
+    await repo.save_messages([{"conversation_id": "c1", "role": "user", "message": "hi"}])
+    assert versions.version("c1") > c1
+    assert versions.version("chats") == chats
+
+    await repo.delete_chat("c1")
+    assert versions.version("chats") > chats
@@ -0,0 +1,91 @@
+import pytest
+from unittest.mock import AsyncMock, Mock
+from app.features.chat.models.chat_meta import ChatMeta
+from app.features.chat.services.llm_service import LLMService
+from app.features.chat.services.meta_extraction_cache import MetaExtractionCache, normalize_message
+
+EARTH = ChatMeta(topic="Earth's Shape", stance="The earth is flat")
+INVALID = ChatMeta(topic="INVALID", stance="INVALID")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def make_cache(path=None, prompt="prompt v1", clock=None):
+    return MetaExtractionCache(prompt=prompt, model="gemini", path=path, invalid_ttl_seconds=60, clock=clock or FakeClock())
+
+def test_normalization_folds_case_punctuation_and_spacing():
+    assert normalize_message("The earth is round.") == "the earth is round"
+    assert normalize_message("  the EARTH   is round!!") == "the earth is round"
+    assert normalize_message("Vaccines are safe, change my mind") == normalize_message("vaccines are safe  change my mind")
+    assert normalize_message("It's fine") != normalize_message("Its fine")
+
+def test_variants_share_an_entry():
+    cache = make_cache()
+    assert cache.get("The earth is round") is None
+    cache.put("The earth is round", EARTH)
+
+    assert cache.get("the earth is ROUND.") == EARTH
+    assert cache.stats() == {
+        "memory_hits": 1, "disk_hits": 0, "misses": 1, "hit_rate": 0.5, "llm_calls_saved": 1
+    }
+
+def test_disk_tier_survives_restarts(tmp_path):
+    path = str(tmp_path / "meta.db")
+    first = make_cache(path)
+    first.put("The earth is round", EARTH)
+    first.close()
+
+    restarted = make_cache(path)
+    assert restarted.get("The earth is round") == EARTH
+    assert restarted.get("The earth is round") == EARTH
+    assert (restarted.stats()["disk_hits"], restarted.stats()["memory_hits"]) == (1, 1)
+
+def test_editing_the_prompt_invalidates_entries(tmp_path):
+    path = str(tmp_path / "meta.db")
+    make_cache(path).put("The earth is round", EARTH)
+
+    assert make_cache(path, prompt="prompt v2").get("The earth is round") is None
+
+def test_invalid_verdicts_expire_quickly(tmp_path):
+    clock = FakeClock()
+    cache = make_cache(str(tmp_path / "meta.db"), clock=clock)
+    cache.put("hello", INVALID)
+    cache.put("The earth is round", EARTH)
+
+    clock.now += 61
+    assert cache.get("hello") is None
+    assert cache.get("The earth is round") == EARTH
+
+@pytest.mark.asyncio
+async def test_extraction_calls_gemini_once_per_normalized_opener():
+    llm = LLMService(meta_cache=make_cache())
+    chat = Mock()
+    chat.send_message_async = AsyncMock(return_value=Mock(text='{"topic": "Earth\'s Shape", "stance": "The earth is flat"}'))
+    llm.model = Mock(start_chat=Mock(return_value=chat))
+
+    first = await llm.extract_meta_from_message("The earth is round")
+    second = await llm.extract_meta_from_message("the earth is round!")
+
+    assert first._value == second._value == EARTH
+    chat.send_message_async.assert_awaited_once()
+
+    chat.send_message_async.return_value = Mock(text='{"topic": "INVALID", "stance": "INVALID"}')
+    assert (await llm.extract_meta_from_message("hello"))._is_error
+    assert (await llm.extract_meta_from_message("Hello."))._is_error
+    assert chat.send_message_async.await_count == 2
+
+@pytest.mark.asyncio
+async def test_failed_calls_are_not_cached():
+    llm = LLMService(meta_cache=make_cache())
+    chat = Mock()
+    chat.send_message_async = AsyncMock(return_value=Mock(text="not json"))
+    llm.model = Mock(start_chat=Mock(return_value=chat))
+
+    assert (await llm.extract_meta_from_message("The earth is round"))._is_error
+    chat.send_message_async.return_value = Mock(text='{"topic": "Earth\'s Shape", "stance": "The earth is flat"}')
+    assert (await llm.extract_meta_from_message("The earth is round"))._value == EARTH
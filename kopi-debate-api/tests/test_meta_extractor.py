@@ -0,0 +1,26 @@
+import pytest
+from app.features.chat.services.meta_extractor import INVALID_META_ERROR, RuleBasedMetaExtractor
+from benchmarks.meta_corpus import META_CORPUS
+
+
+@pytest.mark.parametrize("message,expected", META_CORPUS)
+def test_labeled_corpus(message, expected):
+    result = RuleBasedMetaExtractor().extract(message)
+    if expected is None:
+        assert result is None
+    elif expected == "INVALID":
+        assert result._is_error
+        assert result._value.error == INVALID_META_ERROR
+    else:
+        assert not result._is_error
+        assert (result._value.topic, result._value.stance) == expected
+
+def test_fast_path_hit_rate():
+    extractor = RuleBasedMetaExtractor()
+    for message, _ in META_CORPUS:
+        extractor.extract(message)
+    stats = extractor.stats()
+    assert stats["invalid"] == sum(1 for _, expected in META_CORPUS if expected == "INVALID")
+    assert stats["misses"] == sum(1 for _, expected in META_CORPUS if expected is None)
+    labeled = sum(1 for _, expected in META_CORPUS if expected is not None)
+    assert stats["hit_rate"] == pytest.approx(labeled / len(META_CORPUS), abs=0.01)
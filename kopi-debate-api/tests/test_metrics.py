@@ -0,0 +1,75 @@
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import metrics
+from app.main import app as main_app
+
+
+@metrics.timed("test.lookup")
+async def lookup():
+    return "found"
+
+
+def build_app():
+    app = FastAPI()
+    app.add_middleware(metrics.MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: str):
+        with metrics.stage("test.render"):
+            value = await lookup()
+        await lookup()
+        return {"item": item_id, "value": value}
+
+    return app
+
+
+def test_server_timing_lists_stages_and_total():
+    response = TestClient(build_app()).get("/items/1")
+
+    assert response.status_code == 200
+    names = [entry.split(";")[0] for entry in response.headers["Server-Timing"].split(", ")]
+    assert names == ["test.lookup", "test.render", "total"]
+
+
+def test_request_histogram_uses_route_template():
+    TestClient(build_app()).get("/items/42")
+
+    count = metrics.REGISTRY.get_sample_value(
+        "kopi_request_seconds_count", {"method": "GET", "route": "/items/{item_id}", "status": "200"}
+    )
+    assert count >= 1
+    assert metrics.REGISTRY.get_sample_value("kopi_requests_in_flight") == 0
+
+
+def test_stage_outside_a_request_only_feeds_histograms():
+    before = metrics.REGISTRY.get_sample_value("kopi_stage_seconds_count", {"stage": "test.background"}) or 0
+
+    with metrics.stage("test.background"):
+        pass
+
+    assert metrics.REGISTRY.get_sample_value("kopi_stage_seconds_count", {"stage": "test.background"}) == before + 1
+
+
+def test_record_token_usage_counts_input_and_output():
+    def tokens(direction):
+        return metrics.REGISTRY.get_sample_value("kopi_llm_tokens_total", {"direction": direction}) or 0
+
+    before_in, before_out = tokens("input"), tokens("output")
+    usage = SimpleNamespace(prompt_token_count=120, candidates_token_count=30)
+
+    metrics.record_token_usage(SimpleNamespace(usage_metadata=usage))
+    metrics.record_token_usage(SimpleNamespace())
+
+    assert tokens("input") == before_in + 120
+    assert tokens("output") == before_out + 30
+
+
+def test_metrics_endpoint_exposes_prometheus_text():
+    response = TestClient(main_app).get("/metrics")
+
+    assert response.status_code == 200
+    assert "kopi_stage_seconds" in response.text
+    assert "kopi_requests_in_flight" in response.text
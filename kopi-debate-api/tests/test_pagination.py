@@ -0,0 +1,58 @@
+import pytest
+from app.core.pagination import Cursor, decode_cursor, encode_cursor, paginate
+
+
+def position(row):
+    return (row["created_at"], row["id"])
+
+def rows(*ids):
+    return [{"created_at": "2024-01-01T00:00:00+00:00", "id": i} for i in ids]
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(("2024-01-01T00:00:00.5+08:00", "abc"), backward=True)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == Cursor(("2024-01-01T00:00:00.5+08:00", "abc"), True)
+
+@pytest.mark.parametrize("cursor", ["", "!!", "bm90IGpzb24", encode_cursor(("t", "k"))[:-2]])
+def test_decode_rejects_garbage(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+@pytest.mark.parametrize("position", [
+    ("not a time", "abc"),
+    ('2024-01-01T00:00:00+00:00",id.gt."0', "abc"),
+    ("2024-01-01T00:00:00+00:00", 'abc"),and(id.gt.0'),
+    ("2024-01-01T00:00:00+00:00", "a,b"),
+    ("2024-01-01T00:00:00+00:00", ""),
+])
+def test_decode_rejects_positions_that_are_not_a_timestamp_and_id(position):
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor(position))
+
+def test_decode_checks_the_sort_value_it_is_given():
+    assert decode_cursor(encode_cursor(("-1.5", "m000000000001")), sort_value=float).position[0] == "-1.5"
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor(("2024-01-01", "m1")), sort_value=float)
+
+def test_first_page_forward():
+    page = paginate(rows("a", "b", "c"), 2, None, position)
+    assert [r["id"] for r in page.items] == ["a", "b"]
+    assert decode_cursor(page.next_cursor).position[1] == "b"
+    assert page.prev_cursor is None
+
+def test_last_page_backward_without_cursor():
+    # scanned in reverse: newest first, one extra row
+    page = paginate(rows("c", "b", "a"), 2, None, position, backward=True)
+    assert [r["id"] for r in page.items] == ["b", "c"]
+    assert page.next_cursor is None
+    assert decode_cursor(page.prev_cursor) == Cursor(position(page.items[0]), True)
+
+def test_backward_page_from_cursor_has_next():
+    page = paginate(rows("b", "a"), 2, Cursor(("t", "c"), True), position)
+    assert [r["id"] for r in page.items] == ["a", "b"]
+    assert page.prev_cursor is None
+    assert decode_cursor(page.next_cursor).position[1] == "b"
+
+def test_empty_page():
+    page = paginate([], 5, Cursor(("t", "k"), False), position)
+    assert page.items == [] and page.next_cursor is None and page.prev_cursor is None
@@ -0,0 +1,116 @@
+import uuid
+from datetime import datetime, timezone
+import pytest
+from unittest.mock import AsyncMock
+from app.features.chat.repositories.postgres_chat_repository import PostgresChatRepository
+
+CREATED = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def make_repo(rows):
+    pool = AsyncMock()
+    pool.fetch.return_value = rows
+    return PostgresChatRepository(pool), pool
+
+def message(message_id, text):
+    return {
+        "id": message_id, "conversation_id": "c1", "role": "user",
+        "message": text, "partial": False, "created_at": CREATED
+    }
+
+@pytest.mark.asyncio
+async def test_get_conversation_with_messages_is_one_query():
+    message_id = uuid.uuid4()
+    meta = {"topic": "T", "stance": "S", "summary": None, "summary_upto": None}
+    repo, pool = make_repo([{**meta, **message(message_id, "hi")}])
+
+    state = await repo.get_conversation_with_messages("c1", limit=3)
+
+    assert state == {**meta, "messages": [{**message(str(message_id), "hi"), "created_at": CREATED.isoformat()}]}
+    assert repo.round_trips == 1
+    assert pool.fetch.await_args.args[1:] == ("c1", 3)
+
+@pytest.mark.asyncio
+async def test_get_conversation_without_messages():
+    # LEFT JOIN LATERAL yields one row of NULL message columns for an empty conversation
+    empty = dict.fromkeys(("id", "conversation_id", "role", "message", "partial", "created_at"))
+    repo, _ = make_repo([{"topic": "T", "stance": "S", "summary": None, "summary_upto": None, **empty}])
+
+    state = await repo.get_conversation_with_messages("c1")
+    assert state["messages"] == []
+
+    repo, _ = make_repo([])
+    assert await repo.get_conversation_with_messages("missing") is None
+
+@pytest.mark.asyncio
+async def test_save_messages_is_one_statement():
+    repo, pool = make_repo([message(uuid.uuid4(), "u"), message(uuid.uuid4(), "b")])
+
+    saved = await repo.save_messages([
+        {"conversation_id": "c1", "role": "user", "message": "u", "created_at": CREATED.isoformat()},
+        {"conversation_id": "c1", "role": "bot", "message": "b", "partial": True},
+    ])
+
+    assert [row["message"] for row in saved] == ["u", "b"]
+    assert repo.round_trips == 1
+    query, conversation_ids, roles, texts, partials, created = pool.fetch.await_args.args
+    assert "unnest" in query
+    assert roles == ["user", "bot"]
+    assert partials == [False, True]
+    assert created[0] == CREATED
+    assert await repo.save_messages([]) == []
+    assert repo.round_trips == 1
+
+@pytest.mark.asyncio
+async def test_summary_compare_and_set():
+    repo, pool = make_repo([{"conversation_id": "c1"}])
+    assert await repo.update_conversation_summary("c1", "s", CREATED.isoformat(), None)
+    assert pool.fetch.await_args.args[3:] == (CREATED, None)
+
+    pool.fetch.return_value = []
+    assert not await repo.update_conversation_summary("c1", "s", CREATED.isoformat(), CREATED.isoformat())
+
+@pytest.mark.asyncio
+async def test_get_messages_after_position_is_a_row_value_range():
+    repo, pool = make_repo([])
+    await repo.get_messages("c1", limit=6, desc=False, after=(CREATED.isoformat(), "abc"))
+
+    query, *args = pool.fetch.await_args.args
+    assert "(created_at, id) > ($3, $4::uuid)" in query
+    assert "ORDER BY created_at ASC, id ASC" in query
+    assert args == ["c1", 6, CREATED, "abc"]
+
+@pytest.mark.asyncio
+async def test_get_chats_unbounded_without_limit():
+    repo, pool = make_repo([])
+    await repo.get_chats()
+    query, *args = pool.fetch.await_args.args
+    assert "WHERE" not in query
+    assert args == [None]
+
+@pytest.mark.asyncio
+async def test_save_messages_once_skips_stored_ids():
+    repo, pool = make_repo([])
+    message_id = str(uuid.uuid4())
+
+    await repo.save_messages_once([{**message(message_id, "u"), "created_at": CREATED.isoformat()}])
+
+    query, ids, *_ = pool.execute.await_args.args
+    assert "ON CONFLICT (id) DO NOTHING" in query
+    assert ids == [message_id]
+    assert repo.round_trips == 1
+
+@pytest.mark.asyncio
+async def test_search_calls_search_chats_with_the_position():
+    message_id = uuid.uuid4()
+    repo, pool = make_repo([{
+        "conversation_id": "c1", "topic": "T", "message_id": message_id, "role": "user",
+        "snippet": "the **moon**", "rank": 0.5, "created_at": CREATED, "key": str(message_id)
+    }])
+
+    hits = await repo.search("moon", limit=3, after=("0.75", "k"))
+
+    query, *args = pool.fetch.await_args.args
+    assert "search_chats" in query
+    assert args == ["moon", 3, 0.75, "k"]
+    assert hits[0]["message_id"] == str(message_id) and hits[0]["created_at"] == CREATED.isoformat()
@@ -0,0 +1,142 @@
+import json
+import pytest
+from starlette.requests import Request
+from app.core.response_cache import ResponseCache, etag_matches
+from app.features.chat.repositories.cached_chat_repository import CachedChatRepository
+from app.features.chat.repositories.change_versions import CHATS, ChangeVersions
+from app.features.chat.repositories.history_cache import HistoryCache
+from app.features.chat.repositories.meta_cache import ConversationMetaCache
+from app.features.chat.repositories.sqlite_chat_repository import SqliteChatRepository
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def make_request(path="/api/v1/chat/chats", query="", if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": query.encode(), "headers": headers})
+
+class Builder:
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return b'[{"n":%d}]' % self.calls, {"X-Next-Cursor": "older"}
+
+def test_etag_matching():
+    assert etag_matches('"a"', '"a"')
+    assert etag_matches('W/"a"', '"a"')
+    assert etag_matches('"b", "a"', '"a"')
+    assert etag_matches("*", '"a"')
+    assert not etag_matches('"b"', '"a"')
+    assert not etag_matches(None, '"a"')
+
+@pytest.mark.asyncio
+async def test_unchanged_version_skips_build_and_matching_etag_gets_304():
+    versions = ChangeVersions(max_keys=10)
+    cache = ResponseCache(versions.version, max_entries=10, ttl_seconds=60, clock=FakeClock())
+    build = Builder()
+
+    first = await cache.respond(make_request(), CHATS, build)
+    assert first.status_code == 200
+    assert first.body == b'[{"n":1}]'
+    assert first.headers["X-Next-Cursor"] == "older"
+    etag = first.headers["ETag"]
+
+    again = await cache.respond(make_request(), CHATS, build)
+    assert again.body == first.body
+    not_modified = await cache.respond(make_request(if_none_match=etag), CHATS, build)
+    assert not_modified.status_code == 304
+    assert not_modified.body == b""
+    assert not_modified.headers["ETag"] == etag
+    assert build.calls == 1
+    assert cache.stats()["not_modified"] == 1
+
+@pytest.mark.asyncio
+async def test_write_rebuilds_and_changes_etag():
+    versions = ChangeVersions(max_keys=10)
+    cache = ResponseCache(versions.version, max_entries=10, ttl_seconds=60, clock=FakeClock())
+    build = Builder()
+    etag = (await cache.respond(make_request(), CHATS, build)).headers["ETag"]
+
+    # a new message doesn't change the chat list
+    versions.conversation_changed("c1")
+    assert (await cache.respond(make_request(if_none_match=etag), CHATS, build)).status_code == 304
+
+    versions.conversation_listed("c1")
+    response = await cache.respond(make_request(if_none_match=etag), CHATS, build)
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert build.calls == 2
+
+@pytest.mark.asyncio
+async def test_entries_expire_so_other_workers_writes_show_up():
+    clock = FakeClock()
+    versions = ChangeVersions(max_keys=10)
+    cache = ResponseCache(versions.version, max_entries=10, ttl_seconds=5, clock=clock)
+    build = Builder()
+    await cache.respond(make_request(), CHATS, build)
+
+    clock.now = 6
+    await cache.respond(make_request(), CHATS, build)
+    assert build.calls == 2
+
+@pytest.mark.asyncio
+async def test_history_page_shows_another_workers_write_within_both_ttls():
+    clock = FakeClock()
+    db = SqliteChatRepository()
+
+    def worker():
+        repository = CachedChatRepository(
+            db,
+            HistoryCache(window=5, max_conversations=10, max_bytes=10**6, ttl_seconds=30, clock=clock),
+            ConversationMetaCache(max_entries=10, ttl_seconds=60, negative_ttl_seconds=1)
+        )
+        cache = ResponseCache(repository.versions.version, max_entries=10, ttl_seconds=5, clock=clock)
+        return repository, cache
+
+    (writer, _), (reader, cache) = worker(), worker()
+
+    async def build():
+        rows = await reader.get_messages("c1", limit=5)
+        return json.dumps([row["message"] for row in rows]).encode(), {}
+
+    async def page():
+        return json.loads((await cache.respond(make_request("/api/v1/chat/history/c1"), "c1", build)).body)
+
+    await writer.save_conversation_meta("c1", "T", "S")
+    await writer.save_message("c1", "user", "opening")
+    assert await page() == ["opening"]
+
+    await writer.save_message("c1", "bot", "reply")
+    # the page is rebuilt once its TTL is up, but from the reader's still-fresh history cache
+    clock.now = 29
+    assert await page() == ["opening"]
+    clock.now = 30 + 5
+    assert await page() == ["reply", "opening"]
+    db.close()
+
+@pytest.mark.asyncio
+async def test_query_string_is_part_of_the_key():
+    versions = ChangeVersions(max_keys=10)
+    cache = ResponseCache(versions.version, max_entries=10, ttl_seconds=60, clock=FakeClock())
+    build = Builder()
+    await cache.respond(make_request(query="limit=1"), CHATS, build)
+    await cache.respond(make_request(query="limit=2"), CHATS, build)
+    assert build.calls == 2
+
+def test_evicted_keys_never_look_older():
+    versions = ChangeVersions(max_keys=2)
+    versions.bump("a")
+    seen = versions.version("a")
+    versions.bump("b")
+    versions.bump("c")
+
+    assert "a" not in versions._versions
+    assert versions.version("a") >= seen
+    assert versions.version("never-written") == versions.version("a")
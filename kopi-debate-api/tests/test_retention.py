@@ -0,0 +1,100 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock
+from app.features.chat.services.retention import ConversationPurger, PurgeReport, RetentionJob
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def stored(count, start=datetime(2024, 1, 1, tzinfo=timezone.utc)):
+    return [
+        {"conversation_id": f"c{i}", "topic": "T", "created_at": (start + timedelta(days=i)).isoformat()}
+        for i in range(count)
+    ]
+
+
+def fake_repository(chats, clock, seconds_per_conversation=0.0):
+    """Deletes from `chats`, taking `seconds_per_conversation` of fake time per conversation."""
+    repository = AsyncMock()
+    repository.get_chats.side_effect = lambda limit=None, desc=True, after=None: list(chats[:limit])
+
+    async def delete_chats(conversation_ids):
+        clock.now += seconds_per_conversation * len(conversation_ids)
+        chats[:] = [chat for chat in chats if chat["conversation_id"] not in conversation_ids]
+        return {"conversations": len(conversation_ids), "messages": 2 * len(conversation_ids)}
+
+    repository.delete_chats.side_effect = delete_chats
+    return repository
+
+
+@pytest.mark.asyncio
+async def test_delete_by_ids_in_batches():
+    clock = FakeClock()
+    repository = fake_repository(stored(5), clock)
+    purger = ConversationPurger(repository, batch_size=2, pause_seconds=0, clock=clock)
+
+    report = await purger.delete(["c0", "c1", "c1", "c2", "c3", "c4"])
+
+    assert [call.args[0] for call in repository.delete_chats.await_args_list] == [["c0", "c1"], ["c2", "c3"], ["c4"]]
+    assert (report.conversations, report.messages, report.batches) == (5, 10, 3)
+
+
+@pytest.mark.asyncio
+async def test_slow_batches_shrink_and_fast_ones_grow_back():
+    clock = FakeClock()
+    chats = stored(40)
+    # 60ms a conversation: a batch of 8 takes 480ms, of 4 240ms, both over the 200ms target
+    repository = fake_repository(chats, clock, seconds_per_conversation=0.06)
+    purger = ConversationPurger(repository, batch_size=8, batch_target_seconds=0.2, pause_seconds=0, clock=clock)
+
+    await purger.delete([chat["conversation_id"] for chat in chats[:14]])
+    assert [len(call.args[0]) for call in repository.delete_chats.await_args_list] == [8, 4, 2]
+
+    purger.repository = fast = fake_repository(chats, clock)
+    await purger.delete([chat["conversation_id"] for chat in chats])
+    assert [len(call.args[0]) for call in fast.delete_chats.await_args_list] == [2, 4, 8, 8, 4]
+
+
+@pytest.mark.asyncio
+async def test_purge_stops_at_the_cutoff():
+    clock = FakeClock()
+    chats = stored(10)
+    purger = ConversationPurger(fake_repository(chats, clock), batch_size=3, pause_seconds=0, clock=clock)
+
+    report = await purger.purge_created_before(datetime(2024, 1, 8, tzinfo=timezone.utc))
+
+    assert (report.conversations, report.batches, report.complete) == (7, 3, True)
+    assert [chat["conversation_id"] for chat in chats] == ["c7", "c8", "c9"]
+
+
+@pytest.mark.asyncio
+async def test_purge_is_time_boxed():
+    clock = FakeClock()
+    chats = stored(10)
+    repository = fake_repository(chats, clock, seconds_per_conversation=0.01)
+    purger = ConversationPurger(repository, batch_size=2, pause_seconds=0, clock=clock)
+
+    report = await purger.purge_created_before(datetime(2025, 1, 1, tzinfo=timezone.utc), max_seconds=0.05)
+
+    assert (report.conversations, report.batches, report.complete) == (6, 3, False)
+    assert len(report.batch_seconds) == 3 and report.seconds == pytest.approx(0.06)
+    assert len(chats) == 4
+
+
+@pytest.mark.asyncio
+async def test_retention_run_purges_older_than_max_age():
+    purger = AsyncMock()
+    purger.purge_created_before.return_value = PurgeReport(conversations=1, batches=1, batch_seconds=[0.01])
+    now = datetime(2024, 3, 1, tzinfo=timezone.utc)
+    job = RetentionJob(purger, max_age_days=30, run_max_seconds=5, now=lambda: now)
+
+    await job.run_once()
+
+    purger.purge_created_before.assert_awaited_once_with(now - timedelta(days=30), 5)
+    assert job.last_report is purger.purge_created_before.return_value
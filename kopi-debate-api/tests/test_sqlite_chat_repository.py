@@ -0,0 +1,293 @@
+import sqlite3
+from datetime import datetime
+import pytest
+from app.features.chat.repositories.sqlite_chat_repository import SqliteChatRepository
+from app.features.chat.services.chat_service import ChatService
+
+
+@pytest.fixture
+def repo():
+    repo = SqliteChatRepository()
+    yield repo
+    repo.close()
+
+@pytest.mark.asyncio
+async def test_meta_round_trip(repo):
+    assert await repo.get_conversation_meta("c1") is None
+    await repo.save_conversation_meta("c1", "Moon landing", "was faked")
+
+    assert await repo.get_conversation_meta("c1") == \
+        {"topic": "Moon landing", "stance": "was faked", "summary": None, "summary_upto": None}
+
+@pytest.mark.asyncio
+async def test_messages_newest_first_with_limit(repo):
+    await repo.save_conversation_meta("c1", "T", "S")
+    saved = await repo.save_messages([
+        {"conversation_id": "c1", "role": "user", "message": f"m{i}", "created_at": f"2024-01-01T00:00:0{i}+00:00"}
+        for i in range(4)
+    ])
+    assert [row["message"] for row in saved] == ["m0", "m1", "m2", "m3"]
+    assert repo.round_trips == 2
+
+    state = await repo.get_conversation_with_messages("c1", limit=3)
+    assert [m["message"] for m in state["messages"]] == ["m3", "m2", "m1"]
+    assert await repo.get_conversation_with_messages("missing") is None
+    ascending = await repo.get_messages("c1", limit=2, desc=False)
+    assert [m["message"] for m in ascending] == ["m0", "m1"]
+
+@pytest.mark.asyncio
+async def test_timestamps_sort_across_offsets(repo):
+    await repo.save_conversation_meta("c1", "T", "S")
+    await repo.save_messages([
+        {"conversation_id": "c1", "role": "user", "message": "later", "created_at": "2024-01-01T09:00:00+08:00"},
+        {"conversation_id": "c1", "role": "bot", "message": "earlier", "created_at": "2024-01-01T00:30:00+00:00"},
+    ])
+    messages = await repo.get_messages("c1")
+    assert [m["message"] for m in messages] == ["later", "earlier"]
+
+@pytest.mark.asyncio
+async def test_partial_flag_is_bool(repo):
+    await repo.save_conversation_meta("c1", "T", "S")
+    row = await repo.save_message("c1", "bot", "cut off", partial=True)
+    assert row["partial"] is True
+    assert (await repo.get_messages("c1"))[0]["partial"] is True
+
+@pytest.mark.asyncio
+async def test_summary_compare_and_set(repo):
+    await repo.save_conversation_meta("c1", "T", "S")
+    upto = "2024-01-01T00:00:01+00:00"
+
+    assert await repo.update_conversation_summary("c1", "first", upto, None)
+    # a second writer still expecting no summary loses
+    assert not await repo.update_conversation_summary("c1", "stale", upto, None)
+    assert await repo.update_conversation_summary("c1", "second", "2024-01-01T00:00:05+00:00", upto)
+
+    meta = await repo.get_conversation_meta("c1")
+    assert meta["summary"] == "second"
+
+@pytest.mark.asyncio
+async def test_delete_cascades_to_messages(repo):
+    await repo.save_conversation_meta("c1", "T", "S")
+    await repo.save_message("c1", "user", "hi")
+    await repo.delete_chat("c1")
+
+    assert await repo.get_chats() == []
+    assert await repo.get_messages("c1") == []
+
+@pytest.mark.asyncio
+async def test_bulk_delete_counts_what_it_removed(repo):
+    for conversation_id in ("c1", "c2", "c3"):
+        await repo.save_conversation_meta(conversation_id, "T", "S")
+        await repo.save_messages([{"conversation_id": conversation_id, "role": "user", "message": "hi"}] * 2)
+    repo.round_trips = 0
+
+    assert await repo.delete_chats(["c1", "c3", "missing"]) == {"conversations": 2, "messages": 4}
+    assert repo.round_trips == 1
+    assert [chat["conversation_id"] for chat in await repo.get_chats()] == ["c2"]
+    assert await repo.delete_chats([]) == {"conversations": 0, "messages": 0}
+
+@pytest.mark.asyncio
+async def test_message_for_unknown_conversation_is_rejected(repo):
+    with pytest.raises(sqlite3.IntegrityError):
+        await repo.save_message("nope", "user", "hi")
+
+@pytest.mark.asyncio
+async def test_chat_service_end_to_end(repo, fake_llm):
+    service = ChatService(repository=repo, llm_service=fake_llm)
+
+    first = await service.post_message(None, "The moon landing was faked")
+    assert first.ok
+    conversation_id = first._value.conversation_id
+    second = await service.post_message(conversation_id, "The shadows are wrong")
+    assert second.ok
+
+    history = await service.get_history(conversation_id)
+    assert [m.role for m in history._value.items] == ["user", "bot", "user", "bot"]
+    chats = await service.get_chats()
+    assert [c.conversation_id for c in chats._value.items] == [conversation_id]
+
+@pytest.mark.asyncio
+async def test_history_pages_back_from_latest(repo, fake_llm):
+    service = ChatService(repository=repo, llm_service=fake_llm)
+    await repo.save_conversation_meta("c1", "T", "S")
+    # identical timestamps in pairs: the id breaks the tie so no row is skipped or repeated
+    await repo.save_messages([
+        {"conversation_id": "c1", "role": "user", "message": f"m{i}", "created_at": f"2024-01-01T00:00:0{i // 2}+00:00"}
+        for i in range(7)
+    ])
+    ordered = [m["message"] for m in await repo.get_messages("c1", limit=10, desc=False)]
+
+    pages, cursor = [], None
+    while True:
+        page = (await service.get_history("c1", limit=3, cursor=cursor, latest=True))._value
+        pages.append([m.message for m in page.items])
+        if page.prev_cursor is None:
+            break
+        cursor = page.prev_cursor
+    assert [m for p in reversed(pages) for m in p] == ordered
+    assert [len(p) for p in pages] == [3, 3, 1]
+
+    # and forward again from the oldest page
+    forward = (await service.get_history("c1", limit=3, cursor=page.next_cursor))._value
+    assert [m.message for m in forward.items] == ordered[1:4]
+    assert forward.prev_cursor is not None
+
+@pytest.mark.asyncio
+async def test_chats_keyset_pages(repo, fake_llm):
+    service = ChatService(repository=repo, llm_service=fake_llm)
+    for i in range(5):
+        await repo.save_conversation_meta(f"c{i}", f"topic {i}", "S")
+
+    first = (await service.get_chats(limit=2))._value
+    second = (await service.get_chats(limit=2, cursor=first.next_cursor))._value
+    third = (await service.get_chats(limit=2, cursor=second.next_cursor))._value
+    seen = [c.conversation_id for page in (first, second, third) for c in page.items]
+    assert seen == ["c4", "c3", "c2", "c1", "c0"]
+    assert first.prev_cursor is None and third.next_cursor is None
+
+    back = (await service.get_chats(limit=2, cursor=second.prev_cursor))._value
+    assert [c.conversation_id for c in back.items] == ["c4", "c3"]
+    assert back.prev_cursor is None
+
+@pytest.mark.asyncio
+async def test_keyset_queries_use_the_indexes(repo):
+    plan = repo.connection.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM chat_messages WHERE conversation_id = ? AND (created_at, id) > (?, ?) "
+        "ORDER BY created_at, id LIMIT 5", ("c1", "2024-01-01", "x")
+    ).fetchall()
+    assert "idx_chat_messages_conversation_created" in str([tuple(row) for row in plan])
+    assert "TEMP B-TREE" not in str([tuple(row) for row in plan])
+
+async def _search_corpus(repo):
+    await repo.save_conversation_meta("c1", "Vaccines", "Vaccines cause more harm than good")
+    await repo.save_conversation_meta("c2", "Moon landing", "The landing was staged")
+    await repo.save_messages([
+        {"conversation_id": "c1", "role": "user", "message": "Vaccines are tested on millions of people before approval"},
+        {"conversation_id": "c1", "role": "bot", "message": "Side effects are rare and usually mild"},
+        {"conversation_id": "c2", "role": "bot", "message": "The shadows in the photos prove the landing was staged"},
+    ])
+
+@pytest.mark.asyncio
+async def test_search_ranks_and_highlights_matches(repo):
+    await _search_corpus(repo)
+
+    hits = await repo.search("vaccine")
+    assert {hit["conversation_id"] for hit in hits} == {"c1"}
+    assert [hit["rank"] for hit in hits] == sorted((hit["rank"] for hit in hits), reverse=True)
+    by_role = {hit["role"]: hit for hit in hits}
+    # one hit for the conversation (stemmed: "vaccine" matches "Vaccines"), one for the user's message
+    assert by_role[None]["message_id"] is None and by_role[None]["topic"] == "Vaccines"
+    assert "**Vaccines**" in by_role[None]["snippet"]
+    assert by_role["user"]["snippet"].startswith("**Vaccines** are tested")
+    # FTS5 syntax in the query is matched as words, not parsed
+    assert await repo.search('side" OR effects*') == []
+    assert [hit["role"] for hit in await repo.search("side-effects!")] == ["bot"]
+
+@pytest.mark.asyncio
+async def test_search_pages_by_rank_and_key(repo):
+    await repo.save_conversation_meta("c1", "T", "S")
+    await repo.save_messages([{"conversation_id": "c1", "role": "user", "message": "same words"} for _ in range(5)])
+
+    everything = await repo.search("words", limit=10)
+    first = await repo.search("words", limit=2)
+    rest = await repo.search("words", limit=10, after=(repr(first[-1]["rank"]), first[-1]["key"]))
+    assert [hit["key"] for hit in first + rest] == [hit["key"] for hit in everything]
+
+@pytest.mark.asyncio
+async def test_deleted_chats_leave_the_index(repo):
+    await _search_corpus(repo)
+    await repo.delete_chat("c2")
+
+    assert await repo.search("landing") == []
+    stale = repo.connection.execute("SELECT count(*) FROM chat_messages_fts WHERE chat_messages_fts MATCH 'shadows'")
+    assert stale.fetchone()[0] == 0
+
+def test_existing_database_is_indexed_on_open(tmp_path):
+    path = str(tmp_path / "chat.db")
+    connection = sqlite3.connect(path)
+    connection.executescript(
+        "CREATE TABLE conversations (conversation_id TEXT PRIMARY KEY, topic TEXT NOT NULL, stance TEXT NOT NULL, "
+        "summary TEXT, summary_upto TEXT, created_at TEXT NOT NULL);"
+        "INSERT INTO conversations VALUES ('c1', 'Flat earth', 'S', NULL, NULL, '2024-01-01T00:00:00+00:00');"
+    )
+    connection.close()
+
+    repo = SqliteChatRepository(path)
+    assert [hit["conversation_id"] for hit in repo.connection.execute(
+        "SELECT rowid AS conversation_id FROM conversations_fts WHERE conversations_fts MATCH 'flat'"
+    )] == [1]
+    repo.close()
+
+@pytest.mark.asyncio
+async def test_search_service_pages_forward(repo, fake_llm):
+    service = ChatService(repository=repo, llm_service=fake_llm)
+    await _search_corpus(repo)
+
+    first = (await service.search("landing staged", limit=1))._value
+    second = (await service.search("landing staged", limit=1, cursor=first.next_cursor))._value
+    assert {(hit.conversation_id, hit.role) for hit in first.items + second.items} == {("c2", None), ("c2", "bot")}
+    assert second.next_cursor is None and second.prev_cursor is None
+
+@pytest.mark.asyncio
+async def test_search_ranks_only_the_newest_candidates(repo, monkeypatch):
+    monkeypatch.setattr("app.features.chat.repositories.sqlite_chat_repository._MAX_CANDIDATES", 2)
+    await repo.save_conversation_meta("c1", "T", "S")
+    await repo.save_messages([{"conversation_id": "c1", "role": "user", "message": f"common word {i}"} for i in range(5)])
+
+    hits = await repo.search("common", limit=10)
+    assert sorted(hit["snippet"] for hit in hits) == ["**common** word 3", "**common** word 4"]
+
+async def _exported(result):
+    return [rows async for rows in result._value]
+
+@pytest.mark.asyncio
+async def test_export_reads_in_keyset_chunks(repo, fake_llm):
+    service = ChatService(repository=repo, llm_service=fake_llm)
+    await repo.save_conversation_meta("c1", "T", "S")
+    await repo.save_messages([{"conversation_id": "c1", "role": "user", "message": f"m{i}"} for i in range(7)])
+    repo.round_trips = 0
+
+    chunks = await _exported(await service.export("c1", chunk_size=3))
+
+    assert [len(rows) for rows in chunks] == [3, 3, 1]
+    assert [row["message"] for rows in chunks for row in rows] == [f"m{i}" for i in range(7)]
+    assert chunks[0][0]["topic"] == "T" and chunks[0][0]["stance"] == "S"
+    # the meta lookup, then one query per chunk
+    assert repo.round_trips == 4
+    missing = await service.export("missing")
+    assert missing._is_error and missing._value.status_code == 404
+
+@pytest.mark.asyncio
+async def test_export_date_range(repo, fake_llm):
+    service = ChatService(repository=repo, llm_service=fake_llm)
+    days = {"c1": "2024-01-01", "c2": "2024-01-02", "c3": "2024-01-03", "c4": "2024-01-04"}
+    for conversation_id, day in days.items():
+        repo.connection.execute(
+            "INSERT INTO conversations (conversation_id, topic, stance, created_at) VALUES (?, 'T', 'S', ?)",
+            (conversation_id, f"{day}T00:00:00.000000+00:00")
+        )
+        await repo.save_message(conversation_id, "user", f"in {conversation_id}")
+
+    chunks = await _exported(await service.export(
+        since=datetime(2024, 1, 2), until=datetime(2024, 1, 4), chunk_size=1
+    ))
+    assert [row["conversation_id"] for rows in chunks for row in rows] == ["c2", "c3"]
+    assert (await service.export(since=datetime(2024, 1, 4), until=datetime(2024, 1, 2)))._is_error
+
+@pytest.mark.asyncio
+async def test_bulk_delete_by_age(repo, fake_llm):
+    service = ChatService(repository=repo, llm_service=fake_llm)
+    for day in range(1, 6):
+        repo.connection.execute(
+            "INSERT INTO conversations (conversation_id, topic, stance, created_at) VALUES (?, 'T', 'S', ?)",
+            (f"c{day}", f"2024-01-0{day}T00:00:00.000000+00:00")
+        )
+        await repo.save_message(f"c{day}", "user", "hi")
+    service.purger.batch_size = service.purger._next_size = 2
+
+    result = await service.delete_chats(created_before=datetime(2024, 1, 4))
+
+    assert result._value.model_dump() == {"conversations": 3, "messages": 3, "batches": 2, "complete": True}
+    assert [chat["conversation_id"] for chat in await repo.get_chats(desc=False)] == ["c4", "c5"]
+    assert (await service.delete_chats())._value.status_code == 400
+    assert (await service.delete_chats(["c4"], created_before=datetime(2024, 1, 4)))._is_error
@@ -0,0 +1,47 @@
+import os
+import re
+import subprocess
+import sys
+from fastapi.testclient import TestClient
+from app.main import app
+from benchmarks.fakes import FakeSupabaseClient
+from benchmarks.load import installed_fakes
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# cumulative `import app.main`, fastapi included; raise it with IMPORT_TIME_BUDGET_MS on slow runners
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "1200"))
+# loaded on first use or during lifespan startup, never by importing the app
+DEFERRED_MODULES = ("google.generativeai", "google.api_core", "supabase", "asyncpg", "grpc")
+
+_IMPORT_LINE = re.compile(r"import time:\s+\d+ \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def import_times():
+    """{module: cumulative microseconds} from `python -X importtime -c "import app.main"`."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    )
+    return {
+        match.group(3): int(match.group(1))
+        for match in map(_IMPORT_LINE.match, completed.stderr.splitlines()) if match
+    }
+
+def test_importing_the_app_skips_sdks_and_stays_within_budget():
+    times = import_times()
+
+    loaded = [name for name in times if any(name == m or name.startswith(m + ".") for m in DEFERRED_MODULES)]
+    assert loaded == []
+    assert times["app.main"] / 1000 < IMPORT_TIME_BUDGET_MS
+
+def test_ready_only_between_startup_and_shutdown():
+    client = TestClient(app)
+    assert client.get("/ready").status_code == 503
+    assert client.get("/").status_code == 200
+
+    with installed_fakes(FakeSupabaseClient()):
+        with TestClient(app) as client:
+            response = client.get("/ready")
+            assert response.status_code == 200
+            assert response.json() == {"status": "ready"}
+        assert app.state.ready is False
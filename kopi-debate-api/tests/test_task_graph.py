@@ -0,0 +1,100 @@
+import asyncio
+import pytest
+from app.core.errors import Result
+from app.core.task_graph import TaskGraph
+
+
+@pytest.mark.asyncio
+async def test_independent_steps_overlap_and_dependents_get_their_values():
+    started = []
+
+    async def step(name, value, **deps):
+        started.append(name)
+        await asyncio.sleep(0.01)
+        return value + sum(deps.values())
+
+    graph = TaskGraph()
+    graph.add("a", lambda: step("a", 1))
+    graph.add("b", lambda: step("b", 2))
+    graph.add("c", lambda a, b: step("c", 10, a=a, b=b), after=["a", "b"])
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    result = await graph.run()
+    elapsed = loop.time() - start
+
+    assert result._value == {"a": 1, "b": 2, "c": 13}
+    assert started == ["a", "b", "c"]
+    # a and b ran side by side: two steps deep, not three
+    assert elapsed < 0.03
+
+@pytest.mark.asyncio
+async def test_results_are_unwrapped():
+    graph = TaskGraph()
+    graph.add("a", lambda: asyncio.sleep(0, Result.ok("reply")))
+    graph.add("b", lambda a: asyncio.sleep(0, a.upper()), after=["a"])
+
+    assert (await graph.run())._value == {"a": "reply", "b": "REPLY"}
+
+@pytest.mark.asyncio
+async def test_failure_cancels_running_steps_and_skips_dependents():
+    cancelled = asyncio.Event()
+    dependent_ran = False
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def dependent(**_):
+        nonlocal dependent_ran
+        dependent_ran = True
+
+    graph = TaskGraph()
+    graph.add("slow", slow)
+    graph.add("fails", lambda: asyncio.sleep(0, Result.fail("no reply", status_code=503)))
+    graph.add("after", dependent, after=["slow", "fails"])
+
+    result = await graph.run()
+
+    assert result._is_error
+    assert (result._value.error, result._value.status_code) == ("no reply", 503)
+    assert cancelled.is_set()
+    assert not dependent_ran
+
+@pytest.mark.asyncio
+async def test_exceptions_propagate():
+    async def boom():
+        raise RuntimeError("db down")
+
+    graph = TaskGraph()
+    graph.add("slow", lambda: asyncio.sleep(10))
+    graph.add("boom", boom)
+
+    with pytest.raises(RuntimeError, match="db down"):
+        await graph.run()
+
+@pytest.mark.asyncio
+async def test_sequential_mode_runs_in_insertion_order():
+    active, overlapped = 0, False
+
+    async def step():
+        nonlocal active, overlapped
+        active += 1
+        overlapped |= active > 1
+        await asyncio.sleep(0)
+        active -= 1
+
+    graph = TaskGraph(concurrent=False)
+    graph.add("a", step)
+    graph.add("b", step)
+    await graph.run()
+
+    assert not overlapped
+
+def test_dependencies_must_exist():
+    graph = TaskGraph()
+    with pytest.raises(ValueError):
+        graph.add("a", lambda b: None, after=["b"])
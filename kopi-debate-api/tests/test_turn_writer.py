@@ -0,0 +1,98 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+from app.features.chat.services.turn_writer import TurnWriter
+
+
+def make_repo():
+    repo = AsyncMock()
+    repo.save_messages.side_effect = lambda rows: [{**row, "id": str(i)} for i, row in enumerate(rows)]
+    return repo
+
+def turn_rows(conversation_id):
+    return [
+        {"conversation_id": conversation_id, "role": "user", "message": "u"},
+        {"conversation_id": conversation_id, "role": "bot", "message": "b"},
+    ]
+
+@pytest.mark.asyncio
+async def test_concurrent_turns_share_one_write():
+    repo = make_repo()
+    writer = TurnWriter(repo)
+
+    saved = await asyncio.gather(*[
+        writer.write({"conversation_id": f"c{i}", "topic": "T", "stance": "S"} if i % 2 else None, turn_rows(f"c{i}"))
+        for i in range(5)
+    ])
+
+    assert writer.flushes == 1
+    repo.save_conversations.assert_awaited_once_with([
+        {"conversation_id": "c1", "topic": "T", "stance": "S"},
+        {"conversation_id": "c3", "topic": "T", "stance": "S"},
+    ])
+    repo.save_messages.assert_awaited_once()
+    # each turn gets back its own rows
+    assert [[row["conversation_id"] for row in rows] for rows in saved] == [[f"c{i}"] * 2 for i in range(5)]
+
+@pytest.mark.asyncio
+async def test_turns_finishing_during_a_write_go_in_the_next():
+    repo = make_repo()
+    release = asyncio.Event()
+    save = repo.save_messages.side_effect
+
+    async def slow_save(rows):
+        await release.wait()
+        return save(rows)
+    repo.save_messages.side_effect = slow_save
+    writer = TurnWriter(repo)
+
+    first = asyncio.create_task(writer.write(None, turn_rows("c0")))
+    await asyncio.sleep(0.01)
+    later = [asyncio.create_task(writer.write(None, turn_rows(f"c{i}"))) for i in range(1, 4)]
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(first, *later)
+
+    assert writer.flushes == 2
+    assert [len(call.args[0]) for call in repo.save_messages.await_args_list] == [2, 6]
+    repo.save_conversations.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_failed_write_fails_every_turn_that_cannot_be_written():
+    repo = make_repo()
+    repo.save_messages.side_effect = RuntimeError("db down")
+    writer = TurnWriter(repo)
+
+    results = await asyncio.gather(
+        writer.write(None, turn_rows("c0")), writer.write(None, turn_rows("c1")), return_exceptions=True
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+    # the writer recovers for the next group
+    repo.save_messages.side_effect = lambda rows: rows
+    assert len(await writer.write(None, turn_rows("c2"))) == 2
+
+@pytest.mark.asyncio
+async def test_one_bad_turn_fails_alone():
+    repo = make_repo()
+    save = repo.save_messages.side_effect
+
+    def save_unless_deleted(rows):
+        if any(row["conversation_id"] == "deleted" for row in rows):
+            raise RuntimeError("FOREIGN KEY constraint failed")
+        return save(rows)
+    repo.save_messages.side_effect = save_unless_deleted
+    writer = TurnWriter(repo)
+
+    results = await asyncio.gather(
+        writer.write({"conversation_id": "new", "topic": "T", "stance": "S"}, turn_rows("new")),
+        writer.write(None, turn_rows("deleted")),
+        writer.write(None, turn_rows("c1")),
+        return_exceptions=True
+    )
+
+    assert [row["conversation_id"] for row in results[0]] == ["new", "new"]
+    assert isinstance(results[1], RuntimeError)
+    assert [row["conversation_id"] for row in results[2]] == ["c1", "c1"]
+    # the group's conversations were saved before its messages failed, so they are not inserted again
+    repo.save_conversations.assert_awaited_once()
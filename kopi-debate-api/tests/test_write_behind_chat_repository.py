@@ -0,0 +1,175 @@
+import asyncio
+import itertools
+import pytest
+from app.features.chat.repositories.sqlite_chat_repository import SqliteChatRepository
+from app.features.chat.repositories.write_behind_chat_repository import WriteBehindChatRepository
+
+
+@pytest.fixture
+def store():
+    store = SqliteChatRepository()
+    yield store
+    store.close()
+
+_clock = itertools.count()
+
+def rows(conversation_id, *texts):
+    return [
+        {"conversation_id": conversation_id, "role": "user", "message": text, "created_at": f"2024-01-01T00:00:{next(_clock):09.6f}+00:00"}
+        for text in texts
+    ]
+
+async def stored(store, conversation_id):
+    return [m["message"] for m in await store.get_messages(conversation_id, limit=100, desc=False)]
+
+@pytest.mark.asyncio
+async def test_writes_return_at_once_and_flush_together_by_size(store):
+    await store.save_conversation_meta("c1", "T", "S")
+    repo = WriteBehindChatRepository(store, flush_rows=4, flush_interval_seconds=60)
+
+    saved = await repo.save_messages(rows("c1", "a", "b"))
+    assert [row["message"] for row in saved] == ["a", "b"]
+    assert all(row["id"] and row["created_at"] for row in saved)
+    assert await stored(store, "c1") == []
+
+    await repo.save_messages(rows("c1", "c", "d"))
+    await asyncio.sleep(0.01)
+    assert await stored(store, "c1") == ["a", "b", "c", "d"]
+    assert repo.flushes == 1
+    assert repo.depth == 0
+
+@pytest.mark.asyncio
+async def test_partial_batches_flush_after_the_interval(store):
+    await store.save_conversation_meta("c1", "T", "S")
+    repo = WriteBehindChatRepository(store, flush_rows=100, flush_interval_seconds=0.01)
+
+    await repo.save_message("c1", "bot", "cut off", partial=True)
+    await asyncio.sleep(0.05)
+
+    assert (await store.get_messages("c1"))[0]["partial"] is True
+
+@pytest.mark.asyncio
+async def test_reads_see_pending_rows_once(store):
+    await store.save_conversation_meta("c1", "T", "S")
+    repo = WriteBehindChatRepository(store, flush_rows=2, flush_interval_seconds=60)
+    await repo.save_messages(rows("c1", "a", "b"))
+    await asyncio.sleep(0.01)
+    await repo.save_messages(rows("c1", "c"))
+
+    state = await repo.get_conversation_with_messages("c1", limit=2)
+    assert [m["message"] for m in state["messages"]] == ["c", "b"]
+    ascending = await repo.get_messages("c1", limit=10, desc=False)
+    assert [m["message"] for m in ascending] == ["a", "b", "c"]
+    after_a = await repo.get_messages("c1", limit=10, desc=False, after=(ascending[0]["created_at"], ascending[0]["id"]))
+    assert [m["message"] for m in after_a] == ["b", "c"]
+
+@pytest.mark.asyncio
+async def test_failed_flush_is_retried_without_duplicates(store):
+    await store.save_conversation_meta("c1", "T", "S")
+
+    class LostAck:
+        """Stores the rows, then fails as if the response never arrived."""
+        def __init__(self):
+            self.failures = 1
+
+        def __getattr__(self, name):
+            return getattr(store, name)
+
+        async def save_messages_once(self, messages):
+            await store.save_messages_once(messages)
+            if self.failures:
+                self.failures -= 1
+                raise ConnectionError("connection reset")
+
+    repo = WriteBehindChatRepository(LostAck(), flush_rows=2, flush_interval_seconds=60, retry_max_seconds=0.01)
+    await repo.save_messages(rows("c1", "a", "b"))
+    await repo.drain(timeout=1)
+
+    assert await stored(store, "c1") == ["a", "b"]
+    assert repo.depth == 0
+
+@pytest.mark.asyncio
+async def test_drain_stores_everything_queued(store):
+    await store.save_conversation_meta("c1", "T", "S")
+    repo = WriteBehindChatRepository(store, flush_rows=2, flush_interval_seconds=60)
+    await repo.save_messages(rows("c1", "a", "b", "c", "d", "e"))
+
+    await repo.drain(timeout=1)
+
+    assert await stored(store, "c1") == ["a", "b", "c", "d", "e"]
+    assert repo.flushes == 3
+
+@pytest.mark.asyncio
+async def test_delete_drops_queued_rows(store):
+    await store.save_conversation_meta("c1", "T", "S")
+    await store.save_conversation_meta("c2", "T", "S")
+    repo = WriteBehindChatRepository(store, flush_rows=100, flush_interval_seconds=60)
+    await repo.save_messages(rows("c1", "a") + rows("c2", "b"))
+
+    await repo.delete_chat("c1")
+    await repo.drain(timeout=1)
+
+    assert await repo.get_messages("c1") == []
+    assert await stored(store, "c2") == ["b"]
+    assert repo.depth == 0
+
+@pytest.mark.asyncio
+async def test_full_queue_makes_writers_wait(store):
+    await store.save_conversation_meta("c1", "T", "S")
+    repo = WriteBehindChatRepository(store, max_rows=2, flush_rows=2, flush_interval_seconds=60)
+    gate = asyncio.Event()
+    save_once = store.save_messages_once
+
+    async def slow_save(messages):
+        await gate.wait()
+        await save_once(messages)
+    store.save_messages_once = slow_save
+
+    await repo.save_messages(rows("c1", "a", "b"))
+    await asyncio.sleep(0)
+    # the first batch is being flushed, so the queue has room again
+    await repo.save_messages(rows("c1", "c", "d"))
+    blocked = asyncio.create_task(repo.save_messages(rows("c1", "e")))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+
+    gate.set()
+    await blocked
+    await repo.drain(timeout=1)
+    assert await stored(store, "c1") == ["a", "b", "c", "d", "e"]
+
+@pytest.mark.asyncio
+async def test_row_of_a_deleted_conversation_does_not_block_the_queue(store):
+    await store.save_conversation_meta("a", "T", "S")
+    await store.save_conversation_meta("b", "T", "S")
+    repo = WriteBehindChatRepository(store, max_rows=4, flush_rows=4, flush_interval_seconds=60, retry_max_seconds=0.01)
+    # deleted underneath the queue, as by another worker: nothing tells this one to discard
+    await store.delete_chat("a")
+
+    await repo.save_messages(rows("b", "1") + rows("a", "lost") + rows("b", "2", "3"))
+    await repo.drain(timeout=1)
+    # the queue has room again for writers of every conversation
+    await asyncio.wait_for(repo.save_messages(rows("b", "4", "5", "6", "7")), 1)
+    await repo.drain(timeout=1)
+
+    assert await stored(store, "b") == ["1", "2", "3", "4", "5", "6", "7"]
+    assert repo.dropped == 1
+    assert repo.depth == 0
+
+@pytest.mark.asyncio
+async def test_flush_failing_transiently_is_dropped_after_max_attempts(store):
+    await store.save_conversation_meta("c1", "T", "S")
+    attempts = 0
+
+    async def down(messages):
+        nonlocal attempts
+        attempts += 1
+        raise ConnectionError("connection refused")
+    store.save_messages_once = down
+    repo = WriteBehindChatRepository(store, flush_rows=2, flush_interval_seconds=60, retry_max_seconds=0.001, max_attempts=3)
+
+    await repo.save_messages(rows("c1", "a", "b"))
+    await repo.drain(timeout=1)
+
+    assert attempts == 3
+    assert (repo.dropped, repo.depth) == (2, 0)
@@ -96,6 +96,8 @@ export function useConversations() {
   const sendMessage = useCallback(async (message: string) => {
     const tempId = `temp-${Date.now()}`;
     const currentConversationId = selectedConversation?.conversation_id;
+    // one key per logical send, so a retried or double-submitted request is answered once by the API
+    const idempotencyKey = crypto.randomUUID();
 
     if (!currentConversationId) {
       const tempConversation: Conversation = {
@@ -122,6 +124,7 @@ export function useConversations() {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          'Idempotency-Key': idempotencyKey,
         },
         body: JSON.stringify({
           conversation_id: currentConversationId,
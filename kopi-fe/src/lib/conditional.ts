@@ -0,0 +1,16 @@
+import { NextApiRequest, NextApiResponse } from 'next'
+
+// the API's ETag, so the browser can revalidate with If-None-Match and get a bodyless 304
+const VALIDATOR_HEADERS = ['ETag', 'Cache-Control']
+
+export function conditionalHeaders(req: NextApiRequest): Record<string, string> {
+  const ifNoneMatch = req.headers['if-none-match']
+  return ifNoneMatch ? { 'If-None-Match': String(ifNoneMatch) } : {}
+}
+
+export function forwardValidators(upstream: Response, res: NextApiResponse) {
+  for (const header of VALIDATOR_HEADERS) {
+    const value = upstream.headers.get(header)
+    if (value) res.setHeader(header, value)
+  }
+}
@@ -0,0 +1,11 @@
+import { NextApiResponse } from 'next'
+
+// keyset pagination cursors from the API, passed through to the browser untouched
+const CURSOR_HEADERS = ['X-Next-Cursor', 'X-Prev-Cursor']
+
+export function forwardCursors(upstream: Response, res: NextApiResponse) {
+  for (const header of CURSOR_HEADERS) {
+    const value = upstream.headers.get(header)
+    if (value) res.setHeader(header, value)
+  }
+}
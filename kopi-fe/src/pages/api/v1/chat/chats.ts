@@ -1,4 +1,6 @@
 import { NextApiRequest, NextApiResponse } from 'next'
+import { forwardCursors } from '@/lib/cursors'
+import { conditionalHeaders, forwardValidators } from '@/lib/conditional'
 
 export default async function handler(
   req: NextApiRequest,
@@ -14,15 +16,26 @@ export default async function handler(
     return res.status(500).json({ message: 'API URL not configured' })
   }
 
+  const params = new URLSearchParams()
+  if (req.query.limit) params.set('limit', String(req.query.limit))
+  if (req.query.cursor) params.set('cursor', String(req.query.cursor))
+
   try {
     console.log(`Fetching from: ${apiUrl}/chat/chats`)
-    const response = await fetch(`${apiUrl}/chat/chats`, {
+    const response = await fetch(`${apiUrl}/chat/chats?${params}`, {
       method: 'GET',
       headers: {
         'Content-Type': 'application/json',
+        ...conditionalHeaders(req),
       },
     })
 
+    forwardCursors(response, res)
+    forwardValidators(response, res)
+    if (response.status === 304) {
+      return res.status(304).end()
+    }
+
     if (!response.ok) {
       console.error(`API responded with status: ${response.status}`)
       const text = await response.text()
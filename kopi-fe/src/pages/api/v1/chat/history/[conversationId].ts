@@ -1,4 +1,6 @@
 import { NextApiRequest, NextApiResponse } from 'next'
+import { forwardCursors } from '@/lib/cursors'
+import { conditionalHeaders, forwardValidators } from '@/lib/conditional'
 
 export default async function handler(
   req: NextApiRequest,
@@ -8,20 +10,29 @@ export default async function handler(
     return res.status(405).json({ message: 'Method not allowed' })
   }
 
-  //ran out of time to implement pagination :(
-  const { conversationId, limit = 40 } = req.query
+  const { conversationId, limit = 40, cursor, latest } = req.query
+  const params = new URLSearchParams({ limit: String(limit) })
+  if (cursor) params.set('cursor', String(cursor))
+  if (latest) params.set('latest', String(latest))
 
   try {
     const response = await fetch(
-      `${process.env.NEXT_PUBLIC_API_URL}/chat/history/${conversationId}?limit=${limit}`,
+      `${process.env.NEXT_PUBLIC_API_URL}/chat/history/${conversationId}?${params}`,
       {
         method: 'GET',
         headers: {
           'Content-Type': 'application/json',
+          ...conditionalHeaders(req),
         },
       }
     )
 
+    forwardCursors(response, res)
+    forwardValidators(response, res)
+    if (response.status === 304) {
+      return res.status(304).end()
+    }
+
     const data = await response.json()
     return res.status(response.status).json(data)
   } catch (error) {
@@ -8,11 +8,14 @@ export default async function handler(
     return res.status(405).json({ message: 'Method not allowed' })
   }
 
+  const idempotencyKey = req.headers['idempotency-key']
+
   try {
     const response = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/chat/message`, {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
+        ...(typeof idempotencyKey === 'string' ? { 'Idempotency-Key': idempotencyKey } : {}),
       },
       body: JSON.stringify(req.body),
     })
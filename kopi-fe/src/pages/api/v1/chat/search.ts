@@ -0,0 +1,45 @@
+import { NextApiRequest, NextApiResponse } from 'next'
+import { forwardCursors } from '@/lib/cursors'
+
+export default async function handler(
+  req: NextApiRequest,
+  res: NextApiResponse
+) {
+  if (req.method !== 'GET') {
+    return res.status(405).json({ message: 'Method not allowed' })
+  }
+
+  const apiUrl = process.env.NEXT_PUBLIC_API_URL
+  if (!apiUrl) {
+    console.error('API URL not configured')
+    return res.status(500).json({ message: 'API URL not configured' })
+  }
+
+  const params = new URLSearchParams()
+  if (req.query.q) params.set('q', String(req.query.q))
+  if (req.query.limit) params.set('limit', String(req.query.limit))
+  if (req.query.cursor) params.set('cursor', String(req.query.cursor))
+
+  try {
+    const response = await fetch(`${apiUrl}/chat/search?${params}`, {
+      method: 'GET',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+    })
+
+    forwardCursors(response, res)
+    if (!response.ok) {
+      console.error(`API responded with status: ${response.status}`)
+      const text = await response.text()
+      console.error('Response body:', text)
+      return res.status(response.status).json({ message: 'API request failed' })
+    }
+
+    const data = await response.json()
+    return res.status(200).json(data)
+  } catch (error) {
+    console.error('Error searching chats:', error)
+    return res.status(500).json({ message: 'Internal server error' })
+  }
+}